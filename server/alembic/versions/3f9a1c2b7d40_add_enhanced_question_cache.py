@@ -0,0 +1,49 @@
+"""add enhanced question cache
+
+Revision ID: 3f9a1c2b7d40
+Revises: e84b8ed81126
+Create Date: 2026-10-17 10:12:04.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2b7d40'
+down_revision: Union[str, Sequence[str], None] = 'e84b8ed81126'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'enhanced_question_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('namespace', sa.String(length=32), nullable=False),
+        sa.Column('normalized_question', sa.String(), nullable=False),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'namespace',
+            'normalized_question',
+            name='uq_enhanced_question_cache_namespace_question',
+        ),
+    )
+    op.create_index(
+        op.f('ix_enhanced_question_cache_id'),
+        'enhanced_question_cache',
+        ['id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_enhanced_question_cache_id'), table_name='enhanced_question_cache')
+    op.drop_table('enhanced_question_cache')
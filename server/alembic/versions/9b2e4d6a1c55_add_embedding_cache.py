@@ -0,0 +1,46 @@
+"""add embedding cache
+
+Revision ID: 9b2e4d6a1c55
+Revises: 3f9a1c2b7d40
+Create Date: 2026-10-17 14:02:37.415209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2e4d6a1c55'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c2b7d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'embedding_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('model', sa.String(length=64), nullable=False),
+        sa.Column('dimensions', sa.Integer(), nullable=False),
+        sa.Column('text_hash', sa.String(length=64), nullable=False),
+        sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'model',
+            'dimensions',
+            'text_hash',
+            name='uq_embedding_cache_model_dimensions_hash',
+        ),
+    )
+    op.create_index(op.f('ix_embedding_cache_id'), 'embedding_cache', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_embedding_cache_id'), table_name='embedding_cache')
+    op.drop_table('embedding_cache')
@@ -0,0 +1,54 @@
+"""add user id to leaderboard indexes
+
+Revision ID: a8c3e5f7b9d2
+Revises: f2b6d8e4a9c1
+Create Date: 2026-10-17 23:31:52.914027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c3e5f7b9d2'
+down_revision: Union[str, Sequence[str], None] = 'f2b6d8e4a9c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AVERAGE = sa.text('(CAST(points AS FLOAT) / CAST(games_played AS FLOAT)) DESC')
+
+
+def create_indexes(tie_break: list) -> None:
+    op.create_index(
+        'ix_leaderboard_scores_ranking',
+        'leaderboard_scores',
+        ['game', 'period', sa.text('points DESC'), sa.text('wins DESC')] + tie_break,
+        unique=False,
+    )
+    op.create_index(
+        'ix_leaderboard_scores_average',
+        'leaderboard_scores',
+        ['game', 'period', AVERAGE] + tie_break,
+        unique=False,
+        postgresql_where=sa.text('games_played >= 5'),
+    )
+
+
+def drop_indexes() -> None:
+    op.drop_index('ix_leaderboard_scores_average', table_name='leaderboard_scores')
+    op.drop_index('ix_leaderboard_scores_ranking', table_name='leaderboard_scores')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Cursor pages are ordered by the player id last
+    drop_indexes()
+    create_indexes(['user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_indexes()
+    create_indexes([])
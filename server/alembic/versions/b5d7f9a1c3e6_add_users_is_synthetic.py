@@ -0,0 +1,51 @@
+"""add users is_synthetic
+
+Revision ID: b5d7f9a1c3e6
+Revises: a8c3e5f7b9d2
+Create Date: 2026-10-18 00:12:44.380915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d7f9a1c3e6'
+down_revision: Union[str, Sequence[str], None] = 'a8c3e5f7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The username prefixes the leaderboards used to filter out, matched literally
+SYNTHETIC_PREFIXES = ('test_', 'pytest_', 'guess_c_', 'ask_q_')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('is_synthetic', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    )
+    # `_` is a LIKE wildcard, so it is escaped to match "testowy" no more than startswith does
+    patterns = ' OR '.join(
+        f"username LIKE '{prefix.replace('_', '!_')}%' ESCAPE '!'" for prefix in SYNTHETIC_PREFIXES
+    )
+    op.execute(f"UPDATE users SET is_synthetic = true WHERE {patterns}")
+    op.create_index(
+        'ix_users_is_synthetic',
+        'users',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('is_synthetic'),
+    )
+    # The boards no longer filter by player, so synthetic players must have no rows
+    op.execute(
+        "DELETE FROM leaderboard_scores s USING users u WHERE u.id = s.user_id AND u.is_synthetic"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_is_synthetic', table_name='users')
+    op.drop_column('users', 'is_synthetic')
@@ -0,0 +1,69 @@
+"""add fragment doc ordinal and window text
+
+Revision ID: c4d8e2f1a7b3
+Revises: 9b2e4d6a1c55
+Create Date: 2026-10-17 16:21:08.734512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e2f1a7b3'
+down_revision: Union[str, Sequence[str], None] = '9b2e4d6a1c55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FRAGMENT_TABLES = {
+    'country_fragments': 'country_id',
+    'powiat_fragments': 'powiat_id',
+    'wojewodztwo_fragments': 'wojewodztwo_id',
+    'us_state_fragments': 'us_state_id',
+}
+
+# Must match qdrant.utils.CONTEXT_SEPARATOR
+CONTEXT_SEPARATOR = '\n[ ... ]\n'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, key in FRAGMENT_TABLES.items():
+        op.add_column(table, sa.Column('doc_ordinal', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column('window_text', sa.Text(), nullable=True))
+
+        # Fragments were inserted in document order, so their ids give the order
+        op.execute(
+            sa.text(
+                f"""
+                UPDATE {table} AS f
+                SET doc_ordinal = w.doc_ordinal, window_text = w.window_text
+                FROM (
+                    SELECT
+                        id,
+                        ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY id) - 1 AS doc_ordinal,
+                        CONCAT_WS(
+                            :separator,
+                            LAG(text) OVER (PARTITION BY {key} ORDER BY id),
+                            text,
+                            LEAD(text) OVER (PARTITION BY {key} ORDER BY id)
+                        ) AS window_text
+                    FROM {table}
+                ) AS w
+                WHERE f.id = w.id
+                """
+            ).bindparams(separator=CONTEXT_SEPARATOR)
+        )
+        op.create_index(
+            f'ix_{table}_{key}_doc_ordinal', table, [key, 'doc_ordinal'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, key in FRAGMENT_TABLES.items():
+        op.drop_index(f'ix_{table}_{key}_doc_ordinal', table_name=table)
+        op.drop_column(table, 'window_text')
+        op.drop_column(table, 'doc_ordinal')
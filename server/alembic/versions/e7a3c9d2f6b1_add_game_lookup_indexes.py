@@ -0,0 +1,136 @@
+"""add game lookup indexes and uniqueness
+
+Revision ID: e7a3c9d2f6b1
+Revises: c4d8e2f1a7b3
+Create Date: 2026-10-17 21:12:09.541376
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9d2f6b1'
+down_revision: Union[str, Sequence[str], None] = 'c4d8e2f1a7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Column naming each game's daily target
+GAMES = {
+    'countrydle': 'country_id',
+    'powiatdle': 'powiat_id',
+    'us_statedle': 'us_state_id',
+    'wojewodztwodle': 'wojewodztwo_id',
+}
+
+
+def players(game: str) -> str:
+    return f"(SELECT count(*) FROM {game}_states s WHERE s.day_id = d.id)"
+
+
+def dedupe_days(game: str, target: str) -> None:
+    """
+    Merges the days of a date that share its target into the one most players played:
+    their states, questions and guesses move there, so no player loses them.
+    """
+    op.execute(
+        f"""
+        CREATE TEMPORARY TABLE dropped_days AS
+        SELECT id, kept_id FROM (
+            SELECT d.id,
+                first_value(d.id) OVER by_players AS kept_id,
+                row_number() OVER by_players AS rank
+            FROM {game}_days d
+            WINDOW by_players AS (
+                PARTITION BY d.date, d.{target}
+                ORDER BY {players(game)} DESC, d.id DESC
+            )
+        ) ranked
+        WHERE rank > 1
+        """
+    )
+    for child in ('states', 'guesses', 'questions'):
+        op.execute(
+            f"""
+            UPDATE {game}_{child} c SET day_id = dropped.kept_id
+            FROM dropped_days dropped
+            WHERE c.day_id = dropped.id
+            """
+        )
+    op.execute(f"DELETE FROM {game}_days WHERE id IN (SELECT id FROM dropped_days)")
+    op.execute("DROP TABLE dropped_days")
+
+
+def redate_days(game: str) -> None:
+    """
+    Days left sharing a date have different targets, so their games cannot merge. The
+    day most players played keeps the date; the others keep their games and move to
+    unused dates before the first day, out of the way of the daily game.
+    """
+    op.execute(
+        f"""
+        UPDATE {game}_days d SET date = redated.date
+        FROM (
+            SELECT id, first_date - (row_number() OVER (ORDER BY date, id))::int AS date
+            FROM (
+                SELECT d.id, d.date, min(d.date) OVER () AS first_date,
+                    row_number() OVER (PARTITION BY d.date ORDER BY {players(game)} DESC, d.id DESC) AS rank
+                FROM {game}_days d
+            ) ranked
+            WHERE rank > 1
+        ) redated
+        WHERE d.id = redated.id
+        """
+    )
+
+
+def dedupe_states(game: str) -> None:
+    """Keeps one state per player and day, a finished one when there is any, else the first."""
+    op.execute(
+        f"""
+        DELETE FROM {game}_states
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, day_id
+                    ORDER BY is_game_over DESC NULLS LAST, id
+                ) AS rank
+                FROM {game}_states
+            ) ranked
+            WHERE rank > 1
+        )
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for game, target in GAMES.items():
+        dedupe_days(game, target)
+        redate_days(game)
+        dedupe_states(game)
+
+        op.create_index(f'uq_{game}_days_date', f'{game}_days', ['date'], unique=True)
+        op.create_index(
+            f'uq_{game}_states_user_id_day_id',
+            f'{game}_states',
+            ['user_id', 'day_id'],
+            unique=True,
+        )
+        for child in ('guesses', 'questions'):
+            op.create_index(
+                f'ix_{game}_{child}_user_id_day_id',
+                f'{game}_{child}',
+                ['user_id', 'day_id'],
+                unique=False,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for game in GAMES:
+        for child in ('guesses', 'questions'):
+            op.drop_index(f'ix_{game}_{child}_user_id_day_id', table_name=f'{game}_{child}')
+        op.drop_index(f'uq_{game}_states_user_id_day_id', table_name=f'{game}_states')
+        op.drop_index(f'uq_{game}_days_date', table_name=f'{game}_days')
@@ -0,0 +1,68 @@
+"""add leaderboard scores
+
+Revision ID: f2b6d8e4a9c1
+Revises: e7a3c9d2f6b1
+Create Date: 2026-10-17 22:40:18.206733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8e4a9c1'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c9d2f6b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GAMES = ('countrydle', 'powiatdle', 'us_statedle', 'wojewodztwodle')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'leaderboard_scores',
+        sa.Column('game', sa.String(length=32), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.Column('wins', sa.Integer(), nullable=False),
+        sa.Column('games_played', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('game', 'period', 'user_id'),
+    )
+    op.create_index(
+        'ix_leaderboard_scores_ranking',
+        'leaderboard_scores',
+        ['game', 'period', sa.text('points DESC'), sa.text('wins DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_leaderboard_scores_average',
+        'leaderboard_scores',
+        ['game', 'period', sa.text('(CAST(points AS FLOAT) / CAST(games_played AS FLOAT)) DESC')],
+        unique=False,
+        postgresql_where=sa.text('games_played >= 5'),
+    )
+
+    # Backfilled from the finished games, the nightly verification does the same
+    for game in GAMES:
+        for period in ("to_char(d.date, 'YYYY-MM')", "'all'"):
+            op.execute(
+                f"""
+                INSERT INTO leaderboard_scores (game, period, user_id, points, wins, games_played)
+                SELECT '{game}', {period}, s.user_id, sum(s.points), sum(s.won::int), count(*)
+                FROM {game}_states s JOIN {game}_days d ON d.id = s.day_id
+                WHERE s.is_game_over AND s.user_id IS NOT NULL
+                GROUP BY s.user_id, {period}
+                """
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leaderboard_scores_average', table_name='leaderboard_scores')
+    op.drop_index('ix_leaderboard_scores_ranking', table_name='leaderboard_scores')
+    op.drop_table('leaderboard_scores')
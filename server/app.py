@@ -32,10 +32,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from users import router as users_router
 from users.utils import (
     create_access_token,
+    get_admin_user,
     send_verification_email,
     verify_email_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from db.models import User
+import metrics
 
 from utils.email import fm_noreply
 
@@ -82,6 +85,11 @@ async def get_version():
 
 
 
+@app.get("/admin/metrics")
+async def get_metrics(admin: User = Depends(get_admin_user)):
+    return metrics.snapshot()
+
+
 @app.get("/time")
 async def get_server_time():
     """Returns the current server time and the time until the next midnight (UTC)"""
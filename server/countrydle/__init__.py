@@ -3,6 +3,7 @@ from typing import Union
 from db import get_db
 from db.models import User
 from db.repositories.countrydle import CountrydleRepository, CountrydleStateRepository
+from db.repositories.leaderboard import LeaderboardRepository
 from schemas.countrydle import (
     CountrydleEndStateResponse,
     CountrydleEndStateSchema,
@@ -37,6 +38,7 @@ from db.repositories.country import CountryRepository
 from users.utils import get_current_or_guest_user, get_current_user, get_admin_user
 
 import countrydle.utils as gutils
+from utils.resolver import resolve_guess
 from game_logic import GameConfig, GameRules, GameState
 
 load_dotenv()
@@ -107,7 +109,7 @@ async def sync_guest_data(
 
     # 4. Create guesses
     for guess in sync_data.guesses:
-        is_correct = False
+        is_correct = None
         if guess.country_id is not None:
             is_correct = guess.country_id == day_country.country_id
             
@@ -121,6 +123,8 @@ async def sync_guest_data(
         await CountrydleGuessRepository(session).add_guess(guess_create)
 
     # 5. Update state
+    # A game already recorded as over must not reach the leaderboard a second time
+    was_over = state.is_game_over
     state.remaining_questions = sync_data.state.remaining_questions
     state.remaining_guesses = sync_data.state.remaining_guesses
     state.questions_asked = sync_data.state.questions_asked
@@ -131,8 +135,9 @@ async def sync_guest_data(
     if state.won:
         state.points = await CountrydleStateRepository(session).calc_points(state)
         
-    if state.is_game_over:
+    if state.is_game_over and not was_over:
         from db.repositories.user import UserRepository
+        await LeaderboardRepository(session).record_game("countrydle", state)
         await UserRepository(session).update_points(user.id, state)
 
     await CountrydleStateRepository(session).update_countrydle_state(state)
@@ -284,7 +289,9 @@ async def ask_question(
         daily_country = await CountrydleRepository(session).generate_new_day_country()
 
     if user is None:
-        enh_question = await gutils.enhance_question(question.question)
+        enh_question, question_create, question_vector = await gutils.process_question(
+            question.question, daily_country, None
+        )
         if not enh_question.valid:
             question_create = QuestionCreate(
                 user_id=None,
@@ -302,13 +309,6 @@ async def ask_question(
             )
             return InvalidQuestionDisplay.model_validate(new_quest)
 
-        question_create, question_vector = await gutils.ask_question(
-            question=enh_question,
-            day_country=daily_country,
-            user=None,
-            session=session,
-        )
-
         new_quest = await CountrydleQuestionsRepository(session).create_question(
             question_create
         )
@@ -341,7 +341,9 @@ async def ask_question(
             detail="User has no more questions left or game is over!",
         )
 
-    enh_question = await gutils.enhance_question(question.question)
+    enh_question, question_create, question_vector = await gutils.process_question(
+        question.question, daily_country, user
+    )
     if not enh_question.valid:
         question_create = QuestionCreate(
             user_id=user.id,
@@ -371,13 +373,6 @@ async def ask_question(
 
         return InvalidQuestionDisplay.model_validate(new_quest)
 
-    question_create, question_vector = await gutils.ask_question(
-        question=enh_question,
-        day_country=daily_country,
-        user=user,
-        session=session,
-    )
-
     new_quest = await CountrydleQuestionsRepository(session).create_question(
         question_create
     )
@@ -440,8 +435,12 @@ async def make_guess(
     if not daily_country:
         daily_country = await CountrydleRepository(session).generate_new_day_country()
 
+    # Free-text guesses name the target instead of picking it
+    if guess.country_id is None and guess.guess:
+        guess.country_id = await resolve_guess("countrydle", guess.guess, session)
+
     if user is None:
-        is_correct = False
+        is_correct = None
         if guess.country_id is not None:
             is_correct = guess.country_id == daily_country.country_id
             
@@ -470,8 +469,8 @@ async def make_guess(
             detail="User has no more guesses left or game is over!",
         )
 
-    # Check if guess is correct
-    is_correct = False
+    # Check if guess is correct, a guess naming no known country is neither
+    is_correct = None
 
     if guess.country_id is not None:
         is_correct = guess.country_id == daily_country.country_id
@@ -4,8 +4,15 @@ from dotenv import load_dotenv
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from schemas.countrydle import CountrydleHistory, LeaderboardEntry, UserStatistics
+from schemas.countrydle import (
+    CountrydleHistory,
+    LeaderboardEntry,
+    LeaderboardPage,
+    LeaderboardPercentile,
+    UserStatistics,
+)
 from db.repositories.countrydle import CountrydleRepository, CountrydleStateRepository
+from db.repositories.leaderboard import LEADERBOARD_SIZE, LeaderboardRepository
 from db.models.user import User
 from db.repositories.user import UserRepository
 from users.utils import get_current_user
@@ -27,11 +34,53 @@ async def gey_history(session: AsyncSession = Depends(get_db)):
 
 
 @router.get("/leaderboard", response_model=list[LeaderboardEntry])
-async def get_leaderboard(type: str = "monthly", session: AsyncSession = Depends(get_db)):
-    leaderboard = await CountrydleRepository(session).get_leaderboard(type)
+async def get_leaderboard(
+    type: str = "monthly",
+    limit: int = LEADERBOARD_SIZE,
+    session: AsyncSession = Depends(get_db),
+):
+    leaderboard = await CountrydleRepository(session).get_leaderboard(type, limit)
     return leaderboard
 
 
+@router.get("/leaderboard/me", response_model=LeaderboardEntry | None)
+async def get_my_rank(
+    type: str = "monthly",
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await CountrydleRepository(session).get_user_rank(user, type)
+
+
+@router.get("/leaderboard/page", response_model=LeaderboardPage)
+async def get_leaderboard_page(
+    type: str = "monthly",
+    limit: int = LEADERBOARD_SIZE,
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_page("countrydle", type, limit, cursor)
+
+
+@router.get("/leaderboard/around-me", response_model=list[LeaderboardEntry])
+async def get_leaderboard_around_me(
+    type: str = "monthly",
+    neighbours: int = 5,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_around_user("countrydle", user.id, type, neighbours)
+
+
+@router.get("/leaderboard/percentile", response_model=LeaderboardPercentile | None)
+async def get_leaderboard_percentile(
+    type: str = "monthly",
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_percentile("countrydle", user.id, type)
+
+
 @router.get("/history/me")
 async def gey_history(
     user: User = Depends(get_current_user), session: AsyncSession = Depends(get_db)
@@ -1,20 +1,28 @@
-import os
-import json
-from typing import List, Tuple
-from openai import OpenAI
+import asyncio
+from typing import Awaitable, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db import AsyncSessionLocal
 from db.models import Country, CountrydleDay, User
-from qdrant.utils import get_fragments_matching_question
+from qdrant.utils import find_cached_answer, get_fragments_matching_question
+from qdrant.vectorize import get_embedding
 import qdrant
+import facts
+import llm
+import metrics
+from llm.cache import cached_enhancement, normalize_question
+from llm.pipeline import FROM_ANALYSIS, fused_prompts, pipeline_mode
+from llm.singleflight import SingleFlight
 from schemas.country import DayCountryDisplay
 from schemas.countrydle import QuestionCreate, QuestionEnhanced
+from utils.resolver import resolve_guess
 from db.repositories.country import CountryRepository
 
+question_flight = SingleFlight("countrydle")
 
-async def enhance_question(question: str) -> QuestionEnhanced:
-    system_prompt = """
+
+ENHANCE_SYSTEM_PROMPT = """
 You are an expert Question Analyzer for a geography guessing game. Your goal is to process user questions into a structured format that facilitates accurate information retrieval.
 
 ### Your Core Responsibilities:
@@ -67,31 +75,21 @@ User: "Tell me about the capital."
 Output: {"question": null, "intent": null, "required_info": null, "valid": false, "explanation": "This is an open-ended request, not a True/False question."}
 """
 
+
+@cached_enhancement("countrydle", QuestionEnhanced)
+async def enhance_question(question: str) -> QuestionEnhanced:
     question_prompt = f"""User's Question: {question}"""
 
     prompts = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": ENHANCE_SYSTEM_PROMPT},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    answer_dict: dict = await llm.chat_json(prompts)
 
-    answer = response.choices[0].message.content
+    return parse_enhanced(question, answer_dict)
 
-    try:
-        answer_dict: dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
 
+def parse_enhanced(question: str, answer_dict: dict) -> QuestionEnhanced:
     return QuestionEnhanced(
         original_question=question,
         valid=answer_dict["valid"],
@@ -103,30 +101,15 @@ Output: {"question": null, "intent": null, "required_info": null, "valid": false
     )
 
 
-async def ask_question(
-    question: QuestionEnhanced,
-    day_country: CountrydleDay,
-    user: User | None,
-    session: AsyncSession,
-) -> Tuple[QuestionCreate, List[float]]:
-
-    fragments, question_vector = await get_fragments_matching_question(
-        question.question,
-        "country_id",
-        day_country.country_id,
-        "countries",
-        session,
-        limit=qdrant.COUNTRYDLE_CONTEXT_LIMIT,
-    )
-    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
-    country: Country = await CountryRepository(session).get(day_country.country_id)
-
-    system_prompt = f"""
+def answer_system_prompt(
+    country: Country, context: str, intent: str | None, required_info: str | None
+) -> str:
+    return f"""
 You are the 'Game Master' for Countrydle. Your task is to answer a True/False question about a specific country based on provided context and your general knowledge.
 
 ### Target Country: {country.name}
-### Question Intent: {question.intent}
-### Required Information: {question.required_info}
+### Question Intent: {intent}
+### Required Information: {required_info}
 
 ### Context Fragments:
 {context}
@@ -151,6 +134,14 @@ You are the 'Game Master' for Countrydle. Your task is to answer a True/False qu
 }}
 """
 
+
+def answer_prompts(
+    country: Country, question: QuestionEnhanced, context: str
+) -> List[dict]:
+    system_prompt = answer_system_prompt(
+        country, context, question.intent, question.required_info
+    )
+
     question_prompt = f"""User's Original Question: {question.original_question}
 Simplified Question: {question.question}"""
 
@@ -158,24 +149,62 @@ Simplified Question: {question.question}"""
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    return prompts
 
-    answer = response.choices[0].message.content
 
-    try:
-        answer_dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
+async def ask_question(
+    question: QuestionEnhanced,
+    day_country: CountrydleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[QuestionCreate, List[float] | None]:
+
+    country: Country = await CountryRepository(session).get(day_country.country_id)
+    known = facts.evaluate("countrydle", country.name, question)
+    if known is not None:
+        question_create = _answered_question(
+            question, known.as_answer(), known.context, day_country, user
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.countrydle.classic.embed"):
+        question_vector = await get_embedding(question.question, qdrant.EMBEDDING_MODEL)
+
+    with metrics.timer("pipeline.countrydle.classic.answer_cache"):
+        cached = await find_cached_answer(
+            question_vector,
+            "country_id",
+            day_country.country_id,
+            "countries_questions",
+        )
+    if cached:
+        question_create = QuestionCreate(
+            user_id=user.id if user else None,
+            day_id=day_country.id,
+            original_question=question.original_question,
+            valid=question.valid,
+            question=question.question,
+            answer=cached.answer,
+            explanation=cached.explanation,
+            context=cached.context,
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.countrydle.classic.retrieve"):
+        fragments, question_vector = await get_fragments_matching_question(
+            question.question,
+            "country_id",
+            day_country.country_id,
+            "countries",
+            session,
+            limit=qdrant.COUNTRYDLE_CONTEXT_LIMIT,
+            query_vector=question_vector,
+        )
+    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
+
+    prompts = answer_prompts(country, question, context)
+    with metrics.timer("pipeline.countrydle.classic.answer"):
+        answer_dict = await llm.chat_json(prompts)
 
     question_create = QuestionCreate(
         user_id=user.id if user else None,
@@ -191,86 +220,188 @@ Simplified Question: {question.question}"""
     return question_create, question_vector
 
 
-async def give_guess(
-    guess: str, daily_country: DayCountryDisplay, user: User, session: AsyncSession
-):
-    country: Country = await CountryRepository(session).get(daily_country.country_id)
-
-    system_prompt = f"""
-    You are the game master for a country guessing game. The player will guess a country, and you must determine if the guess is correct.
-
-    Answering Guidelines:
-        - true: If the player correctly guessed the country, including casual or abbreviated names (e.g., USA, Holland, Pol).
-        - false: If the player's guess does not match the country.
-        - null: If the guess is unclear or confusing.
-    
-    Answer guess True or False if you are fully confident of the answer.
-    Answer guess NA if guess is confusing you.
-
-    Country to Guess: {country.name} ({country.official_name})
-
-    ### Task: 
-    Use your best knowledge to determine if the player's guess is correct. Respond only in JSON format as follows:
-    {{
-        "answer": true | false | null,
-    }}
-    ### 
-    
-    ### Examples
-    Country: Poland. Guess: Polska
-    {{
-        "answer": true
-    }}
-    
-    Country: France. Guess: Franc
-    {{
-        "answer": true
-    }}
-    
-    Country: United States of America. Guess: USA 
-    {{
-        "answer": true
-    }}
-    
-    Country: Germany. Guess: Austria
-    {{
-        "answer": false
-    }}
-    
-    Country: Australia. Guess: Austria
-    {{
-        "answer": false
-    }}
-    
-    Country: France. Guess: Germany or France
-    {{
-        "answer": null
-    }} # False because player tried to cheat. He can ask one guess at a time.
+async def process_question(
+    question: str,
+    day_country: CountrydleDay,
+    user: User | None,
+) -> Tuple[QuestionEnhanced, QuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
     """
+    Validates and answers a player's question in the configured QUESTION_PIPELINE mode.
+    The answer is None for invalid questions; the vector is None when nothing should
+    be added to the countries_questions collection, and still computing (awaitable) in fused mode.
 
-    guess_prompt = f"Guess: {guess}"
+    Identical questions about the same target that arrive while one is being answered
+    share its result; each caller still gets its own copy to store as its row.
+    """
+    key = (day_country.country_id, normalize_question(question))
+    (enhanced, question_create, question_vector), shared = await question_flight.do(
+        key, lambda: _process_question_in_session(question, day_country, user)
+    )
 
-    prompts = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": guess_prompt},
-    ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
+    if shared:
+        enhanced = enhanced.model_copy(update={"original_question": question})
+        if question_create is not None:
+            question_create = question_create.model_copy(
+                update={
+                    "user_id": user.id if user else None,
+                    "original_question": question,
+                }
+            )
+        # The first caller adds the question to the collection
+        question_vector = None
+
+    return enhanced, question_create, question_vector
+
+
+async def _process_question_in_session(
+    question: str, day_country: CountrydleDay, user: User | None
+) -> Tuple[QuestionEnhanced, QuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    # Not the caller's session: the shared call can outlive the request that started it
+    async with AsyncSessionLocal() as session:
+        return await _process_question(question, day_country, user, session)
+
+
+async def _process_question(
+    question: str,
+    day_country: CountrydleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[QuestionEnhanced, QuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    mode = pipeline_mode()
+    with metrics.timer(f"pipeline.countrydle.{mode}.total"):
+        if mode == "parallel":
+            return await _process_parallel(question, day_country, user, session)
+        if mode == "fused":
+            return await _process_fused(question, day_country, user, session)
+
+        with metrics.timer("pipeline.countrydle.classic.enhance"):
+            enhanced = await enhance_question(question)
+        if not enhanced.valid:
+            return enhanced, None, None
+
+        question_create, question_vector = await ask_question(
+            question=enhanced, day_country=day_country, user=user, session=session
+        )
+        return enhanced, question_create, question_vector
+
+
+async def _raw_question_context(
+    question: str, day_country: CountrydleDay, session: AsyncSession, mode: str
+) -> str:
+    raw_vector = await metrics.timed(
+        f"pipeline.countrydle.{mode}.embed",
+        get_embedding(question, qdrant.EMBEDDING_MODEL),
+    )
+
+    with metrics.timer(f"pipeline.countrydle.{mode}.retrieve"):
+        fragments, _ = await get_fragments_matching_question(
+            question,
+            "country_id",
+            day_country.country_id,
+            "countries",
+            session,
+            limit=qdrant.COUNTRYDLE_CONTEXT_LIMIT,
+            query_vector=raw_vector,
+        )
+    return "\n[ ... ]\n".join(fragment.text for fragment in fragments)
+
+
+def _answered_question(
+    enhanced: QuestionEnhanced,
+    answer_dict: dict,
+    context: str,
+    day_country: CountrydleDay,
+    user: User | None,
+) -> QuestionCreate:
+    return QuestionCreate(
+        user_id=user.id if user else None,
+        day_id=day_country.id,
+        original_question=enhanced.original_question,
+        valid=enhanced.valid,
+        question=enhanced.question,
+        answer=answer_dict.get("answer"),
+        explanation=answer_dict.get("explanation") or "No explanation provided.",
+        context=context,
+    )
+
+
+async def _process_parallel(
+    question: str,
+    day_country: CountrydleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[QuestionEnhanced, QuestionCreate | None, List[float] | None]:
+    # Retrieval uses the raw question so it does not wait for the rewrite
+    enhanced, context = await asyncio.gather(
+        metrics.timed("pipeline.countrydle.parallel.enhance", enhance_question(question)),
+        _raw_question_context(question, day_country, session, "parallel"),
     )
+    if not enhanced.valid:
+        return enhanced, None, None
 
-    answer = response.choices[0].message.content
+    country: Country = await CountryRepository(session).get(day_country.country_id)
+    known = facts.evaluate("countrydle", country.name, enhanced)
+    if known is not None:
+        question_create = _answered_question(
+            enhanced, known.as_answer(), known.context, day_country, user
+        )
+        return enhanced, question_create, None
+
+    answer_dict, question_vector = await asyncio.gather(
+        metrics.timed(
+            "pipeline.countrydle.parallel.answer",
+            llm.chat_json(answer_prompts(country, enhanced, context)),
+        ),
+        metrics.timed(
+            "pipeline.countrydle.parallel.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        ),
+    )
+
+    question_create = _answered_question(enhanced, answer_dict, context, day_country, user)
+    return enhanced, question_create, question_vector
+
+
+async def _process_fused(
+    question: str,
+    day_country: CountrydleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[QuestionEnhanced, QuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    context = await _raw_question_context(question, day_country, session, "fused")
+    country: Country = await CountryRepository(session).get(day_country.country_id)
+
+    prompts = fused_prompts(
+        ENHANCE_SYSTEM_PROMPT,
+        answer_system_prompt(country, context, FROM_ANALYSIS, FROM_ANALYSIS),
+        question,
+    )
+    answer_dict = await metrics.timed(
+        "pipeline.countrydle.fused.answer", llm.chat_json(prompts)
+    )
+
+    enhanced = parse_enhanced(question, answer_dict)
+    if not enhanced.valid:
+        return enhanced, None, None
+
+    # Only the question's Qdrant point needs the vector, the answer does not wait for it
+    question_vector = asyncio.ensure_future(
+        metrics.timed(
+            "question_point.countrydle.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        )
+    )
 
-    try:
-        answer_dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
+    question_create = _answered_question(enhanced, answer_dict, context, day_country, user)
+    return enhanced, question_create, question_vector
+
+
+async def give_guess(
+    guess: str, daily_country: DayCountryDisplay, user: User, session: AsyncSession
+):
+    """Whether a free-text guess names the day's country: true, false or null if unclear."""
+    country_id = await resolve_guess("countrydle", guess, session)
+    if country_id is None:
+        return {"answer": None}
 
-    return answer_dict
+    return {"answer": country_id == daily_country.country_id}
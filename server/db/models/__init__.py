@@ -8,7 +8,10 @@ from .us_state import USState
 from .us_statedle import USStatedleDay, USStatedleState, USStatedleGuess, USStatedleQuestion
 from .question import CountrydleQuestion
 from .fragment import CountryFragment, PowiatFragment, WojewodztwoFragment, USStateFragment
+from .question_cache import EnhancedQuestionCache
+from .embedding_cache import EmbeddingCache
 
 from .user import User, Permission, UserPermission, AccountUpdate, UserPoints
 from .guess import CountrydleGuess
 from .email import SentEmail
+from .leaderboard import LeaderboardScore
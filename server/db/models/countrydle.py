@@ -6,6 +6,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -22,6 +23,7 @@ from db.models.user import User
 
 class CountrydleDay(Base):
     __tablename__ = "countrydle_days"
+    __table_args__ = (Index("uq_countrydle_days_date", "date", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     country_id = Column(Integer, ForeignKey("countries.id"))
@@ -32,6 +34,7 @@ class CountrydleDay(Base):
 
 class CountrydleState(Base):
     __tablename__ = "countrydle_states"
+    __table_args__ = (Index("uq_countrydle_states_user_id_day_id", "user_id", "day_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -0,0 +1,24 @@
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.sql import func
+
+from db.base import Base
+
+
+class EmbeddingCache(Base):
+    __tablename__ = "embedding_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "model",
+            "dimensions",
+            "text_hash",
+            name="uq_embedding_cache_model_dimensions_hash",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    model = Column(String(64), nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    text_hash = Column(String(64), nullable=False)  # sha256 of the embedded text
+    embedding = Column(Vector(), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=func.now())
@@ -1,40 +1,74 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+import os
+
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, Text
 from sqlalchemy.orm import relationship
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC, Vector
 from db.base import Base
 
+# Storage profile of fragment embeddings; scripts/migrate_embeddings.py converts stored data
+EMBEDDING_SIZE = int(os.getenv("EMBEDDING_SIZE", "1536"))
+EMBEDDING_PG_TYPE = os.getenv("EMBEDDING_PG_TYPE", "vector").lower()  # vector | halfvec
+
+
+def embedding_type():
+    """float32 `vector` or float16 `halfvec` (half the size) of EMBEDDING_SIZE dimensions."""
+    if EMBEDDING_PG_TYPE == "halfvec":
+        return HALFVEC(EMBEDDING_SIZE)
+    return Vector(EMBEDDING_SIZE)
+
+
 class CountryFragment(Base):
     __tablename__ = "country_fragments"
+    __table_args__ = (
+        Index("ix_country_fragments_country_id_doc_ordinal", "country_id", "doc_ordinal"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
-    embedding = Column(Vector(1536))  # OpenAI embedding size
+    doc_ordinal = Column(Integer)  # Position in the target's document
+    window_text = Column(Text)  # The fragment with its neighbours, ready for the prompt
+    embedding = Column(embedding_type())
     
     country = relationship("Country")
 
 class PowiatFragment(Base):
     __tablename__ = "powiat_fragments"
+    __table_args__ = (
+        Index("ix_powiat_fragments_powiat_id_doc_ordinal", "powiat_id", "doc_ordinal"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     powiat_id = Column(Integer, ForeignKey("powiaty.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
-    embedding = Column(Vector(1536))
+    doc_ordinal = Column(Integer)
+    window_text = Column(Text)
+    embedding = Column(embedding_type())
     
     powiat = relationship("Powiat")
 
 class WojewodztwoFragment(Base):
     __tablename__ = "wojewodztwo_fragments"
+    __table_args__ = (
+        Index("ix_wojewodztwo_fragments_wojewodztwo_id_doc_ordinal", "wojewodztwo_id", "doc_ordinal"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     wojewodztwo_id = Column(Integer, ForeignKey("wojewodztwa.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
-    embedding = Column(Vector(1536))
+    doc_ordinal = Column(Integer)
+    window_text = Column(Text)
+    embedding = Column(embedding_type())
     
     wojewodztwo = relationship("Wojewodztwo")
 
 class USStateFragment(Base):
     __tablename__ = "us_state_fragments"
+    __table_args__ = (
+        Index("ix_us_state_fragments_us_state_id_doc_ordinal", "us_state_id", "doc_ordinal"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     us_state_id = Column(Integer, ForeignKey("us_states.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
-    embedding = Column(Vector(1536))
+    doc_ordinal = Column(Integer)
+    window_text = Column(Text)
+    embedding = Column(embedding_type())
     
     us_state = relationship("USState")
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -19,6 +20,7 @@ from db.base import Base
 
 class CountrydleGuess(Base):
     __tablename__ = "countrydle_guesses"
+    __table_args__ = (Index("ix_countrydle_guesses_user_id_day_id", "user_id", "day_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
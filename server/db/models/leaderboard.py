@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String, cast, type_coerce
+
+from db.base import Base
+
+# Period key of the all-time aggregates, other periods are months ("2026-10")
+ALL_TIME = "all"
+
+
+class LeaderboardScore(Base):
+    """A player's finished games of one game in one period, kept up to date as games end."""
+
+    __tablename__ = "leaderboard_scores"
+
+    game = Column(String(32), primary_key=True)
+    period = Column(String(7), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    points = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    games_played = Column(Integer, nullable=False, default=0)
+
+
+# Games needed to appear on the average leaderboard
+MIN_AVERAGE_GAMES = 5
+
+average_points = cast(LeaderboardScore.points, Float) / type_coerce(LeaderboardScore.games_played, Float)
+
+Index(
+    "ix_leaderboard_scores_ranking",
+    LeaderboardScore.game,
+    LeaderboardScore.period,
+    LeaderboardScore.points.desc(),
+    LeaderboardScore.wins.desc(),
+    LeaderboardScore.user_id,
+)
+Index(
+    "ix_leaderboard_scores_average",
+    LeaderboardScore.game,
+    LeaderboardScore.period,
+    average_points.desc(),
+    LeaderboardScore.user_id,
+    postgresql_where=LeaderboardScore.games_played >= MIN_AVERAGE_GAMES,
+)
@@ -4,6 +4,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -16,6 +17,7 @@ from db.base import Base
 
 class PowiatdleDay(Base):
     __tablename__ = "powiatdle_days"
+    __table_args__ = (Index("uq_powiatdle_days_date", "date", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     powiat_id = Column(Integer, ForeignKey("powiaty.id"))
@@ -26,6 +28,7 @@ class PowiatdleDay(Base):
 
 class PowiatdleState(Base):
     __tablename__ = "powiatdle_states"
+    __table_args__ = (Index("uq_powiatdle_states_user_id_day_id", "user_id", "day_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -44,6 +47,7 @@ class PowiatdleState(Base):
 
 class PowiatdleGuess(Base):
     __tablename__ = "powiatdle_guesses"
+    __table_args__ = (Index("ix_powiatdle_guesses_user_id_day_id", "user_id", "day_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -60,6 +64,7 @@ class PowiatdleGuess(Base):
 
 class PowiatdleQuestion(Base):
     __tablename__ = "powiatdle_questions"
+    __table_args__ = (Index("ix_powiatdle_questions_user_id_day_id", "user_id", "day_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
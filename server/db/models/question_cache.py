@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from db.base import Base
+
+
+class EnhancedQuestionCache(Base):
+    __tablename__ = "enhanced_question_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "namespace",
+            "normalized_question",
+            name="uq_enhanced_question_cache_namespace_question",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    namespace = Column(String(32), nullable=False)
+    normalized_question = Column(String, nullable=False)
+    result = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=func.now())
@@ -4,6 +4,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
 )
@@ -15,6 +16,7 @@ from db.base import Base
 
 class USStatedleDay(Base):
     __tablename__ = "us_statedle_days"
+    __table_args__ = (Index("uq_us_statedle_days_date", "date", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     us_state_id = Column(Integer, ForeignKey("us_states.id"))
@@ -25,6 +27,7 @@ class USStatedleDay(Base):
 
 class USStatedleState(Base):
     __tablename__ = "us_statedle_states"
+    __table_args__ = (Index("uq_us_statedle_states_user_id_day_id", "user_id", "day_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -43,6 +46,7 @@ class USStatedleState(Base):
 
 class USStatedleGuess(Base):
     __tablename__ = "us_statedle_guesses"
+    __table_args__ = (Index("ix_us_statedle_guesses_user_id_day_id", "user_id", "day_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -59,6 +63,7 @@ class USStatedleGuess(Base):
 
 class USStatedleQuestion(Base):
     __tablename__ = "us_statedle_questions"
+    __table_args__ = (Index("ix_us_statedle_questions_user_id_day_id", "user_id", "day_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
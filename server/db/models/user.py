@@ -6,10 +6,12 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     and_,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -18,9 +20,15 @@ from db.base import Base
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Usernames the test suites register with; such accounts are flagged synthetic
+SYNTHETIC_USERNAME_PREFIXES = ("test_", "pytest_", "guess_c_", "ask_q_")
+
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_is_synthetic", "id", postgresql_where=text("is_synthetic")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, nullable=True)
@@ -30,6 +38,8 @@ class User(Base):
     hashed_password = Column(String, nullable=True)
     verified = Column(Boolean, default=False, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
+    # Test and load-test accounts: never ranked, removed by scripts/purge_synthetic_users.py
+    is_synthetic = Column(Boolean, default=False, server_default="false", nullable=False)
     created_at = Column(DateTime, default=func.now())
 
     # Relationships
@@ -52,6 +62,10 @@ class User(Base):
     def hash_password(password):
         return pwd_context.hash(password)
 
+    @staticmethod
+    def is_synthetic_username(username: str | None) -> bool:
+        return bool(username) and username.startswith(SYNTHETIC_USERNAME_PREFIXES)
+
 
 class UserPoints(Base):
     __tablename__ = "user_points"
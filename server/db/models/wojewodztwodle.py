@@ -4,6 +4,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
 )
@@ -15,6 +16,7 @@ from db.base import Base
 
 class WojewodztwodleDay(Base):
     __tablename__ = "wojewodztwodle_days"
+    __table_args__ = (Index("uq_wojewodztwodle_days_date", "date", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     wojewodztwo_id = Column(Integer, ForeignKey("wojewodztwa.id"))
@@ -25,6 +27,7 @@ class WojewodztwodleDay(Base):
 
 class WojewodztwodleState(Base):
     __tablename__ = "wojewodztwodle_states"
+    __table_args__ = (Index("uq_wojewodztwodle_states_user_id_day_id", "user_id", "day_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -43,6 +46,7 @@ class WojewodztwodleState(Base):
 
 class WojewodztwodleGuess(Base):
     __tablename__ = "wojewodztwodle_guesses"
+    __table_args__ = (Index("ix_wojewodztwodle_guesses_user_id_day_id", "user_id", "day_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -59,6 +63,7 @@ class WojewodztwodleGuess(Base):
 
 class WojewodztwodleQuestion(Base):
     __tablename__ = "wojewodztwodle_questions"
+    __table_args__ = (Index("ix_wojewodztwodle_questions_user_id_day_id", "user_id", "day_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
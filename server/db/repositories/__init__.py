@@ -0,0 +1,28 @@
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+
+async def add_unique(
+    session: AsyncSession, entry: T, existing: Callable[[], Awaitable[T | None]]
+) -> T:
+    """
+    Commits a row guarded by a unique index (a day's date, a player's state for a
+    day). When a concurrent request inserted the same key first, that row is
+    returned instead; only the savepoint is rolled back, so nothing else expires.
+    """
+    try:
+        async with session.begin_nested():
+            session.add(entry)
+    except IntegrityError:
+        found = await existing()
+        if found is None:
+            raise
+        return found
+
+    await session.commit()
+    await session.refresh(entry)
+    return entry
@@ -7,10 +7,11 @@ from sqlalchemy.orm import joinedload, aliased, contains_eager
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import Country, CountrydleState, CountrydleDay, User
+from db.repositories import add_unique
 from db.repositories.country import CountryRepository
+from db.repositories.leaderboard import LEADERBOARD_SIZE, LeaderboardRepository
 from db.models import CountrydleGuess
 from db.repositories.user import UserRepository
-from db.models.user import UserPoints
 from schemas.countrydle import LeaderboardEntry, UserStatistics
 from schemas.statistics import GameStatistics, GameHistoryEntry
 from db.models.question import CountrydleQuestion
@@ -68,32 +69,16 @@ class CountrydleRepository:
     async def create_day_country(self, country: Country) -> CountrydleDay:
         new_entry = CountrydleDay(country_id=country.id)
 
-        self.session.add(new_entry)
-
-        try:
-            await self.session.commit()  # Commit the transaction
-            await self.session.refresh(new_entry)  # Refresh the instance to get the ID
-        except Exception as ex:
-            await self.session.rollback()
-            raise ex
-
-        return new_entry
+        return await add_unique(self.session, new_entry, self.get_today_country)
 
     async def create_day_country_with_date(
         self, country: Country, day_date: date
     ) -> CountrydleDay:
         new_entry = CountrydleDay(country_id=country.id, date=day_date)
 
-        self.session.add(new_entry)
-
-        try:
-            await self.session.commit()  # Commit the transaction
-            await self.session.refresh(new_entry)  # Refresh the instance to get the ID
-        except Exception as ex:
-            await self.session.rollback()
-            raise ex
-
-        return new_entry
+        return await add_unique(
+            self.session, new_entry, lambda: self.get_day_country_by_date(day_date)
+        )
 
     async def generate_new_day_country(
         self, day_date: date | None = None
@@ -144,109 +129,11 @@ class CountrydleRepository:
 
         return countries_with_count
 
-    async def get_leaderboard(self, type: str = "monthly"):
-        cs = aliased(CountrydleState)
-        up = aliased(UserPoints)
-        cd = aliased(CountrydleDay)
-
-        if type == "monthly":
-            current_month = date.today().replace(day=1)
-            stmt = (
-                select(
-                    User.id,
-                    User.username,
-                    func.coalesce(func.sum(cs.points), 0).label("points"),
-                    func.coalesce(func.sum(cs.won.cast(Integer)), 0).label("wins"),
-                    func.coalesce(up.streak, 0).label("streak"),
-                )
-                .join(cs, User.id == cs.user_id)
-                .join(cd, cs.day_id == cd.id)
-                .outerjoin(up, User.id == up.user_id)
-                .where(
-                    and_(
-                        User.username.not_like("test_%"),
-                        User.username.not_like("pytest_%"),
-                        User.username.not_like("guess_c_%"),
-                        User.username.not_like("ask_q_%"),
-                        cd.date >= current_month,
-                    )
-                )
-                .group_by(
-                    User.id,
-                    User.username,
-                    up.streak,
-                )
-                .order_by(
-                    func.coalesce(func.sum(cs.points), 0).desc(),
-                    func.coalesce(func.sum(cs.won.cast(Integer)), 0).desc(),
-                    func.coalesce(up.streak, 0).desc(),
-                )
-            )
+    async def get_leaderboard(self, type: str = "monthly", limit: int = LEADERBOARD_SIZE) -> List[LeaderboardEntry]:
+        return await LeaderboardRepository(self.session).get_leaderboard("countrydle", type, limit)
 
-            result = await self.session.execute(stmt)
-
-            leaderboard = [
-                LeaderboardEntry(
-                    id=row.id,
-                    username=row.username,
-                    points=row.points,
-                    streak=row.streak,
-                    wins=row.wins,
-                )
-                for row in result.all()
-            ]
-
-            return leaderboard
-
-        elif type == "average":
-            stmt = (
-                select(
-                    User.id,
-                    User.username,
-                    func.coalesce(func.sum(cs.points), 0).label("points"),
-                    func.coalesce(func.sum(cs.won.cast(Integer)), 0).label("wins"),
-                    func.count(cs.id).label("games_played"),
-                    func.coalesce(up.streak, 0).label("streak"),
-                )
-                .join(cs, User.id == cs.user_id)
-                .outerjoin(up, User.id == up.user_id)
-                .where(
-                    and_(
-                        User.username.not_like("test_%"),
-                        User.username.not_like("pytest_%"),
-                        User.username.not_like("guess_c_%"),
-                        User.username.not_like("ask_q_%"),
-                        cs.is_game_over == True,
-                    )
-                )
-                .group_by(
-                    User.id,
-                    User.username,
-                    up.streak,
-                )
-                .having(func.count(cs.id) >= 5)
-            )
-
-            result = await self.session.execute(stmt)
-
-            leaderboard = []
-            for row in result.all():
-                avg_points = row.points / row.games_played if row.games_played > 0 else 0
-                leaderboard.append({
-                    "id": row.id,
-                    "username": row.username,
-                    "points": row.points,
-                    "streak": row.streak,
-                    "wins": row.wins,
-                    "average_points": round(avg_points, 2),
-                    "games_played": row.games_played,
-                })
-
-            leaderboard.sort(key=lambda x: x["average_points"], reverse=True)
-
-            return [LeaderboardEntry(**entry) for entry in leaderboard]
-
-        return []
+    async def get_user_rank(self, user: User, type: str = "monthly") -> LeaderboardEntry | None:
+        return await LeaderboardRepository(self.session).get_user_rank("countrydle", user.id, type)
 
     async def get_user_statistics(self, user: User) -> UserStatistics:
         up = await UserRepository(self.session).get_user_points(user.id)
@@ -383,6 +270,7 @@ class CountrydleStateRepository:
             state.points = points
 
         if state.is_game_over:
+            await LeaderboardRepository(self.session).record_game("countrydle", state)
             await UserRepository(self.session).update_points(state.user_id, state)
 
         await self.session.commit()
@@ -456,16 +344,18 @@ class CountrydleStateRepository:
             guesses_made=0,
         )
 
-        self.session.add(new_entry)
-
-        try:
-            await self.session.commit()  # Commit the transaction
-            await self.session.refresh(new_entry)  # Refresh the instance to get the ID
-        except Exception as ex:
-            await self.session.rollback()
-            raise ex
+        # A second tab opening the game at the same time gets the same state
+        return await add_unique(
+            self.session, new_entry, lambda: self._find_state(user.id, day.id)
+        )
 
-        return new_entry
+    async def _find_state(self, user_id: int, day_id: int) -> CountrydleState | None:
+        result = await self.session.execute(
+            select(CountrydleState).where(
+                CountrydleState.user_id == user_id, CountrydleState.day_id == day_id
+            )
+        )
+        return result.scalars().first()
 
     async def get_state(
         self,
@@ -0,0 +1,57 @@
+from typing import Dict, List
+
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import EmbeddingCache
+
+# Keeps the INSERT below the 32767 bind parameters asyncpg allows
+INSERT_BATCH_SIZE = 1000
+
+
+class EmbeddingCacheRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_many(
+        self, model: str, dimensions: int, text_hashes: List[str]
+    ) -> Dict[str, List[float]]:
+        result = await self.session.execute(
+            select(EmbeddingCache.text_hash, EmbeddingCache.embedding).where(
+                and_(
+                    EmbeddingCache.model == model,
+                    EmbeddingCache.dimensions == dimensions,
+                    EmbeddingCache.text_hash.in_(text_hashes),
+                )
+            )
+        )
+
+        return {text_hash: embedding for text_hash, embedding in result.all()}
+
+    async def add_many(
+        self, model: str, dimensions: int, embeddings: Dict[str, List[float]]
+    ):
+        rows = [
+            {
+                "model": model,
+                "dimensions": dimensions,
+                "text_hash": text_hash,
+                "embedding": embedding,
+            }
+            for text_hash, embedding in embeddings.items()
+        ]
+
+        try:
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                stmt = insert(EmbeddingCache).values(rows[start : start + INSERT_BATCH_SIZE])
+                # Another worker may have embedded the same text meanwhile
+                await self.session.execute(
+                    stmt.on_conflict_do_nothing(
+                        constraint="uq_embedding_cache_model_dimensions_hash"
+                    )
+                )
+            await self.session.commit()
+        except Exception as ex:
+            await self.session.rollback()
+            raise ex
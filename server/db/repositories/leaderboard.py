@@ -0,0 +1,348 @@
+import base64
+import json
+import os
+from datetime import date
+from types import SimpleNamespace
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, and_, cast, delete, func, literal, or_, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import (
+    CountrydleDay,
+    CountrydleState,
+    PowiatdleDay,
+    PowiatdleState,
+    USStatedleDay,
+    USStatedleState,
+    User,
+    UserPoints,
+    WojewodztwodleDay,
+    WojewodztwodleState,
+)
+from db.models.leaderboard import ALL_TIME, MIN_AVERAGE_GAMES, LeaderboardScore, average_points
+from schemas.countrydle import LeaderboardEntry, LeaderboardPage, LeaderboardPercentile
+
+# Entries returned by the leaderboard endpoints
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+
+GAMES = {
+    "countrydle": (CountrydleState, CountrydleDay),
+    "powiatdle": (PowiatdleState, PowiatdleDay),
+    "us_statedle": (USStatedleState, USStatedleDay),
+    "wojewodztwodle": (WojewodztwodleState, WojewodztwodleDay),
+}
+
+
+def encode_cursor(score, rank: int) -> str:
+    key = [score.points, score.wins, score.games_played, score.user_id, rank]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """The sort keys of the entry a page ended on and its rank."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor))
+        points, wins, games_played, user_id, rank = key
+        # Anything else would reach the query, or divide by zero on the average board
+        if not all(type(value) is int for value in key) or games_played < 1:
+            raise ValueError(cursor)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid leaderboard cursor!")
+    last = SimpleNamespace(points=points, wins=wins, games_played=games_played, user_id=user_id)
+    return last, rank
+
+
+def month_period(day_date: date) -> str:
+    return day_date.strftime("%Y-%m")
+
+
+def expected_scores(game: str):
+    """The game's aggregates recomputed from its finished games, in leaderboard_scores columns."""
+    state, day = GAMES[game]
+    month = func.to_char(day.date, "YYYY-MM")
+    totals = (
+        func.sum(state.points).label("points"),
+        func.sum(cast(state.won, Integer)).label("wins"),
+        func.count().label("games_played"),
+    )
+    # Synthetic accounts have no rows, so the boards never filter them out
+    finished = and_(state.is_game_over == True, User.is_synthetic == False)
+
+    monthly = (
+        select(literal(game).label("game"), month.label("period"), state.user_id, *totals)
+        .join(User, User.id == state.user_id)
+        .join(day, state.day_id == day.id)
+        .where(finished)
+        .group_by(state.user_id, month)
+    )
+    overall = (
+        select(literal(game).label("game"), literal(ALL_TIME).label("period"), state.user_id, *totals)
+        .join(User, User.id == state.user_id)
+        .where(finished)
+        .group_by(state.user_id)
+    )
+    return union_all(monthly, overall)
+
+
+class LeaderboardRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def record_game(self, game: str, state) -> None:
+        """
+        Adds a finished game to the player's monthly and all-time aggregates. Nothing is
+        committed: the caller commits it together with the state that ended the game.
+        """
+        _, day = GAMES[game]
+        result = await self.session.execute(
+            select(day.date, User.is_synthetic).where(day.id == state.day_id, User.id == state.user_id)
+        )
+        day_date, synthetic = result.one()
+        if synthetic:
+            return
+
+        stmt = insert(LeaderboardScore).values(
+            [
+                {
+                    "game": game,
+                    "period": period,
+                    "user_id": state.user_id,
+                    "points": state.points or 0,
+                    "wins": int(bool(state.won)),
+                    "games_played": 1,
+                }
+                for period in (month_period(day_date), ALL_TIME)
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LeaderboardScore.game, LeaderboardScore.period, LeaderboardScore.user_id],
+            set_={
+                "points": LeaderboardScore.points + stmt.excluded.points,
+                "wins": LeaderboardScore.wins + stmt.excluded.wins,
+                "games_played": LeaderboardScore.games_played + stmt.excluded.games_played,
+            },
+        )
+        await self.session.execute(stmt)
+
+    @staticmethod
+    def _on_board(game: str, type: str) -> list | None:
+        """Conditions selecting the rows of a leaderboard type, or None for an unknown type."""
+        ls = LeaderboardScore
+        if type == "monthly":
+            return [ls.game == game, ls.period == month_period(date.today())]
+        if type == "average":
+            return [ls.game == game, ls.period == ALL_TIME, ls.games_played >= MIN_AVERAGE_GAMES]
+        return None
+
+    def _board(self, game: str, type: str):
+        """The entries of a leaderboard type, unordered, or None for an unknown type."""
+        conditions = self._on_board(game, type)
+        if conditions is None:
+            return None
+
+        ls = LeaderboardScore
+        streak = func.coalesce(UserPoints.streak, 0) if game == "countrydle" else literal(0)
+        stmt = (
+            select(ls, User.username, streak.label("streak"))
+            .join(User, User.id == ls.user_id)
+            .where(*conditions)
+        )
+        if game == "countrydle":
+            stmt = stmt.outerjoin(UserPoints, UserPoints.user_id == ls.user_id)
+        return stmt
+
+    @staticmethod
+    def _order(type: str, reverse: bool = False) -> list:
+        # The player id breaks ties, so every player has one position and cursors are stable
+        ls = LeaderboardScore
+        keys = [ls.points, ls.wins] if type == "monthly" else [average_points]
+        if reverse:
+            return [key.asc() for key in keys] + [ls.user_id.desc()]
+        return [key.desc() for key in keys] + [ls.user_id.asc()]
+
+    @staticmethod
+    def _ahead(type: str, score, ahead: bool = True):
+        """Players before the score in the board order (or after it, with ahead=False)."""
+        ls = LeaderboardScore
+        better = (lambda column, value: column > value) if ahead else (lambda column, value: column < value)
+        closer = ls.user_id < score.user_id if ahead else ls.user_id > score.user_id
+
+        if type == "monthly":
+            # The redundant bound on points keeps it a range scan of the ranking index
+            bound = ls.points >= score.points if ahead else ls.points <= score.points
+            return and_(
+                bound,
+                or_(
+                    better(ls.points, score.points),
+                    and_(
+                        ls.points == score.points,
+                        or_(better(ls.wins, score.wins), and_(ls.wins == score.wins, closer)),
+                    ),
+                ),
+            )
+
+        average = score.points / score.games_played
+        bound = average_points >= average if ahead else average_points <= average
+        return and_(bound, or_(better(average_points, average), and_(average_points == average, closer)))
+
+    @staticmethod
+    def _entry(row, type: str, rank: int | None = None) -> LeaderboardEntry:
+        score = row.LeaderboardScore
+        entry = LeaderboardEntry(
+            id=score.user_id,
+            # Google sign-ups have no username until they pick one
+            username=row.username or "New User",
+            points=score.points,
+            streak=row.streak,
+            wins=score.wins,
+            rank=rank,
+        )
+        if type == "average":
+            entry.average_points = round(score.points / score.games_played, 2)
+            entry.games_played = score.games_played
+        return entry
+
+    async def get_leaderboard(
+        self, game: str, type: str = "monthly", limit: int = LEADERBOARD_SIZE
+    ) -> List[LeaderboardEntry]:
+        page = await self.get_page(game, type, limit)
+        return page.entries
+
+    async def get_page(
+        self, game: str, type: str = "monthly", limit: int = LEADERBOARD_SIZE, cursor: str | None = None
+    ) -> LeaderboardPage:
+        """
+        A page of the board in rank order. The cursor names the last entry of the previous
+        page, so each page is a range scan of the index however deep it is.
+        """
+        stmt = self._board(game, type)
+        if stmt is None:
+            return LeaderboardPage(entries=[])
+
+        limit = max(1, min(limit, LEADERBOARD_SIZE))
+        rank = 0
+        if cursor:
+            last, rank = decode_cursor(cursor)
+            stmt = stmt.where(self._ahead(type, last, ahead=False))
+
+        result = await self.session.execute(stmt.order_by(*self._order(type)).limit(limit + 1))
+        rows = result.all()
+        entries = [self._entry(row, type, rank + n) for n, row in enumerate(rows[:limit], start=1)]
+
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(rows[limit - 1].LeaderboardScore, rank + limit)
+        return LeaderboardPage(entries=entries, next_cursor=next_cursor)
+
+    async def _find(self, game: str, user_id: int, type: str):
+        stmt = self._board(game, type)
+        if stmt is None:
+            return None
+
+        result = await self.session.execute(stmt.where(LeaderboardScore.user_id == user_id))
+        return result.first()
+
+    async def _count(self, game: str, type: str, *conditions) -> int:
+        # Read from the leaderboard index alone, without joining the players
+        return await self.session.scalar(
+            select(func.count())
+            .select_from(LeaderboardScore)
+            .where(*self._on_board(game, type), *conditions)
+        )
+
+    async def _ranked(self, game: str, user_id: int, type: str):
+        """The player's board row and position, or (None, None) when not on the board."""
+        row = await self._find(game, user_id, type)
+        if row is None:
+            return None, None
+
+        ahead = await self._count(game, type, self._ahead(type, row.LeaderboardScore))
+        return row, ahead + 1
+
+    async def get_user_rank(self, game: str, user_id: int, type: str = "monthly") -> LeaderboardEntry | None:
+        """The player's entry with its position on the board, counted in the index."""
+        row, rank = await self._ranked(game, user_id, type)
+        return None if row is None else self._entry(row, type, rank)
+
+    async def get_around_user(
+        self, game: str, user_id: int, type: str = "monthly", neighbours: int = 5
+    ) -> List[LeaderboardEntry]:
+        """The player's entry between the `neighbours` players ranked just above and below."""
+        row, rank = await self._ranked(game, user_id, type)
+        if row is None:
+            return []
+
+        neighbours = max(0, min(neighbours, LEADERBOARD_SIZE))
+        mine = row.LeaderboardScore
+        board = self._board(game, type)
+
+        result = await self.session.execute(
+            board.where(self._ahead(type, mine)).order_by(*self._order(type, reverse=True)).limit(neighbours)
+        )
+        above = list(reversed(result.all()))
+        result = await self.session.execute(
+            board.where(self._ahead(type, mine, ahead=False)).order_by(*self._order(type)).limit(neighbours)
+        )
+        below = result.all()
+
+        return (
+            [self._entry(neighbour, type, rank - len(above) + n) for n, neighbour in enumerate(above)]
+            + [self._entry(row, type, rank)]
+            + [self._entry(neighbour, type, rank + n) for n, neighbour in enumerate(below, start=1)]
+        )
+
+    async def get_percentile(self, game: str, user_id: int, type: str = "monthly") -> LeaderboardPercentile | None:
+        me = await self.get_user_rank(game, user_id, type)
+        if me is None:
+            return None
+
+        total = await self._count(game, type)
+        return LeaderboardPercentile(
+            rank=me.rank,
+            total=total,
+            # Share of the board ranked below the player
+            percentile=round(100 * (total - me.rank) / total, 1),
+        )
+
+    async def verify(self, game: str, repair: bool = True) -> int:
+        """
+        Compares the game's aggregates with a full recomputation and returns the number of
+        rows that differ. With repair they are rewritten from the recomputation; the table
+        lock makes games ending meanwhile wait and add themselves afterwards.
+        """
+        if repair:
+            await self.session.execute(text("LOCK TABLE leaderboard_scores IN SHARE ROW EXCLUSIVE MODE"))
+
+        expected = expected_scores(game).subquery()
+        stored = select(LeaderboardScore).where(LeaderboardScore.game == game).subquery()
+        differ = select(func.count()).select_from(
+            expected.join(
+                stored,
+                and_(expected.c.period == stored.c.period, expected.c.user_id == stored.c.user_id),
+                full=True,
+            )
+        ).where(
+            or_(
+                expected.c.user_id.is_(None),
+                stored.c.user_id.is_(None),
+                expected.c.points != stored.c.points,
+                expected.c.wins != stored.c.wins,
+                expected.c.games_played != stored.c.games_played,
+            )
+        )
+        mismatches = await self.session.scalar(differ)
+
+        if mismatches and repair:
+            await self.session.execute(delete(LeaderboardScore).where(LeaderboardScore.game == game))
+            await self.session.execute(
+                insert(LeaderboardScore).from_select(
+                    ["game", "period", "user_id", "points", "wins", "games_played"],
+                    expected_scores(game),
+                )
+            )
+        await self.session.commit()
+
+        return mismatches
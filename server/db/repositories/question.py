@@ -1,3 +1,4 @@
+from datetime import date
 from typing import List, Any
 from sqlalchemy import Integer, and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -60,6 +61,22 @@ class CountrydleQuestionsRepository:
         print(row)
         return row
 
+    async def get_most_asked_questions(self, since: date, limit: int) -> List[str]:
+        canonical = func.lower(CountrydleQuestion.question)
+        result = await self.session.execute(
+            select(func.min(CountrydleQuestion.question))
+            .join(CountrydleDay, CountrydleQuestion.day_id == CountrydleDay.id)
+            .where(
+                CountrydleQuestion.valid.is_(True),
+                CountrydleQuestion.question.isnot(None),
+                CountrydleDay.date >= since,
+            )
+            .group_by(canonical)
+            .order_by(func.count().desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
     async def get_all_questions(self) -> List[CountrydleQuestion]:
         result = await self.session.execute(
             select(CountrydleQuestion)
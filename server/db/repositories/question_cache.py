@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import EnhancedQuestionCache
+
+
+class EnhancedQuestionCacheRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(
+        self, namespace: str, normalized_question: str, max_age: timedelta
+    ) -> EnhancedQuestionCache | None:
+        result = await self.session.execute(
+            select(EnhancedQuestionCache).where(
+                and_(
+                    EnhancedQuestionCache.namespace == namespace,
+                    EnhancedQuestionCache.normalized_question == normalized_question,
+                    EnhancedQuestionCache.created_at > datetime.now() - max_age,
+                )
+            )
+        )
+
+        return result.scalars().first()
+
+    async def upsert(self, namespace: str, normalized_question: str, result: dict):
+        stmt = insert(EnhancedQuestionCache).values(
+            namespace=namespace,
+            normalized_question=normalized_question,
+            result=result,
+            created_at=datetime.now(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_enhanced_question_cache_namespace_question",
+            set_={"result": stmt.excluded.result, "created_at": stmt.excluded.created_at},
+        )
+
+        try:
+            await self.session.execute(stmt)
+            await self.session.commit()
+        except Exception as ex:
+            await self.session.rollback()
+            raise ex
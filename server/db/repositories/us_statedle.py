@@ -1,5 +1,6 @@
+from datetime import date
 from typing import List, Optional
-from sqlalchemy import select, func, and_, cast, Integer, desc
+from sqlalchemy import select, func, and_, cast, Integer
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models.us_state import USState
@@ -10,6 +11,8 @@ from db.models.us_statedle import (
     USStatedleQuestion,
 )
 from db.models.user import User
+from db.repositories import add_unique
+from db.repositories.leaderboard import LEADERBOARD_SIZE, LeaderboardRepository
 from schemas.us_statedle import USStateGuessCreate, USStateQuestionCreate
 from schemas.countrydle import LeaderboardEntry
 from schemas.statistics import GameStatistics, GameHistoryEntry
@@ -26,7 +29,13 @@ class USStatedleDayRepository:
         )
         return result.scalar_one_or_none()
 
-    async def generate_new_day_us_state(self) -> USStatedleDay:
+    async def get_day_us_state_by_date(self, day_date: date) -> Optional[USStatedleDay]:
+        result = await self.session.execute(
+            select(USStatedleDay).where(USStatedleDay.date == day_date)
+        )
+        return result.scalars().first()
+
+    async def generate_new_day_us_state(self, day_date: date | None = None) -> USStatedleDay:
         # Get a random us_state
         result = await self.session.execute(
             select(USState).order_by(func.random()).limit(1)
@@ -37,10 +46,15 @@ class USStatedleDayRepository:
             raise Exception("No US states found in database!")
 
         new_day = USStatedleDay(us_state_id=us_state.id)
-        self.session.add(new_day)
-        await self.session.commit()
-        await self.session.refresh(new_day)
-        return new_day
+        if day_date:
+            new_day.date = day_date
+
+        # Another worker may have created the day a moment earlier
+        return await add_unique(
+            self.session,
+            new_day,
+            lambda: self.get_day_us_state_by_date(day_date or date.today()),
+        )
 
     async def get_history(self) -> List[USStatedleDay]:
         from datetime import date
@@ -83,10 +97,7 @@ class USStatedleStateRepository:
             remaining_questions=max_questions,
             remaining_guesses=max_guesses,
         )
-        self.session.add(new_state)
-        await self.session.commit()
-        await self.session.refresh(new_state)
-        return new_state
+        return await add_unique(self.session, new_state, lambda: self.get_state(user, day))
 
     async def update_state(self, state: USStatedleState) -> USStatedleState:
         self.session.add(state)
@@ -101,93 +112,11 @@ class USStatedleStateRepository:
         difficulty_bonus = 200
         return question_points + guess_points + difficulty_bonus
 
-    async def get_leaderboard(self, type: str = "monthly") -> List[LeaderboardEntry]:
-        if type == "monthly":
-            from datetime import date
-            current_month = date.today().replace(day=1)
-            
-            stmt = (
-                select(
-                    User.id,
-                    User.username,
-                    func.coalesce(func.sum(USStatedleState.points), 0).label("points"),
-                    func.coalesce(func.sum(cast(USStatedleState.won, Integer)), 0).label(
-                        "wins"
-                    ),
-                )
-                .join(User, User.id == USStatedleState.user_id)
-                .join(USStatedleDay, USStatedleState.day_id == USStatedleDay.id)
-                .where(
-                    and_(
-                        User.username.not_like("test_%"),
-                        User.username.not_like("pytest_%"),
-                        User.username.not_like("guess_c_%"),
-                        User.username.not_like("ask_q_%"),
-                        USStatedleDay.date >= current_month,
-                    )
-                )
-                .group_by(User.id, User.username)
-                .order_by(desc("points"), desc("wins"))
-            )
-
-            result = await self.session.execute(stmt)
-
-            return [
-                LeaderboardEntry(
-                    id=row.id,
-                    username=row.username,
-                    points=row.points,
-                    wins=row.wins,
-                    streak=0,  # Streak not implemented yet for sub-games
-                )
-                for row in result.all()
-            ]
-            
-        elif type == "average":
-            stmt = (
-                select(
-                    User.id,
-                    User.username,
-                    func.coalesce(func.sum(USStatedleState.points), 0).label("points"),
-                    func.coalesce(func.sum(cast(USStatedleState.won, Integer)), 0).label(
-                        "wins"
-                    ),
-                    func.count(USStatedleState.id).label("games_played"),
-                )
-                .join(User, User.id == USStatedleState.user_id)
-                .where(
-                    and_(
-                        User.username.not_like("test_%"),
-                        User.username.not_like("pytest_%"),
-                        User.username.not_like("guess_c_%"),
-                        User.username.not_like("ask_q_%"),
-                        USStatedleState.is_game_over == True,
-                    )
-                )
-                .group_by(User.id, User.username)
-                .having(func.count(USStatedleState.id) >= 5)
-            )
-
-            result = await self.session.execute(stmt)
-
-            leaderboard = []
-            for row in result.all():
-                avg_points = row.points / row.games_played if row.games_played > 0 else 0
-                leaderboard.append({
-                    "id": row.id,
-                    "username": row.username,
-                    "points": row.points,
-                    "streak": 0,
-                    "wins": row.wins,
-                    "average_points": round(avg_points, 2),
-                    "games_played": row.games_played,
-                })
-
-            leaderboard.sort(key=lambda x: x["average_points"], reverse=True)
+    async def get_leaderboard(self, type: str = "monthly", limit: int = LEADERBOARD_SIZE) -> List[LeaderboardEntry]:
+        return await LeaderboardRepository(self.session).get_leaderboard("us_statedle", type, limit)
 
-            return [LeaderboardEntry(**entry) for entry in leaderboard]
-            
-        return []
+    async def get_user_rank(self, user: User, type: str = "monthly") -> LeaderboardEntry | None:
+        return await LeaderboardRepository(self.session).get_user_rank("us_statedle", user.id, type)
 
     async def get_user_statistics(self, user: User) -> GameStatistics:
         # Calculate total points and wins
@@ -301,6 +230,22 @@ class USStatedleQuestionRepository:
         )
         return list(result.scalars().all())
 
+    async def get_most_asked_questions(self, since: date, limit: int) -> List[str]:
+        canonical = func.lower(USStatedleQuestion.question)
+        result = await self.session.execute(
+            select(func.min(USStatedleQuestion.question))
+            .join(USStatedleDay, USStatedleQuestion.day_id == USStatedleDay.id)
+            .where(
+                USStatedleQuestion.valid.is_(True),
+                USStatedleQuestion.question.isnot(None),
+                USStatedleDay.date >= since,
+            )
+            .group_by(canonical)
+            .order_by(func.count().desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
     async def get_all_questions(self) -> List[USStatedleQuestion]:
         result = await self.session.execute(
             select(USStatedleQuestion)
@@ -1,15 +1,26 @@
 from datetime import datetime, timedelta
 import re
 from fastapi import HTTPException
-from sqlalchemy import and_, or_, select
+from sqlalchemy import Date, and_, delete, exists, func, literal, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.models import Permission, User, AccountUpdate
+from db.base import Base
+from db.models import Permission, User, AccountUpdate, LeaderboardScore
 from schemas.user import UserCreate, UserUpdate
 from db.models.countrydle import CountrydleState
 from db.models.user import UserPoints
 
 
+def user_references() -> list:
+    """(table, column) of every column referencing a user, dependent tables first."""
+    return [
+        (table, fk.parent)
+        for table in reversed(Base.metadata.sorted_tables)
+        for fk in table.foreign_keys
+        if fk.column.table.name == User.__tablename__
+    ]
+
+
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -92,7 +103,11 @@ class UserRepository:
 
         hashed_password = User.hash_password(user.password)
         new_user = User(
-            username=user.username, email=user.email, hashed_password=hashed_password, verified=True
+            username=user.username,
+            email=user.email,
+            hashed_password=hashed_password,
+            verified=True,
+            is_synthetic=User.is_synthetic_username(user.username),
         )
         self.session.add(new_user)
         await self.session.commit()
@@ -148,6 +163,93 @@ class UserRepository:
 
         await self.session.commit()
 
+    async def reconcile_streaks(self, day) -> tuple[int, int]:
+        """
+        Closes the Countrydle day in two set-based updates: a streak that reached
+        a new high with a win on that day is recorded as the longest, and every
+        verified player without a finished game that day loses their streak.
+        Returns the number of (recorded, reset) rows; nothing else is written.
+        """
+        def played(*conditions):
+            return exists().where(
+                CountrydleState.user_id == UserPoints.user_id,
+                CountrydleState.day_id == day.id,
+                *conditions,
+            )
+
+        # A streak increments on each win, so it ends on the day it was won
+        recorded = await self.session.execute(
+            update(UserPoints)
+            .where(UserPoints.streak > UserPoints.longest_streak, played(CountrydleState.won == True))
+            .values(
+                longest_streak=UserPoints.streak,
+                longest_streak_start=literal(day.date, Date) - (UserPoints.streak - 1),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        reset = await self.session.execute(
+            update(UserPoints)
+            .where(
+                UserPoints.streak > 0,
+                UserPoints.user_id.in_(select(User.id).where(User.verified == True)),
+                ~played(CountrydleState.is_game_over == True),
+            )
+            .values(streak=0)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+
+        return recorded.rowcount, reset.rowcount
+
+    async def flag_synthetic_users(self, prefix: str) -> int:
+        """
+        Flags the users whose username starts with the prefix and drops their leaderboard
+        rows. The prefix is matched literally: `_` and `%` are not wildcards.
+        """
+        result = await self.session.execute(
+            update(User)
+            .where(User.username.startswith(prefix, autoescape=True), User.is_synthetic == False)
+            .values(is_synthetic=True)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = result.scalars().all()
+        if ids:
+            await self.session.execute(delete(LeaderboardScore).where(LeaderboardScore.user_id.in_(ids)))
+        await self.session.commit()
+
+        return len(ids)
+
+    async def count_synthetic_users(self) -> int:
+        result = await self.session.execute(
+            select(func.count()).select_from(User).where(User.is_synthetic == True)
+        )
+        return result.scalar()
+
+    async def purge_synthetic_users(self, batch_size: int) -> int:
+        """
+        Deletes up to batch_size synthetic users and everything they own, in one
+        transaction. Their questions are kept as guest questions, since the answer
+        cache holds them too. Returns the number of users deleted.
+        """
+        result = await self.session.execute(
+            select(User.id).where(User.is_synthetic == True).order_by(User.id).limit(batch_size)
+        )
+        ids = result.scalars().all()
+        if not ids:
+            return 0
+
+        for table, column in user_references():
+            if table.name.endswith("_questions"):
+                stmt = update(table).where(column.in_(ids)).values({column.name: None})
+            else:
+                stmt = delete(table).where(column.in_(ids))
+            await self.session.execute(stmt)
+        await self.session.execute(delete(User).where(User.id.in_(ids)))
+        await self.session.commit()
+
+        return len(ids)
+
     async def get_last_user_update(self, user_id: int) -> AccountUpdate | None:
         since = datetime.now() - timedelta(days=30)
         result = await self.session.execute(
@@ -1,5 +1,6 @@
+from datetime import date
 from typing import List, Optional
-from sqlalchemy import select, func, and_, cast, Integer, desc
+from sqlalchemy import select, func, and_, cast, Integer
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models.wojewodztwo import Wojewodztwo
@@ -10,6 +11,8 @@ from db.models.wojewodztwodle import (
     WojewodztwodleQuestion,
 )
 from db.models.user import User
+from db.repositories import add_unique
+from db.repositories.leaderboard import LEADERBOARD_SIZE, LeaderboardRepository
 from schemas.wojewodztwodle import WojewodztwoGuessCreate, WojewodztwoQuestionCreate
 from schemas.countrydle import LeaderboardEntry
 from schemas.statistics import GameStatistics, GameHistoryEntry
@@ -26,7 +29,13 @@ class WojewodztwodleDayRepository:
         )
         return result.scalar_one_or_none()
 
-    async def generate_new_day_wojewodztwo(self) -> WojewodztwodleDay:
+    async def get_day_wojewodztwo_by_date(self, day_date: date) -> Optional[WojewodztwodleDay]:
+        result = await self.session.execute(
+            select(WojewodztwodleDay).where(WojewodztwodleDay.date == day_date)
+        )
+        return result.scalars().first()
+
+    async def generate_new_day_wojewodztwo(self, day_date: date | None = None) -> WojewodztwodleDay:
         # Get a random wojewodztwo
         result = await self.session.execute(
             select(Wojewodztwo).order_by(func.random()).limit(1)
@@ -37,10 +46,15 @@ class WojewodztwodleDayRepository:
             raise Exception("No wojewodztwa found in database!")
 
         new_day = WojewodztwodleDay(wojewodztwo_id=wojewodztwo.id)
-        self.session.add(new_day)
-        await self.session.commit()
-        await self.session.refresh(new_day)
-        return new_day
+        if day_date:
+            new_day.date = day_date
+
+        # Another worker may have created the day a moment earlier
+        return await add_unique(
+            self.session,
+            new_day,
+            lambda: self.get_day_wojewodztwo_by_date(day_date or date.today()),
+        )
 
     async def get_history(self) -> List[WojewodztwodleDay]:
         from datetime import date
@@ -84,10 +98,7 @@ class WojewodztwodleStateRepository:
             remaining_questions=max_questions,
             remaining_guesses=max_guesses,
         )
-        self.session.add(new_state)
-        await self.session.commit()
-        await self.session.refresh(new_state)
-        return new_state
+        return await add_unique(self.session, new_state, lambda: self.get_state(user, day))
 
     async def update_state(self, state: WojewodztwodleState) -> WojewodztwodleState:
         self.session.add(state)
@@ -101,93 +112,11 @@ class WojewodztwodleStateRepository:
         guess_points = 100 * (state.remaining_guesses + 1)
         return question_points + guess_points
 
-    async def get_leaderboard(self, type: str = "monthly") -> List[LeaderboardEntry]:
-        if type == "monthly":
-            from datetime import date
-            current_month = date.today().replace(day=1)
-            
-            stmt = (
-                select(
-                    User.id,
-                    User.username,
-                    func.coalesce(func.sum(WojewodztwodleState.points), 0).label("points"),
-                    func.coalesce(
-                        func.sum(cast(WojewodztwodleState.won, Integer)), 0
-                    ).label("wins"),
-                )
-                .join(User, User.id == WojewodztwodleState.user_id)
-                .join(WojewodztwodleDay, WojewodztwodleState.day_id == WojewodztwodleDay.id)
-                .where(
-                    and_(
-                        User.username.not_like("test_%"),
-                        User.username.not_like("pytest_%"),
-                        User.username.not_like("guess_c_%"),
-                        User.username.not_like("ask_q_%"),
-                        WojewodztwodleDay.date >= current_month,
-                    )
-                )
-                .group_by(User.id, User.username)
-                .order_by(desc("points"), desc("wins"))
-            )
-
-            result = await self.session.execute(stmt)
-
-            return [
-                LeaderboardEntry(
-                    id=row.id,
-                    username=row.username,
-                    points=row.points,
-                    wins=row.wins,
-                    streak=0,  # Streak not implemented yet for sub-games
-                )
-                for row in result.all()
-            ]
-            
-        elif type == "average":
-            stmt = (
-                select(
-                    User.id,
-                    User.username,
-                    func.coalesce(func.sum(WojewodztwodleState.points), 0).label("points"),
-                    func.coalesce(
-                        func.sum(cast(WojewodztwodleState.won, Integer)), 0
-                    ).label("wins"),
-                    func.count(WojewodztwodleState.id).label("games_played"),
-                )
-                .join(User, User.id == WojewodztwodleState.user_id)
-                .where(
-                    and_(
-                        User.username.not_like("test_%"),
-                        User.username.not_like("pytest_%"),
-                        User.username.not_like("guess_c_%"),
-                        User.username.not_like("ask_q_%"),
-                        WojewodztwodleState.is_game_over == True,
-                    )
-                )
-                .group_by(User.id, User.username)
-                .having(func.count(WojewodztwodleState.id) >= 5)
-            )
-
-            result = await self.session.execute(stmt)
-
-            leaderboard = []
-            for row in result.all():
-                avg_points = row.points / row.games_played if row.games_played > 0 else 0
-                leaderboard.append({
-                    "id": row.id,
-                    "username": row.username,
-                    "points": row.points,
-                    "streak": 0,
-                    "wins": row.wins,
-                    "average_points": round(avg_points, 2),
-                    "games_played": row.games_played,
-                })
-
-            leaderboard.sort(key=lambda x: x["average_points"], reverse=True)
+    async def get_leaderboard(self, type: str = "monthly", limit: int = LEADERBOARD_SIZE) -> List[LeaderboardEntry]:
+        return await LeaderboardRepository(self.session).get_leaderboard("wojewodztwodle", type, limit)
 
-            return [LeaderboardEntry(**entry) for entry in leaderboard]
-            
-        return []
+    async def get_user_rank(self, user: User, type: str = "monthly") -> LeaderboardEntry | None:
+        return await LeaderboardRepository(self.session).get_user_rank("wojewodztwodle", user.id, type)
 
     async def get_user_statistics(self, user: User) -> GameStatistics:
         # Calculate total points and wins
@@ -308,6 +237,22 @@ class WojewodztwodleQuestionRepository:
         )
         return list(result.scalars().all())
 
+    async def get_most_asked_questions(self, since: date, limit: int) -> List[str]:
+        canonical = func.lower(WojewodztwodleQuestion.question)
+        result = await self.session.execute(
+            select(func.min(WojewodztwodleQuestion.question))
+            .join(WojewodztwodleDay, WojewodztwodleQuestion.day_id == WojewodztwodleDay.id)
+            .where(
+                WojewodztwodleQuestion.valid.is_(True),
+                WojewodztwodleQuestion.question.isnot(None),
+                WojewodztwodleDay.date >= since,
+            )
+            .group_by(canonical)
+            .order_by(func.count().desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
     async def get_all_questions(self) -> List[WojewodztwodleQuestion]:
         result = await self.session.execute(
             select(WojewodztwodleQuestion)
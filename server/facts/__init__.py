@@ -0,0 +1,59 @@
+"""
+Deterministic answers to structured geography questions.
+
+Adjacency, parent voivodeships, coastlines and (for countries) continents are
+derived once from the GeoJSON the client ships and the optional CSVs in data/.
+Questions the enhancer routes here through `required_info` and that match one of
+the known templates are answered without retrieval or a chat model; anything else,
+or anything the facts are not certain about, returns None and takes the LLM path.
+"""
+
+import os
+import threading
+from typing import Dict
+
+import metrics
+from facts.rules import FactAnswer, evaluate as evaluate_rules
+from facts.store import UnitFacts, load_facts
+
+FACTS_ENABLED = os.getenv("FACTS_ENABLED", "true").lower() == "true"
+
+_facts: Dict[str, UnitFacts] | None = None
+_lock = threading.Lock()
+
+
+def get_facts() -> Dict[str, UnitFacts]:
+    """Loads the facts on first use. Call it from a thread at startup to not block."""
+    global _facts
+    if _facts is None:
+        with _lock:
+            if _facts is None:
+                try:
+                    _facts = load_facts()
+                    print(f"Loaded geography facts for {', '.join(_facts) or 'no games'}")
+                except Exception as e:
+                    print(f"Loading geography facts failed: {e}")
+                    _facts = {}
+    return _facts
+
+
+def evaluate(game: str, target_name: str, question) -> FactAnswer | None:
+    """Answers an enhanced question about `target_name` from the facts, if certain."""
+    if not FACTS_ENABLED or not question.question:
+        return None
+
+    facts = get_facts().get(game)
+    target = facts.target(target_name) if facts else None
+    if target is None:
+        return None
+
+    with metrics.timer(f"facts.{game}.evaluate"):
+        result = evaluate_rules(
+            game, facts, target, question.question, question.required_info
+        )
+
+    metrics.inc(f"facts.{game}.{'hits' if result else 'misses'}")
+    return result
+
+
+__all__ = ["FactAnswer", "FACTS_ENABLED", "evaluate", "get_facts"]
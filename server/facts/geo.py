@@ -0,0 +1,126 @@
+import json
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, List, Tuple
+
+Point = Tuple[float, float]
+Ring = List[Point]
+BBox = Tuple[float, float, float, float]
+
+
+def load_features(path: str, name_key: str) -> Dict[str, dict]:
+    """Returns feature geometries of a GeoJSON file by their `name_key` property."""
+    with open(path, encoding="utf8") as f:
+        collection = json.load(f)
+
+    return {
+        feature["properties"][name_key]: feature["geometry"]
+        for feature in collection["features"]
+        if feature.get("geometry")
+    }
+
+
+def rings(geometry: dict) -> List[Ring]:
+    polygons = (
+        [geometry["coordinates"]]
+        if geometry["type"] == "Polygon"
+        else geometry["coordinates"]
+    )
+    return [[tuple(point) for point in ring] for polygon in polygons for ring in polygon]
+
+
+def bbox(geometry: dict) -> BBox:
+    points = [point for ring in rings(geometry) for point in ring]
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def contains(geometry: dict, point: Point) -> bool:
+    """Even-odd ray casting, holes included."""
+    x, y = point
+    inside = False
+    for ring in rings(geometry):
+        for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+            if (y0 > y) != (y1 > y) and x < (x1 - x0) * (y - y0) / (y1 - y0) + x0:
+                inside = not inside
+    return inside
+
+
+def interior_point(geometry: dict) -> Point:
+    """
+    A point guaranteed to be inside the shape: the middle of the widest span of the
+    horizontal line through the bounding box centre. Unlike the centroid it works for
+    ring-shaped units such as a powiat surrounding its city.
+    """
+    _, min_y, _, max_y = bbox(geometry)
+    y = (min_y + max_y) / 2
+
+    crossings = sorted(
+        x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        for ring in rings(geometry)
+        for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1])
+        if (y0 > y) != (y1 > y)
+    )
+    start, end = max(
+        zip(crossings[::2], crossings[1::2]), key=lambda span: span[1] - span[0]
+    )
+    return (start + end) / 2, y
+
+
+def shared_vertices(
+    features: Dict[str, dict], precision: int = 4
+) -> Dict[str, Counter]:
+    """Counts the boundary vertices every pair of units has in common."""
+    owners = defaultdict(set)
+    for name, geometry in features.items():
+        for ring in rings(geometry):
+            for x, y in ring:
+                owners[(round(x, precision), round(y, precision))].add(name)
+
+    shared: Dict[str, Counter] = {name: Counter() for name in features}
+    for names in owners.values():
+        if len(names) < 2:
+            continue
+        for name in names:
+            shared[name].update(other for other in names if other != name)
+    return shared
+
+
+def adjacency(
+    features: Dict[str, dict], min_shared: int = 2
+) -> Tuple[Dict[str, FrozenSet[str]], Dict[str, FrozenSet[str]]]:
+    """
+    Units sharing a stretch of at least `min_shared` boundary vertices are neighbours.
+    Units with fewer in common are returned separately: they meet in a point (like
+    the Four Corners states) or only seem to in a simplified outline, and whether
+    they "border" each other is not something the facts store decides.
+    """
+    shared = shared_vertices(features)
+    neighbours = {
+        name: frozenset(other for other, count in counts.items() if count >= min_shared)
+        for name, counts in shared.items()
+    }
+    touching = {
+        name: frozenset(other for other, count in counts.items() if count < min_shared)
+        for name, counts in shared.items()
+    }
+    return neighbours, touching
+
+
+def parents(children: Dict[str, dict], parents: Dict[str, dict]) -> Dict[str, str]:
+    """Maps each child unit to the single parent unit containing its interior point."""
+    boxes = {name: bbox(geometry) for name, geometry in parents.items()}
+
+    result = {}
+    for child, geometry in children.items():
+        x, y = interior_point(geometry)
+        matches = [
+            parent
+            for parent, (min_x, min_y, max_x, max_y) in boxes.items()
+            if min_x <= x <= max_x
+            and min_y <= y <= max_y
+            and contains(parents[parent], (x, y))
+        ]
+        if len(matches) == 1:
+            result[child] = matches[0]
+    return result
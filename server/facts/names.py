@@ -0,0 +1,106 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+# Words naming the kind of unit rather than the unit itself
+UNIT_WORDS = ("powiat", "miast", "wojewodztw")
+STOPWORDS = {"w", "z", "ze", "na", "prawach", "the"}
+
+# How many more characters an inflected form may have than the stem
+MAX_SUFFIX = 5
+
+
+def fold(text: str) -> str:
+    """Lowercase ASCII with single spaces: 'Powiat Łódzki-Wschodni' -> 'powiat lodzki wschodni'."""
+    text = text.casefold().replace("ł", "l")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def stem(word: str) -> str:
+    """Crude Polish stem: drops the inflectional ending so 'krakowskim' meets 'krakowski'."""
+    if len(word) >= 6:
+        return word[:-2]
+    if len(word) >= 4:
+        return word[:-1]
+    return word
+
+
+def _matches(token: str, name_token: str) -> bool:
+    name_stem = stem(name_token)
+    return token.startswith(name_stem) and len(token) - len(name_stem) <= MAX_SUFFIX
+
+
+def _split_unit_words(tokens: List[str]) -> Tuple[List[str], set[str]]:
+    units = {unit for token in tokens for unit in UNIT_WORDS if token.startswith(unit)}
+    words = [
+        token
+        for token in tokens
+        if token not in STOPWORDS and not token.startswith(UNIT_WORDS)
+    ]
+    return words, units
+
+
+class NameIndex:
+    """
+    Resolves a user's spelling of a name to exactly one known name, or to None.
+
+    English names must match whole (ignoring case, punctuation and a leading 'the').
+    Polish names also match inflected: 'powiatu krakowskiego' resolves to
+    'Powiat krakowski', 'Krakowa' to 'Kraków'. Names without a unit word of their
+    own (cities, voivodeships) take `unit`, so 'miasto Kraków' skips the powiat.
+    Namesakes like 'Powiat bielski (województwo śląskie)' are told apart by giving
+    the bracketed part: 'bielski w województwie śląskim'.
+    """
+
+    def __init__(self, names: Iterable[str], inflected: bool = False, unit: str = ""):
+        self.inflected = inflected
+        self._exact: Dict[str, List[Tuple[str, set[str]]]] = defaultdict(list)
+        self._entries: List[Tuple[str, List[str], List[str], set[str]]] = []
+
+        for name in names:
+            core, _, qualifier = name.partition("(")
+            core_words, units = _split_unit_words(fold(core).split())
+            qualifier_words, _ = _split_unit_words(fold(qualifier).split())
+            units = units or {unit}
+
+            self._exact[" ".join(core_words)].append((name, units))
+            self._entries.append((name, core_words, qualifier_words, units))
+
+    def resolve(self, text: str) -> str | None:
+        tokens = fold(text).split()
+        words, units = _split_unit_words(tokens)
+        if not words:
+            return None
+
+        # 'bielski w województwie śląskim': the voivodeship only qualifies the name
+        qualified = next(
+            (i for i, token in enumerate(tokens) if token.startswith("wojewodztw")), 0
+        )
+        named, named_units = _split_unit_words(tokens[:qualified])
+        if named:
+            units = named_units
+
+        exact = [
+            name
+            for name, name_units in self._exact.get(" ".join(words), [])
+            if not units or units & name_units
+        ]
+        if len(exact) == 1:
+            return exact[0]
+        if not self.inflected:
+            return None
+
+        candidates = [
+            name
+            for name, core_words, qualifier_words, name_units in self._entries
+            if (not units or units & name_units)
+            and all(any(_matches(word, core) for word in words) for core in core_words)
+            and all(
+                any(_matches(word, known) for known in core_words + qualifier_words)
+                for word in words
+            )
+        ]
+        return candidates[0] if len(candidates) == 1 else None
@@ -0,0 +1,237 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from facts.names import NameIndex, fold
+from facts.store import UnitFacts
+
+
+@dataclass(frozen=True)
+class FactAnswer:
+    answer: bool
+    explanation: str
+    context: str
+
+    def as_answer(self) -> dict:
+        """The fact in the shape of the answering model's JSON."""
+        return {"answer": self.answer, "explanation": self.explanation}
+
+
+# Which kinds of facts the enhancer's required_info asks for
+TOPICS = {
+    "name": re.compile(r"\bname\b|nazw"),
+    "border": re.compile(r"border|neighbo|adjacent|granic|sasi[ae]d"),
+    "continent": re.compile(r"continent"),
+    "coast": re.compile(r"landlock|coast|\bsea\b|ocean|morz|morsk|baltyk"),
+    "parent": re.compile(r"wojewodztw"),
+}
+
+NEGATION = re.compile(r"\b(?:not|no|nie)\b")
+LIST_SEPARATOR = re.compile(r",|\b(?:or|lub|albo|czy)\b")
+LIST_PREFIX = re.compile(
+    r"^(?:one of the following|either|jeden z wymienionych|jedno z wymienionych)\b"
+)
+
+# Simplified questions the enhancer produces, diacritics folded. The object names
+# are captured as `names`; templates without it ask about a flag of the target.
+TEMPLATES: Dict[str, List[Tuple[str, str]]] = {
+    "countrydle": [
+        ("name", r"is the country (?P<names>.+)"),
+        ("border", r"does the country (?:share a (?:land )?border with|border) (?P<names>.+)"),
+        ("border", r"is the country (?:a neighbou?r of|adjacent to|bordering) (?P<names>.+)"),
+        ("continent", r"is the country (?:located |situated )?(?:in|on) (?:the continent of )?(?P<names>.+)"),
+        ("coast", r"is the country (?P<landlocked>landlocked)"),
+        ("coast", r"(?:is the country coastal|does the country have (?:a )?(?:coastline|coast|access to the (?:sea|ocean)))"),
+    ],
+    "us_statedle": [
+        ("name", r"is the state (?P<names>.+)"),
+        ("border", r"does the state (?:share a border with|border) (?P<names>.+)"),
+        ("border", r"is the state (?:a neighbou?r of|adjacent to|bordering) (?P<names>.+)"),
+        ("coast", r"is the state (?P<landlocked>landlocked)"),
+        ("coast", r"(?:is the state coastal|does the state have (?:a |an )?(?:ocean )?(?:coastline|coast|access to the (?:sea|ocean)))"),
+    ],
+    "powiatdle": [
+        ("name", r"czy powiat to (?P<names>.+)"),
+        ("border", r"czy powiat (?:graniczy|sasiaduje) ze? (?P<names>.+)"),
+        ("parent", r"czy powiat (?:znajduje sie|lezy|jest polozony|miesci sie) w (?P<names>.+)"),
+        ("parent", r"czy powiat nalezy do (?P<names>.+)"),
+    ],
+    "wojewodztwodle": [
+        ("name", r"czy wojewodztwo to (?P<names>.+)"),
+        ("border", r"czy wojewodztwo (?:graniczy|sasiaduje) ze? (?P<names>.+)"),
+        ("coast", r"czy wojewodztwo (?:ma dostep do|lezy nad|jest polozone nad|graniczy z) (?:morz\w*(?: baltyck\w*)?|baltyk\w*)"),
+    ],
+}  # fmt: skip
+COMPILED = {
+    game: [(topic, re.compile(f"^{pattern}$")) for topic, pattern in templates]
+    for game, templates in TEMPLATES.items()
+}
+
+# (single, list) explanation of a True and a False answer. They never name the
+# target unless the player already did.
+EXPLANATIONS = {
+    "countrydle": {
+        ("name", True): ("The country is {names}.", "The country is one of {names}."),
+        ("name", False): ("The country is not {names}.", "The country is none of {names}."),
+        ("border", True): ("The country shares a border with {names}.", "The country shares a border with at least one of {names}."),
+        ("border", False): ("The country does not border {names}.", "The country does not border any of {names}."),
+        ("continent", True): ("The country is located in {names}.", "The country is located in one of {names}."),
+        ("continent", False): ("The country is not located in {names}.", "The country is not located in any of {names}."),
+        ("coast", True): "The country has a coastline.",
+        ("coast", False): "The country is landlocked and has no coastline.",
+    },
+    "us_statedle": {
+        ("name", True): ("The state is {names}.", "The state is one of {names}."),
+        ("name", False): ("The state is not {names}.", "The state is none of {names}."),
+        ("border", True): ("The state shares a border with {names}.", "The state shares a border with at least one of {names}."),
+        ("border", False): ("The state does not border {names}.", "The state does not border any of {names}."),
+        ("coast", True): "The state has an ocean coastline.",
+        ("coast", False): "The state is landlocked and has no ocean coastline.",
+    },
+    "powiatdle": {
+        ("name", True): ("Szukany powiat to {names}.", "Szukany powiat to jeden z wymienionych: {names}."),
+        ("name", False): ("{names} to nie jest szukany powiat.", "Szukany powiat to żaden z wymienionych: {names}."),
+        ("border", True): ("{names} sąsiaduje z tym powiatem.", "Co najmniej jeden z wymienionych sąsiaduje z tym powiatem: {names}."),
+        ("border", False): ("{names} nie sąsiaduje z tym powiatem.", "Żaden z wymienionych nie sąsiaduje z tym powiatem: {names}."),
+        ("parent", True): ("Powiat leży w województwie {names}.", "Powiat leży w jednym z województw: {names}."),
+        ("parent", False): ("Powiat nie leży w województwie {names}.", "Powiat nie leży w żadnym z województw: {names}."),
+    },
+    "wojewodztwodle": {
+        ("name", True): ("Szukane województwo to {names}.", "Szukane województwo to jedno z wymienionych: {names}."),
+        ("name", False): ("Województwo {names} to nie jest szukane województwo.", "Szukane województwo to żadne z wymienionych: {names}."),
+        ("border", True): ("Województwo {names} sąsiaduje z tym województwem.", "Co najmniej jedno z wymienionych sąsiaduje z tym województwem: {names}."),
+        ("border", False): ("Województwo {names} nie sąsiaduje z tym województwem.", "Żadne z wymienionych nie sąsiaduje z tym województwem: {names}."),
+        ("coast", True): "Województwo leży nad Morzem Bałtyckim i ma do niego bezpośredni dostęp.",
+        ("coast", False): "Województwo nie ma dostępu do morza.",
+    },
+}  # fmt: skip
+
+
+def locative(wojewodztwo: str) -> str:
+    """'małopolskie' -> 'małopolskim', as in 'w województwie małopolskim'."""
+    return wojewodztwo[:-2] + "im" if wojewodztwo.endswith("ie") else wojewodztwo
+
+
+def topics(required_info: str | None) -> List[str]:
+    text = fold(required_info or "")
+    return [topic for topic, pattern in TOPICS.items() if pattern.search(text)]
+
+
+def simplify(question: str) -> str:
+    """Folds the question like names are folded, but keeps the commas of lists."""
+    return ", ".join(fold(part) for part in question.split(",")).strip(", ")
+
+
+def resolve_list(index: NameIndex | None, text: str) -> List[str] | None:
+    """All names of an 'A, B or C' list, or None unless each part is certain."""
+    if index is None:
+        return None
+
+    text = LIST_PREFIX.sub("", text)
+    parts = [part.strip() for part in LIST_SEPARATOR.split(text) if part.strip()]
+    names = [index.resolve(part) for part in parts]
+    if not names or not all(names):
+        return None
+    return list(dict.fromkeys(names))
+
+
+def _name(facts: UnitFacts, target: str, names: List[str]) -> bool | None:
+    return target in names
+
+
+def _border(facts: UnitFacts, target: str, names: List[str]) -> bool | None:
+    neighbours = facts.neighbours.get(target)
+    if neighbours is None:
+        return None
+    # Treated as bordering itself, like the answer prompts instruct the model
+    if any(name == target or name in neighbours for name in names):
+        return True
+    if any(name in facts.touching.get(target, ()) for name in names):
+        return None
+    return False
+
+
+def _continent(facts: UnitFacts, target: str, names: List[str]) -> bool | None:
+    continents = facts.continents.get(target)
+    if continents is None:
+        return None
+    return any(name in continents for name in names)
+
+
+def _parent(facts: UnitFacts, target: str, names: List[str]) -> bool | None:
+    parent = facts.parents.get(target)
+    if parent is None:
+        return None
+    return parent in names
+
+
+CHECKS: Dict[str, Callable[[UnitFacts, str, List[str]], bool | None]] = {
+    "name": _name,
+    "border": _border,
+    "continent": _continent,
+    "parent": _parent,
+}
+
+
+def _index(facts: UnitFacts, topic: str) -> NameIndex | None:
+    if topic == "continent":
+        return facts.continent_names
+    if topic == "parent":
+        return facts.parent_names
+    return facts.names
+
+
+def _context(facts: UnitFacts, topic: str, target: str) -> str:
+    if topic == "name":
+        return f"[facts] Target: {target}"
+    if topic == "border":
+        neighbours = ", ".join(sorted(facts.neighbours[target])) or "none"
+        return f"[facts] Neighbours of {target}: {neighbours}"
+    if topic == "continent":
+        return f"[facts] Continents of {target}: {', '.join(sorted(facts.continents[target]))}"
+    if topic == "parent":
+        return f"[facts] {target} lies in województwo {facts.parents[target]}"
+    return f"[facts] {target} has a coastline: {facts.coastal[target]}"
+
+
+def evaluate(
+    game: str, facts: UnitFacts, target: str, question: str, required_info: str | None
+) -> FactAnswer | None:
+    """Answers the simplified question from the facts, or returns None when unsure."""
+    text = simplify(question)
+    if NEGATION.search(text):
+        return None
+
+    routed = topics(required_info)
+    for topic, pattern in COMPILED.get(game, []):
+        if topic not in routed:
+            continue
+        match = pattern.match(text)
+        if match is None:
+            continue
+
+        if topic == "coast":
+            coastal = facts.coastal.get(target)
+            if coastal is None:
+                return None
+            answer = not coastal if match.groupdict().get("landlocked") else coastal
+            explanation = EXPLANATIONS[game][("coast", coastal)]
+            return FactAnswer(answer, explanation, _context(facts, topic, target))
+
+        names = resolve_list(_index(facts, topic), match["names"])
+        if names is None:
+            continue
+        answer = CHECKS[topic](facts, target, names)
+        if answer is None:
+            return None
+
+        single, listed = EXPLANATIONS[game][(topic, answer)]
+        if len(names) > 1:
+            explanation = listed.format(names=", ".join(names))
+        elif topic == "parent":
+            explanation = single.format(names=locative(names[0]))
+        else:
+            explanation = single.format(names=names[0])
+        return FactAnswer(answer, explanation, _context(facts, topic, target))
+
+    return None
@@ -0,0 +1,176 @@
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List
+
+from facts import geo
+from facts.names import NameIndex
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Voivodeships on the open Baltic. Warmińsko-mazurskie only reaches the Vistula
+# Lagoon, which players may or may not count as "the sea", so it is left unknown.
+COASTAL_WOJEWODZTWA = {"pomorskie", "zachodniopomorskie"}
+UNCERTAIN_COAST_WOJEWODZTWA = {"warmińsko-mazurskie"}
+
+# fmt: off
+# States with an ocean or Gulf of Mexico coastline. Great Lakes shores are
+# "coast" to some players and not to others, so those states stay unknown.
+COASTAL_US_STATES = {
+    "Alabama", "Alaska", "California", "Connecticut", "Delaware", "Florida",
+    "Georgia", "Hawaii", "Louisiana", "Maine", "Maryland", "Massachusetts",
+    "Mississippi", "New Hampshire", "New Jersey", "New York", "North Carolina",
+    "Oregon", "Rhode Island", "South Carolina", "Texas", "Virginia", "Washington",
+    "Puerto Rico",
+}
+UNCERTAIN_COAST_US_STATES = {
+    "Illinois", "Indiana", "Michigan", "Minnesota", "Ohio", "Pennsylvania",
+    "Wisconsin", "District of Columbia",
+}
+# fmt: on
+
+
+@dataclass
+class UnitFacts:
+    """Everything known for certain about the targets of one game, by their name."""
+
+    names: NameIndex
+    canonical: Dict[str, str]
+    neighbours: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    touching: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    coastal: Dict[str, bool] = field(default_factory=dict)
+    continents: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    continent_names: NameIndex | None = None
+    parents: Dict[str, str] = field(default_factory=dict)
+    parent_names: NameIndex | None = None
+
+    def target(self, name: str) -> str | None:
+        """The facts' spelling of a target name from the database."""
+        return self.canonical.get(name.casefold())
+
+
+def _unit_facts(names: Iterable[str], inflected: bool = False, unit: str = "") -> UnitFacts:
+    names = list(names)
+    return UnitFacts(
+        names=NameIndex(names, inflected, unit),
+        canonical={name.casefold(): name for name in names},
+    )
+
+
+def geojson_dir() -> str | None:
+    candidates = [
+        os.getenv("FACTS_GEOJSON_DIR"),
+        os.path.join(BASE_DIR, "data", "geojson"),
+        os.path.join(os.path.dirname(BASE_DIR), "client", "public"),
+    ]
+    return next((path for path in candidates if path and os.path.isdir(path)), None)
+
+
+def data_dir() -> str:
+    # Same lookup as the populate scripts: inside server/ in docker, a sibling on the host
+    data_dir = os.path.join(BASE_DIR, "data")
+    if not os.path.exists(data_dir):
+        data_dir = os.path.join(os.path.dirname(BASE_DIR), "data")
+    return data_dir
+
+
+def _split_list(value: str | None) -> List[str]:
+    return [item.strip() for item in (value or "").split(";") if item.strip()]
+
+
+def _parse_flag(value: str | None) -> bool | None:
+    value = (value or "").strip().lower()
+    if value in ("true", "yes", "1"):
+        return True
+    if value in ("false", "no", "0"):
+        return False
+    return None
+
+
+def load_country_facts(directory: str) -> UnitFacts | None:
+    """
+    Country names come from countries.csv. Continents, borders and the landlocked
+    flag come from the optional country_facts.csv (columns name, continents,
+    landlocked, borders; lists separated with ';'). Without it only name guesses
+    are answered.
+    """
+    countries_csv = os.path.join(directory, "countries.csv")
+    if not os.path.exists(countries_csv):
+        return None
+
+    with open(countries_csv, encoding="utf8") as f:
+        names = [row["name"] for row in csv.DictReader(f) if row.get("name")]
+    facts = _unit_facts(names)
+
+    facts_csv = os.path.join(directory, "country_facts.csv")
+    if not os.path.exists(facts_csv):
+        return facts
+
+    with open(facts_csv, encoding="utf8") as f:
+        rows = [row for row in csv.DictReader(f) if facts.target(row.get("name") or "")]
+
+    for row in rows:
+        name = facts.target(row["name"])
+        if row.get("continents"):
+            facts.continents[name] = frozenset(_split_list(row["continents"]))
+        landlocked = _parse_flag(row.get("landlocked"))
+        if landlocked is not None:
+            facts.coastal[name] = not landlocked
+        if row.get("borders") is not None:
+            borders = [facts.target(border) for border in _split_list(row["borders"])]
+            # A border we cannot name makes the whole list unreliable
+            if all(borders):
+                facts.neighbours[name] = frozenset(borders)
+
+    facts.continent_names = NameIndex(
+        {continent for continents in facts.continents.values() for continent in continents}
+    )
+    return facts
+
+
+def load_geojson_facts(
+    path: str, name_key: str, inflected: bool = False, unit: str = "", min_shared: int = 2
+) -> tuple[UnitFacts, Dict[str, dict]]:
+    features = geo.load_features(path, name_key)
+    facts = _unit_facts(features, inflected, unit)
+    facts.neighbours, facts.touching = geo.adjacency(features, min_shared)
+    return facts, features
+
+
+def load_facts() -> Dict[str, UnitFacts]:
+    """Builds the facts of every game whose sources are present. Takes about a second."""
+    facts: Dict[str, UnitFacts] = {}
+
+    countries = load_country_facts(data_dir())
+    if countries is not None:
+        facts["countrydle"] = countries
+
+    directory = geojson_dir()
+    if directory is None:
+        print("No GeoJSON directory found, geography facts are disabled")
+        return facts
+
+    states, _ = load_geojson_facts(os.path.join(directory, "us-states.geojson"), "name")
+    for state in states.canonical.values():
+        if state not in UNCERTAIN_COAST_US_STATES:
+            states.coastal[state] = state in COASTAL_US_STATES
+    facts["us_statedle"] = states
+
+    wojewodztwa, wojewodztwa_features = load_geojson_facts(
+        os.path.join(directory, "wojewodztwa.geojson"), "nazwa", True, "wojewodztw"
+    )
+    for wojewodztwo in wojewodztwa.canonical.values():
+        if wojewodztwo not in UNCERTAIN_COAST_WOJEWODZTWA:
+            wojewodztwa.coastal[wojewodztwo] = wojewodztwo in COASTAL_WOJEWODZTWA
+    facts["wojewodztwodle"] = wojewodztwa
+
+    # The powiaty outlines are simplified: two shared vertices may be a real border
+    # or two corners that ended up close together
+    powiaty, powiaty_features = load_geojson_facts(
+        os.path.join(directory, "powiaty-min.geojson"), "nazwa", True, "miast", 3
+    )
+    powiaty.parents = geo.parents(powiaty_features, wojewodztwa_features)
+    powiaty.parent_names = wojewodztwa.names
+    facts["powiatdle"] = powiaty
+
+    return facts
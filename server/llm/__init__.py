@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+from typing import List
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+load_dotenv()
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+# One pooled client per process. It is created lazily so that importing the
+# game modules does not require OPENAI_API_KEY (e.g. in tests).
+client: AsyncOpenAI | None = None
+
+# Bounds the number of completions/embeddings in flight on this worker, so a
+# burst of /question calls queues here instead of opening unbounded sockets.
+semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+
+def get_llm_client() -> AsyncOpenAI:
+    global client
+    if client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=LLM_TIMEOUT,
+        )
+        client = AsyncOpenAI(
+            timeout=LLM_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=http_client,
+        )
+    return client
+
+
+async def chat_json(
+    prompts: List[dict],
+    model: str | None = None,
+    timeout: float | None = None,
+) -> dict:
+    """Runs a deterministic JSON-mode chat completion and returns the parsed answer."""
+    async with semaphore:
+        response = await get_llm_client().chat.completions.create(
+            model=model or os.getenv("QUIZ_MODEL"),
+            messages=prompts,
+            response_format={"type": "json_object"},
+            temperature=0.0,
+            seed=42,
+            timeout=timeout or LLM_TIMEOUT,
+        )
+
+    answer = response.choices[0].message.content
+
+    try:
+        return json.loads(answer)
+    except json.JSONDecodeError:
+        print(answer)
+        raise
+
+
+async def embed(
+    texts: List[str], model: str, timeout: float | None = None, dimensions: int | None = None
+) -> List[List[float]]:
+    # Only text-embedding-3 models take `dimensions`, the others always return theirs
+    extra = {"dimensions": dimensions} if dimensions else {}
+    async with semaphore:
+        response = await get_llm_client().embeddings.create(
+            input=texts, model=model, timeout=timeout or LLM_TIMEOUT, **extra
+        )
+    return [data.embedding for data in response.data]
+
+
+async def close_llm_client():
+    global client
+    if client:
+        await client.close()
+        client = None
@@ -0,0 +1,143 @@
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Hashable, Type
+
+from pydantic import BaseModel
+
+import metrics
+from db import AsyncSessionLocal
+from db.repositories.question_cache import EnhancedQuestionCacheRepository
+
+ENHANCE_CACHE_SIZE = int(os.getenv("ENHANCE_CACHE_SIZE", "10000"))
+ENHANCE_CACHE_TTL = int(os.getenv("ENHANCE_CACHE_TTL", str(7 * 24 * 3600)))
+ENHANCE_CACHE_DB = os.getenv("ENHANCE_CACHE_DB", "true").lower() == "true"
+
+
+def normalize_question(text: str) -> str:
+    """Folds case, punctuation and whitespace: 'Czy graniczy z Niemcami?' -> 'czy graniczy z niemcami'."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(
+        " " if unicodedata.category(char).startswith("P") else char for char in text
+    )
+    return " ".join(text.split())
+
+
+class LRUCache:
+    """Bounded least-recently-used cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+async def _load_from_db(namespace: str, key: str) -> dict | None:
+    try:
+        async with AsyncSessionLocal() as session:
+            entry = await EnhancedQuestionCacheRepository(session).get(
+                namespace, key, max_age=timedelta(seconds=ENHANCE_CACHE_TTL)
+            )
+            return entry.result if entry else None
+    except Exception as e:
+        print(f"Enhancement cache read failed ({namespace}): {e}")
+        return None
+
+
+async def _store_in_db(namespace: str, key: str, result: dict):
+    try:
+        async with AsyncSessionLocal() as session:
+            await EnhancedQuestionCacheRepository(session).upsert(namespace, key, result)
+    except Exception as e:
+        print(f"Enhancement cache write failed ({namespace}): {e}")
+
+
+def _hit_rate(namespace: str) -> float:
+    hits = metrics.get(f"enhance_cache.{namespace}.memory_hits") + metrics.get(
+        f"enhance_cache.{namespace}.db_hits"
+    )
+    total = hits + metrics.get(f"enhance_cache.{namespace}.misses")
+    return round(hits / total, 4) if total else 0.0
+
+
+def cached_enhancement(namespace: str, model: Type[BaseModel]):
+    """
+    Caches the result of an `enhance_question(question)` coroutine. The enhancer does
+    not depend on the day's target, so its output is shared by every player: first in
+    an in-process LRU, then in the enhanced_question_cache table shared by all workers.
+    """
+    cache = LRUCache(ENHANCE_CACHE_SIZE, ENHANCE_CACHE_TTL)
+
+    metrics.register_gauge(f"enhance_cache.{namespace}.size", lambda: len(cache))
+    metrics.register_gauge(f"enhance_cache.{namespace}.evictions", lambda: cache.evictions)
+    metrics.register_gauge(
+        f"enhance_cache.{namespace}.expirations", lambda: cache.expirations
+    )
+    metrics.register_gauge(f"enhance_cache.{namespace}.hit_rate", lambda: _hit_rate(namespace))
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(question: str):
+            key = normalize_question(question)
+            if not key:
+                return await func(question)
+
+            result = cache.get(key)
+            if result is not None:
+                metrics.inc(f"enhance_cache.{namespace}.memory_hits")
+                return model(original_question=question, **result)
+
+            if ENHANCE_CACHE_DB:
+                result = await _load_from_db(namespace, key)
+                if result is not None:
+                    metrics.inc(f"enhance_cache.{namespace}.db_hits")
+                    cache.set(key, result)
+                    return model(original_question=question, **result)
+
+            metrics.inc(f"enhance_cache.{namespace}.misses")
+            enhanced = await func(question)
+
+            result = enhanced.model_dump(exclude={"original_question"})
+            cache.set(key, result)
+            if ENHANCE_CACHE_DB:
+                await _store_in_db(namespace, key, result)
+
+            return enhanced
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,68 @@
+import os
+from typing import List
+
+# classic:  enhance -> embed -> retrieve -> answer, one hop after another.
+# parallel: the raw question is embedded and its fragments retrieved while the
+#           enhancement call runs; the simplified question is only embedded
+#           (for the *_questions collection) alongside the answering call.
+# fused:    retrieval for the raw question, then one completion that validates,
+#           simplifies and answers at once; the simplified question is embedded
+#           behind the answer, only its Qdrant write waits for it.
+# Shortcuts taken before the answering call:
+#   classic:  enhancement cache, facts store, answer cache
+#   parallel: enhancement cache, facts store (retrieval already ran, the answer
+#             cache would save only the completion)
+#   fused:    none, every question costs the combined completion
+QUESTION_PIPELINE = os.getenv("QUESTION_PIPELINE", "classic").lower()
+PIPELINE_MODES = ("classic", "parallel", "fused")
+
+# Stand-in for the intent / required info fields of an answering prompt when
+# they are produced by the same completion.
+FROM_ANALYSIS = "See Step 1"
+
+
+def pipeline_mode() -> str:
+    if QUESTION_PIPELINE not in PIPELINE_MODES:
+        print(f"Unknown QUESTION_PIPELINE '{QUESTION_PIPELINE}', using classic")
+        return "classic"
+    return QUESTION_PIPELINE
+
+
+def fused_prompts(
+    enhance_system_prompt: str, answer_system_prompt: str, question: str
+) -> List[dict]:
+    """Composes a game's enhancement and answering prompts into a single completion."""
+    system_prompt = f"""
+You handle a player's question in two steps and return the result of both in a single JSON object.
+
+## Step 1: Question analysis
+{enhance_system_prompt}
+
+## Step 2: Answer
+Only if Step 1 found the question valid, answer the simplified question from Step 1.
+{answer_system_prompt}
+
+## Combined Output Format (Strict JSON, replaces the output formats of both steps):
+{{
+  "question": "Simplified question from Step 1",
+  "intent": "Intent from Step 1",
+  "required_info": "Required information from Step 1",
+  "valid": true,
+  "answer": true | false | null,
+  "explanation": "Informative factual statement from Step 2"
+}}
+-- OR if invalid --
+{{
+  "question": null,
+  "intent": null,
+  "required_info": null,
+  "valid": false,
+  "answer": null,
+  "explanation": "Clear reason why the question is invalid"
+}}
+"""
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"User's Question: {question}"},
+    ]
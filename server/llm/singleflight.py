@@ -0,0 +1,43 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls with the same key into one. The first caller starts
+    the work, callers arriving while it is in flight await the same result. The work
+    runs in its own task, so a caller disconnecting does not cancel it for the rest.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+        metrics.register_gauge(f"singleflight.{name}.in_flight", lambda: len(self._calls))
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Returns the result and whether it was shared from another caller's call."""
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if shared:
+            metrics.inc(f"singleflight.{self.name}.shared")
+        else:
+            metrics.inc(f"singleflight.{self.name}.calls")
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+        # Retrieve the exception so it is not reported when every caller is gone
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,80 @@
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Deque, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Number of most recent samples kept per timer for percentile estimates.
+TIMING_WINDOW = int(os.getenv("METRICS_TIMING_WINDOW", "2048"))
+
+# In-process counters. Each uvicorn worker keeps its own copy; they are
+# exposed to admins through GET /admin/metrics.
+_counters: Dict[str, int] = defaultdict(int)
+
+# Gauges are read lazily from their owner (cache sizes, hit rates, ...)
+_gauges: Dict[str, Callable[[], float]] = {}
+
+# Latency samples in seconds, newest last.
+_timings: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=TIMING_WINDOW))
+
+
+def inc(name: str, value: int = 1):
+    _counters[name] += value
+
+
+def get(name: str) -> int:
+    return _counters.get(name, 0)
+
+
+def register_gauge(name: str, read: Callable[[], float]):
+    _gauges[name] = read
+
+
+def observe(name: str, seconds: float):
+    _timings[name].append(seconds)
+
+
+@contextmanager
+def timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+async def timed(name: str, awaitable: Awaitable[T]) -> T:
+    with timer(name):
+        return await awaitable
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    index = min(len(samples) - 1, int(round(q * (len(samples) - 1))))
+    return samples[index]
+
+
+def timing_summary(name: str) -> dict:
+    samples = sorted(_timings.get(name, ()))
+    if not samples:
+        return {"count": 0, "p50_ms": None, "p99_ms": None}
+
+    return {
+        "count": len(samples),
+        "p50_ms": round(_percentile(samples, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 2),
+    }
+
+
+def snapshot() -> dict:
+    return {
+        "counters": dict(sorted(_counters.items())),
+        "gauges": {name: read() for name, read in sorted(_gauges.items())},
+        "timings": {name: timing_summary(name) for name in sorted(_timings)},
+    }
+
+
+def reset():
+    _counters.clear()
+    _timings.clear()
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_db
 from db.models import User
+from db.repositories.leaderboard import LEADERBOARD_SIZE, LeaderboardRepository
 from db.repositories.powiatdle import (
     PowiatRepository,
     PowiatdleDayRepository,
@@ -28,6 +29,7 @@ from schemas.powiatdle import (
 )
 from users.utils import get_current_or_guest_user, get_current_user, get_admin_user
 import powiatdle.utils as putils
+from utils.resolver import resolve_guess
 from game_logic import GameConfig, GameRules, GameState
 
 router = APIRouter(prefix="/powiatdle")
@@ -88,8 +90,8 @@ async def sync_guest_data(
         )
 
     for guess in sync_data.guesses:
-        is_correct = False
-        if guess.powiat_id:
+        is_correct = None
+        if guess.powiat_id is not None:
             is_correct = guess.powiat_id == day_powiat.powiat_id
             
         guess_create = PowiatGuessCreate(
@@ -101,6 +103,8 @@ async def sync_guest_data(
         )
         await PowiatdleGuessRepository(session).add_guess(guess_create)
 
+    # A game already recorded as over must not reach the leaderboard a second time
+    was_over = state.is_game_over
     state.remaining_questions = sync_data.state.remaining_questions
     state.remaining_guesses = sync_data.state.remaining_guesses
     state.questions_asked = sync_data.state.questions_asked
@@ -111,6 +115,9 @@ async def sync_guest_data(
     if state.won:
         state.points = await PowiatdleStateRepository(session).calc_points(state)
         
+    if state.is_game_over and not was_over:
+        await LeaderboardRepository(session).record_game("powiatdle", state)
+
     await PowiatdleStateRepository(session).update_state(state)
     
     return await get_state(user, session)
@@ -196,12 +203,54 @@ async def get_state(
     )
 
 
-from schemas.countrydle import LeaderboardEntry
+from schemas.countrydle import LeaderboardEntry, LeaderboardPage, LeaderboardPercentile
 
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
-async def get_leaderboard(type: str = "monthly", session: AsyncSession = Depends(get_db)):
-    return await PowiatdleStateRepository(session).get_leaderboard(type)
+async def get_leaderboard(
+    type: str = "monthly",
+    limit: int = LEADERBOARD_SIZE,
+    session: AsyncSession = Depends(get_db),
+):
+    return await PowiatdleStateRepository(session).get_leaderboard(type, limit)
+
+
+@router.get("/leaderboard/me", response_model=LeaderboardEntry | None)
+async def get_my_rank(
+    type: str = "monthly",
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await PowiatdleStateRepository(session).get_user_rank(user, type)
+
+
+@router.get("/leaderboard/page", response_model=LeaderboardPage)
+async def get_leaderboard_page(
+    type: str = "monthly",
+    limit: int = LEADERBOARD_SIZE,
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_page("powiatdle", type, limit, cursor)
+
+
+@router.get("/leaderboard/around-me", response_model=List[LeaderboardEntry])
+async def get_leaderboard_around_me(
+    type: str = "monthly",
+    neighbours: int = 5,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_around_user("powiatdle", user.id, type, neighbours)
+
+
+@router.get("/leaderboard/percentile", response_model=LeaderboardPercentile | None)
+async def get_leaderboard_percentile(
+    type: str = "monthly",
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_percentile("powiatdle", user.id, type)
 
 
 @router.get("/powiaty", response_model=List[PowiatDisplay])
@@ -230,7 +279,9 @@ async def ask_question(
     from qdrant.utils import add_question_to_qdrant
 
     if user is None:
-        enh_question = await putils.enhance_question(question.question)
+        enh_question, question_create, question_vector = await putils.process_question(
+            question.question, day_powiat, None
+        )
         if not enh_question.valid:
             question_create = PowiatQuestionCreate(
                 user_id=None,
@@ -248,13 +299,6 @@ async def ask_question(
             )
             return new_quest
 
-        question_create, question_vector = await putils.ask_question(
-            enh_question,
-            day_powiat,
-            None,
-            session,
-        )
-
         new_quest = await PowiatdleQuestionRepository(session).create_question(
             question_create
         )
@@ -280,7 +324,9 @@ async def ask_question(
             detail="No more questions left or game over!",
         )
 
-    enh_question = await putils.enhance_question(question.question)
+    enh_question, question_create, question_vector = await putils.process_question(
+        question.question, day_powiat, user
+    )
     if not enh_question.valid:
         question_create = PowiatQuestionCreate(
             user_id=user.id,
@@ -306,13 +352,6 @@ async def ask_question(
 
         return new_quest
 
-    question_create, question_vector = await putils.ask_question(
-        enh_question,
-        day_powiat,
-        user,
-        session,
-    )
-
     new_quest = await PowiatdleQuestionRepository(session).create_question(
         question_create
     )
@@ -365,10 +404,14 @@ async def make_guess(
     session: AsyncSession = Depends(get_db),
 ):
     day_powiat = await PowiatdleDayRepository(session).get_today_powiat()
+
+    # Free-text guesses name the target instead of picking it
+    if guess.powiat_id is None and guess.guess:
+        guess.powiat_id = await resolve_guess("powiatdle", guess.guess, session)
     
     if user is None:
-        is_correct = False
-        if guess.powiat_id:
+        is_correct = None
+        if guess.powiat_id is not None:
             is_correct = guess.powiat_id == day_powiat.powiat_id
             
         from datetime import datetime
@@ -389,8 +432,8 @@ async def make_guess(
             detail="No more guesses left or game over!",
         )
 
-    is_correct = False
-    if guess.powiat_id:
+    is_correct = None
+    if guess.powiat_id is not None:
         is_correct = guess.powiat_id == day_powiat.powiat_id
 
     guess_create = PowiatGuessCreate(
@@ -404,7 +447,7 @@ async def make_guess(
     new_guess = await PowiatdleGuessRepository(session).add_guess(guess_create)
 
     # Update state
-    new_game_state = game_rules.process_guess(current_game_state, is_correct)
+    new_game_state = game_rules.process_guess(current_game_state, is_correct is True)
     state.remaining_guesses = POWIATDLE_CONFIG.max_guesses - new_game_state.guesses_used
     state.guesses_made += 1
     state.won = new_game_state.is_won
@@ -413,6 +456,9 @@ async def make_guess(
     if state.won:
         state.points = await PowiatdleStateRepository(session).calc_points(state)
 
+    if state.is_game_over:
+        await LeaderboardRepository(session).record_game("powiatdle", state)
+
     await PowiatdleStateRepository(session).update_state(state)
 
     return new_guess
@@ -1,19 +1,26 @@
-import os
-import json
-from typing import List, Tuple
-from openai import OpenAI
+import asyncio
+from typing import Awaitable, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db import AsyncSessionLocal
 from db.models import Powiat, PowiatdleDay, User
-from qdrant.utils import get_fragments_matching_question
+from qdrant.utils import find_cached_answer, get_fragments_matching_question
+from qdrant.vectorize import get_embedding
 import qdrant
+import facts
+import llm
+import metrics
+from llm.cache import cached_enhancement, normalize_question
+from llm.pipeline import FROM_ANALYSIS, fused_prompts, pipeline_mode
+from llm.singleflight import SingleFlight
 from schemas.powiatdle import PowiatQuestionCreate, PowiatQuestionEnhanced
 from db.repositories.powiatdle import PowiatRepository
 
+question_flight = SingleFlight("powiatdle")
 
-async def enhance_question(question: str) -> PowiatQuestionEnhanced:
-    system_prompt = """
+
+ENHANCE_SYSTEM_PROMPT = """
 Jesteś ekspertem ds. analizy pytań w grze w zgadywanie polskich powiatów. Twoim celem jest przetworzenie pytań użytkowników na ustrukturyzowany format, który ułatwia dokładne wyszukiwanie informacji.
 
 ### Twoje główne obowiązki:
@@ -63,31 +70,22 @@ User: "Powiedz mi coś o nim."
 Output: {"question": null, "intent": null, "required_info": null, "valid": false, "explanation": "To jest prośba otwarta, a nie pytanie Tak/Nie."}
 """
 
+
+@cached_enhancement("powiatdle", PowiatQuestionEnhanced)
+async def enhance_question(question: str) -> PowiatQuestionEnhanced:
     question_prompt = f"""User's Question: {question}"""
 
     prompts = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": ENHANCE_SYSTEM_PROMPT},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    answer_dict: dict = await llm.chat_json(prompts)
+
+    return parse_enhanced(question, answer_dict)
 
-    answer = response.choices[0].message.content
 
-    try:
-        answer_dict: dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
 
+def parse_enhanced(question: str, answer_dict: dict) -> PowiatQuestionEnhanced:
     return PowiatQuestionEnhanced(
         original_question=question,
         valid=answer_dict["valid"],
@@ -98,26 +96,15 @@ Output: {"question": null, "intent": null, "required_info": null, "valid": false
     )
 
 
-
-async def ask_question(
-    question: PowiatQuestionEnhanced,
-    day_powiat: PowiatdleDay,
-    user: User | None,
-    session: AsyncSession,
-) -> Tuple[PowiatQuestionCreate, List[float]]:
-
-    fragments, question_vector = await get_fragments_matching_question(
-        question.question, "powiat_id", day_powiat.powiat_id, "powiaty", session, limit=qdrant.POWIATDLE_CONTEXT_LIMIT
-    )
-    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
-    powiat: Powiat = await PowiatRepository(session).get(day_powiat.powiat_id)
-
-    system_prompt = f"""
+def answer_system_prompt(
+    powiat: Powiat, context: str, intent: str | None, required_info: str | None
+) -> str:
+    return f"""
 Jesteś 'Mistrzem Gry' w Powiatdle. Twoim zadaniem jest odpowiedzieć na pytanie Tak/Nie dotyczące konkretnego polskiego powiatu na podstawie dostarczonego kontekstu i Twojej wiedzy ogólnej.
 
 ### Docelowy powiat: {powiat.nazwa}
-### Intencja pytania: {question.intent}
-### Wymagane informacje: {question.required_info}
+### Intencja pytania: {intent}
+### Wymagane informacje: {required_info}
 
 ### Fragmenty kontekstu:
 {context}
@@ -140,32 +127,77 @@ Jesteś 'Mistrzem Gry' w Powiatdle. Twoim zadaniem jest odpowiedzieć na pytanie
 """
 
 
+def answer_prompts(
+    powiat: Powiat, question: PowiatQuestionEnhanced, context: str
+) -> List[dict]:
+    system_prompt = answer_system_prompt(
+        powiat, context, question.intent, question.required_info
+    )
+
+
     question_prompt = f"""Oryginalne pytanie użytkownika: {question.original_question}
 Uproszczone pytanie: {question.question}"""
 
-
     prompts = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    return prompts
 
-    answer = response.choices[0].message.content
 
-    try:
-        answer_dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
+async def ask_question(
+    question: PowiatQuestionEnhanced,
+    day_powiat: PowiatdleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[PowiatQuestionCreate, List[float] | None]:
+
+    powiat: Powiat = await PowiatRepository(session).get(day_powiat.powiat_id)
+    known = facts.evaluate("powiatdle", powiat.nazwa, question)
+    if known is not None:
+        question_create = _answered_question(
+            question, known.as_answer(), known.context, day_powiat, user
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.powiatdle.classic.embed"):
+        question_vector = await get_embedding(question.question, qdrant.EMBEDDING_MODEL)
+
+    with metrics.timer("pipeline.powiatdle.classic.answer_cache"):
+        cached = await find_cached_answer(
+            question_vector,
+            "powiat_id",
+            day_powiat.powiat_id,
+            "powiaty_questions",
+        )
+    if cached:
+        question_create = PowiatQuestionCreate(
+            user_id=user.id if user else None,
+            day_id=day_powiat.id,
+            original_question=question.original_question,
+            valid=question.valid,
+            question=question.question,
+            answer=cached.answer,
+            explanation=cached.explanation,
+            context=cached.context,
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.powiatdle.classic.retrieve"):
+        fragments, question_vector = await get_fragments_matching_question(
+            question.question,
+            "powiat_id",
+            day_powiat.powiat_id,
+            "powiaty",
+            session,
+            limit=qdrant.POWIATDLE_CONTEXT_LIMIT,
+            query_vector=question_vector,
+        )
+    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
+
+    prompts = answer_prompts(powiat, question, context)
+    with metrics.timer("pipeline.powiatdle.classic.answer"):
+        answer_dict = await llm.chat_json(prompts)
 
     question_create = PowiatQuestionCreate(
         user_id=user.id if user else None,
@@ -179,3 +211,179 @@ Uproszczone pytanie: {question.question}"""
     )
 
     return question_create, question_vector
+
+
+async def process_question(
+    question: str,
+    day_powiat: PowiatdleDay,
+    user: User | None,
+) -> Tuple[PowiatQuestionEnhanced, PowiatQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    """
+    Validates and answers a player's question in the configured QUESTION_PIPELINE mode.
+    The answer is None for invalid questions; the vector is None when nothing should
+    be added to the powiaty_questions collection, and still computing (awaitable) in fused mode.
+
+    Identical questions about the same target that arrive while one is being answered
+    share its result; each caller still gets its own copy to store as its row.
+    """
+    key = (day_powiat.powiat_id, normalize_question(question))
+    (enhanced, question_create, question_vector), shared = await question_flight.do(
+        key, lambda: _process_question_in_session(question, day_powiat, user)
+    )
+
+    if shared:
+        enhanced = enhanced.model_copy(update={"original_question": question})
+        if question_create is not None:
+            question_create = question_create.model_copy(
+                update={
+                    "user_id": user.id if user else None,
+                    "original_question": question,
+                }
+            )
+        # The first caller adds the question to the collection
+        question_vector = None
+
+    return enhanced, question_create, question_vector
+
+
+async def _process_question_in_session(
+    question: str, day_powiat: PowiatdleDay, user: User | None
+) -> Tuple[PowiatQuestionEnhanced, PowiatQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    # Not the caller's session: the shared call can outlive the request that started it
+    async with AsyncSessionLocal() as session:
+        return await _process_question(question, day_powiat, user, session)
+
+
+async def _process_question(
+    question: str,
+    day_powiat: PowiatdleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[PowiatQuestionEnhanced, PowiatQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    mode = pipeline_mode()
+    with metrics.timer(f"pipeline.powiatdle.{mode}.total"):
+        if mode == "parallel":
+            return await _process_parallel(question, day_powiat, user, session)
+        if mode == "fused":
+            return await _process_fused(question, day_powiat, user, session)
+
+        with metrics.timer("pipeline.powiatdle.classic.enhance"):
+            enhanced = await enhance_question(question)
+        if not enhanced.valid:
+            return enhanced, None, None
+
+        question_create, question_vector = await ask_question(
+            question=enhanced, day_powiat=day_powiat, user=user, session=session
+        )
+        return enhanced, question_create, question_vector
+
+
+async def _raw_question_context(
+    question: str, day_powiat: PowiatdleDay, session: AsyncSession, mode: str
+) -> str:
+    raw_vector = await metrics.timed(
+        f"pipeline.powiatdle.{mode}.embed",
+        get_embedding(question, qdrant.EMBEDDING_MODEL),
+    )
+
+    with metrics.timer(f"pipeline.powiatdle.{mode}.retrieve"):
+        fragments, _ = await get_fragments_matching_question(
+            question,
+            "powiat_id",
+            day_powiat.powiat_id,
+            "powiaty",
+            session,
+            limit=qdrant.POWIATDLE_CONTEXT_LIMIT,
+            query_vector=raw_vector,
+        )
+    return "\n[ ... ]\n".join(fragment.text for fragment in fragments)
+
+
+def _answered_question(
+    enhanced: PowiatQuestionEnhanced,
+    answer_dict: dict,
+    context: str,
+    day_powiat: PowiatdleDay,
+    user: User | None,
+) -> PowiatQuestionCreate:
+    return PowiatQuestionCreate(
+        user_id=user.id if user else None,
+        day_id=day_powiat.id,
+        original_question=enhanced.original_question,
+        valid=enhanced.valid,
+        question=enhanced.question,
+        answer=answer_dict.get("answer"),
+        explanation=answer_dict.get("explanation") or "No explanation provided.",
+        context=context,
+    )
+
+
+async def _process_parallel(
+    question: str,
+    day_powiat: PowiatdleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[PowiatQuestionEnhanced, PowiatQuestionCreate | None, List[float] | None]:
+    # Retrieval uses the raw question so it does not wait for the rewrite
+    enhanced, context = await asyncio.gather(
+        metrics.timed("pipeline.powiatdle.parallel.enhance", enhance_question(question)),
+        _raw_question_context(question, day_powiat, session, "parallel"),
+    )
+    if not enhanced.valid:
+        return enhanced, None, None
+
+    powiat: Powiat = await PowiatRepository(session).get(day_powiat.powiat_id)
+    known = facts.evaluate("powiatdle", powiat.nazwa, enhanced)
+    if known is not None:
+        question_create = _answered_question(
+            enhanced, known.as_answer(), known.context, day_powiat, user
+        )
+        return enhanced, question_create, None
+
+    answer_dict, question_vector = await asyncio.gather(
+        metrics.timed(
+            "pipeline.powiatdle.parallel.answer",
+            llm.chat_json(answer_prompts(powiat, enhanced, context)),
+        ),
+        metrics.timed(
+            "pipeline.powiatdle.parallel.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        ),
+    )
+
+    question_create = _answered_question(enhanced, answer_dict, context, day_powiat, user)
+    return enhanced, question_create, question_vector
+
+
+async def _process_fused(
+    question: str,
+    day_powiat: PowiatdleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[PowiatQuestionEnhanced, PowiatQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    context = await _raw_question_context(question, day_powiat, session, "fused")
+    powiat: Powiat = await PowiatRepository(session).get(day_powiat.powiat_id)
+
+    prompts = fused_prompts(
+        ENHANCE_SYSTEM_PROMPT,
+        answer_system_prompt(powiat, context, FROM_ANALYSIS, FROM_ANALYSIS),
+        question,
+    )
+    answer_dict = await metrics.timed(
+        "pipeline.powiatdle.fused.answer", llm.chat_json(prompts)
+    )
+
+    enhanced = parse_enhanced(question, answer_dict)
+    if not enhanced.valid:
+        return enhanced, None, None
+
+    # Only the question's Qdrant point needs the vector, the answer does not wait for it
+    question_vector = asyncio.ensure_future(
+        metrics.timed(
+            "question_point.powiatdle.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        )
+    )
+
+    question_create = _answered_question(enhanced, answer_dict, context, day_powiat, user)
+    return enhanced, question_create, question_vector
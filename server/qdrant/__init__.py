@@ -5,6 +5,7 @@ from typing import List
 
 from db.models import Country
 from db.models.fragment import (
+    EMBEDDING_SIZE,
     CountryFragment,
     PowiatFragment,
     WojewodztwoFragment,
@@ -12,26 +13,51 @@ from db.models.fragment import (
 )
 from db.repositories.country import CountryRepository
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.exceptions import ResponseHandlingException
-from qdrant_client.models import Distance, PointStruct, VectorParams, IntegerIndexParams
+from qdrant_client.models import (
+    Distance,
+    IntegerIndexParams,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
+from .snapshots import QDRANT_BOOTSTRAP, is_empty, restore_latest
+from .sync import SyncResult, sync_collection
 from .utils import get_points, upsert_in_batches
 
 load_dotenv()
 
-EMBEDDING_SIZE = int(os.getenv("EMBEDDING_SIZE", "1536"))
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 
+# none | int8: int8 copies of the vectors are searched in RAM, the float32
+# originals stay on disk and rescore the best QDRANT_OVERSAMPLING * limit candidates
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
 COUNTRYDLE_CONTEXT_LIMIT = int(os.getenv("COUNTRYDLE_CONTEXT_LIMIT", "1"))
 POWIATDLE_CONTEXT_LIMIT = int(os.getenv("POWIATDLE_CONTEXT_LIMIT", "1"))
 US_STATEDLE_CONTEXT_LIMIT = int(os.getenv("US_STATEDLE_CONTEXT_LIMIT", "1"))
 WOJEWODZTWDLE_CONTEXT_LIMIT = int(os.getenv("WOJEWODZTWDLE_CONTEXT_LIMIT", "1"))
 
+# Where cold targets' fragments are searched: qdrant | pgvector (the fragment tables)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "qdrant").lower()
+
+# Semantic answer cache over the *_questions collections
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+
 
 # Collection names
 COLLECTIONS = {
@@ -45,74 +71,114 @@ COLLECTIONS = {
     "us_states_questions": "us_states_questions",
 }
 
+# Target id payload key of each fragment collection
+FRAGMENT_KEYS = {
+    "countries": "country_id",
+    "powiaty": "powiat_id",
+    "wojewodztwa": "wojewodztwo_id",
+    "us_states": "us_state_id",
+}
+
+# The blocking client is for startup and the scripts, request handlers use async_client
 client: QdrantClient = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+async_client: AsyncQdrantClient = AsyncQdrantClient(
+    host=QDRANT_HOST,
+    port=QDRANT_PORT,
+    grpc_port=QDRANT_GRPC_PORT,
+    prefer_grpc=QDRANT_PREFER_GRPC,
+)
 
 
-async def sync_from_postgres(session: AsyncSession, collection_name: str):
-    """Syncs data from Postgres to Qdrant if counts differ."""
-    model = None
-    if collection_name == "countries":
-        model = CountryFragment
-    elif collection_name == "powiaty":
-        model = PowiatFragment
-    elif collection_name == "wojewodztwa":
-        model = WojewodztwoFragment
-    elif collection_name == "us_states":
-        model = USStateFragment
+def vectors_config(size: int = EMBEDDING_SIZE) -> VectorParams:
+    return VectorParams(
+        size=size, distance=Distance.COSINE, on_disk=QDRANT_QUANTIZATION == "int8"
+    )
 
-    if not model:
-        return
 
-    try:
-        # Get Postgres count
-        res = await session.execute(select(func.count(model.id)))
-        pg_count = res.scalar() or 0
+def quantization_config() -> ScalarQuantization | None:
+    if QDRANT_QUANTIZATION != "int8":
+        return None
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+    )
 
-        # Get Qdrant count
-        info = client.get_collection(collection_name)
-        qdrant_count = info.points_count or 0
 
-        if pg_count == qdrant_count:
-            print(f"Collection {collection_name} is up to date ({pg_count} points).")
-            return
+def search_params() -> SearchParams | None:
+    if QDRANT_QUANTIZATION != "int8":
+        return None
+    return SearchParams(
+        quantization=QuantizationSearchParams(rescore=True, oversampling=QDRANT_OVERSAMPLING)
+    )
 
-        print(
-            f"Collection {collection_name} count mismatch (PG: {pg_count}, Qdrant: {qdrant_count}). Syncing..."
-        )
+
+async def sync_from_postgres(
+    session: AsyncSession, collection_name: str, dry_run: bool = False
+) -> SyncResult | None:
+    """Upserts the fragments changed since the last sync and deletes removed ones."""
+    if collection_name not in FRAGMENT_KEYS:
+        return None
+
+    try:
+        result = await sync_collection(session, async_client, collection_name, dry_run)
     except Exception as e:
-        print(f"Error checking counts for {collection_name}: {e}")
-        return
-
-    # Sync in batches to avoid memory issues and connection resets
-    batch_size = 100
-    for offset in range(0, pg_count, batch_size):
-        print(f"Fetching fragments {offset} to {offset + batch_size} from Postgres for collection '{collection_name}'...")
-        points = []
-        
-        stmt = select(model).order_by(model.id).offset(offset).limit(batch_size)
-        res = await session.execute(stmt)
-        fragments = res.scalars().all()
-        
-        for f in fragments:
-            payload = {"fragment_text": f.text}
-            if collection_name == "countries": payload["country_id"] = f.country_id
-            elif collection_name == "powiaty": payload["powiat_id"] = f.powiat_id
-            elif collection_name == "wojewodztwa": payload["wojewodztwo_id"] = f.wojewodztwo_id
-            elif collection_name == "us_states": payload["us_state_id"] = f.us_state_id
-            
-            points.append(PointStruct(
-                id=int(f.id), 
-                vector=list(f.embedding), 
-                payload=payload
-            ))
-
-        if points:
-            upsert_in_batches(client, collection_name, points, batch_size=batch_size)
-            
-        # Clear the session cache to prevent memory leaks
-        session.expunge_all()
-    
-    print(f"Successfully finished syncing collection {collection_name}")
+        print(f"Error syncing collection {collection_name}: {e}")
+        return None
+
+    print(f"{'Would sync' if dry_run else 'Synced'} {result}")
+    return result
+
+
+def create_collection(name: str):
+    """Creates a collection in the configured storage profile, with its payload index."""
+    print(f"Creating collection '{name}'...")
+    client.create_collection(
+        collection_name=name,
+        vectors_config=vectors_config(),
+        quantization_config=quantization_config(),
+    )
+
+    # Add payload indexes
+    field_name = ""
+    if name.endswith("_questions"):
+        if name.startswith("countries"):
+            field_name = "country_id"
+        elif name.startswith("powiaty"):
+            field_name = "powiat_id"
+        elif name.startswith("wojewodztwa"):
+            field_name = "wojewodztwo_id"
+        elif name.startswith("us_states"):
+            field_name = "us_state_id"
+
+        if field_name:
+            print(
+                f"Creating payload index for '{field_name}' in collection '{name}'..."
+            )
+            client.create_payload_index(
+                collection_name=name,
+                field_name=field_name,
+                field_schema="integer",
+            )
+    else:
+        if name == "countries":
+            field_name = "country_id"
+        elif name == "powiaty":
+            field_name = "powiat_id"
+        elif name == "wojewodztwa":
+            field_name = "wojewodztwo_id"
+        elif name == "us_states":
+            field_name = "us_state_id"
+
+        if field_name:
+            print(
+                f"Creating payload index for '{field_name}' in collection '{name}'..."
+            )
+            client.create_payload_index(
+                collection_name=name,
+                field_name=field_name,
+                field_schema=IntegerIndexParams(
+                    type="integer", is_principal=True, lookup=True, range=False
+                ),
+            )
 
 
 async def init_qdrant(session: AsyncSession):
@@ -134,70 +200,41 @@ async def init_qdrant(session: AsyncSession):
                 print(f"Failed to connect to Qdrant after {max_retries} attempts. Exiting.")
                 raise e
 
+    # A fresh node restores its empty collections from the newest local snapshots;
+    # Postgres then only streams the fragments that changed since (or all, without one)
+    bootstrapped = []
+    if QDRANT_BOOTSTRAP:
+        for name in COLLECTIONS.values():
+            if await is_empty(name):
+                bootstrapped.append(name)
+                await restore_latest(name)
+
     for name in COLLECTIONS.values():
         print("Checking collection:", name)
         if not client.collection_exists(name):
-            print(f"Creating collection '{name}'...")
-            client.create_collection(
-                collection_name=name,
-                vectors_config=VectorParams(
-                    size=EMBEDDING_SIZE, distance=Distance.COSINE
-                ),
-            )
-
-            # Add payload indexes
-            field_name = ""
-            if name.endswith("_questions"):
-                if name.startswith("countries"):
-                    field_name = "country_id"
-                elif name.startswith("powiaty"):
-                    field_name = "powiat_id"
-                elif name.startswith("wojewodztwa"):
-                    field_name = "wojewodztwo_id"
-                elif name.startswith("us_states"):
-                    field_name = "us_state_id"
-
-                if field_name:
-                    print(
-                        f"Creating payload index for '{field_name}' in collection '{name}'..."
-                    )
-                    client.create_payload_index(
-                        collection_name=name,
-                        field_name=field_name,
-                        field_schema="integer",
-                    )
-            else:
-                if name == "countries":
-                    field_name = "country_id"
-                elif name == "powiaty":
-                    field_name = "powiat_id"
-                elif name == "wojewodztwa":
-                    field_name = "wojewodztwo_id"
-                elif name == "us_states":
-                    field_name = "us_state_id"
-
-                if field_name:
-                    print(
-                        f"Creating payload index for '{field_name}' in collection '{name}'..."
-                    )
-                    client.create_payload_index(
-                        collection_name=name,
-                        field_name=field_name,
-                        field_schema=IntegerIndexParams(
-                            type="integer", is_principal=True, lookup=True, range=False
-                        ),
-                    )
+            create_collection(name)
+        else:
+            size = client.get_collection(name).config.params.vectors.size
+            if size != EMBEDDING_SIZE:
+                print(
+                    f"Collection '{name}' stores {size}-dimensional vectors, EMBEDDING_SIZE is "
+                    f"{EMBEDDING_SIZE}: run scripts/migrate_embeddings.py"
+                )
 
         # Sync data if needed (only for main fragment collections)
         # if name in ["countries", "powiaty", "wojewodztwa", "us_states"]:
         #     await sync_from_postgres(session, name)
 
 
+    for name in bootstrapped:
+        await sync_from_postgres(session, name)
+
     if not client.collection_exists("questions"):
         print("Creating collection 'questions'...")
         client.create_collection(
             collection_name="questions",
-            vectors_config=VectorParams(size=EMBEDDING_SIZE, distance=Distance.COSINE),
+            vectors_config=vectors_config(),
+            quantization_config=quantization_config(),
         )
 
 
@@ -205,7 +242,9 @@ def get_qdrant_client():
     return client
 
 
-def close_qdrant_client():
-    global client
+async def close_qdrant_client():
+    global client, async_client
     if client:
         client.close()
+    if async_client:
+        await async_client.close()
@@ -0,0 +1,185 @@
+import asyncio
+import csv
+import logging
+import os
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from qdrant_client.models import PointStruct
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import qdrant
+from db import AsyncSessionLocal
+from .utils import fragment_payload, split_document, upsert_in_batches, window_texts
+from .vectorize import get_bulk_embedding
+
+# Entities whose fragments are embedded and committed together; a group is the
+# unit of resumption, a rerun skips every entity that already has fragments
+INGEST_GROUP_SIZE = int(os.getenv("INGEST_GROUP_SIZE", "16"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+INGEST_READERS = int(os.getenv("INGEST_READERS", "8"))
+
+
+@dataclass
+class Corpus:
+    name: str
+    csv_file: str
+    entity_model: Any
+    name_column: str
+    new_entity: Callable[[str, str], Any]  # (name, md_file) -> entity
+    fragment_model: Any
+    filter_key: str
+    collection_name: str | None = None  # Also upserted into Qdrant when set
+    payload_name: str | None = None  # Payload key of the entity's name in the points
+
+
+@dataclass
+class Document:
+    entity_id: int
+    name: str
+    texts: List[str]
+
+
+def find_data_dir() -> str:
+    # Either inside the server directory or its sibling (for host machine execution)
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = os.path.join(base_dir, "data")
+    if not os.path.exists(data_dir):
+        data_dir = os.path.join(os.path.dirname(base_dir), "data")
+    return data_dir
+
+
+def read_rows(csv_path: str) -> List[dict]:
+    with open(csv_path, "r", encoding="utf8") as f:
+        return [row for row in csv.DictReader(f) if row.get("name") and row.get("md_file")]
+
+
+def read_fragments(md_path: str) -> List[str] | None:
+    try:
+        with open(md_path, encoding="utf8") as md_file:
+            content = md_file.read()
+    except FileNotFoundError:
+        return None
+    return [fragment.page_content for fragment in split_document(content)]
+
+
+async def resolve_entities(session: AsyncSession, corpus: Corpus, rows: List[dict]) -> Dict[str, int]:
+    """Ids of the rows' entities by name, creating the missing ones in one commit."""
+    name_column = getattr(corpus.entity_model, corpus.name_column)
+    result = await session.execute(select(name_column, corpus.entity_model.id))
+    ids = dict(result.all())
+
+    missing = {row["name"]: row["md_file"] for row in rows if row["name"] not in ids}
+    if missing:
+        entities = [corpus.new_entity(name, md_file) for name, md_file in missing.items()]
+        session.add_all(entities)
+        await session.commit()
+        ids.update((getattr(entity, corpus.name_column), entity.id) for entity in entities)
+    return ids
+
+
+async def ingested_entities(session: AsyncSession, corpus: Corpus) -> set:
+    key = getattr(corpus.fragment_model, corpus.filter_key)
+    result = await session.execute(select(key).distinct())
+    return set(result.scalars())
+
+
+async def store_group(corpus: Corpus, documents: List[Document]):
+    """Embeds a group's fragments in packed requests and inserts them in one transaction."""
+    texts = [text for document in documents for text in document.texts]
+    embeddings = iter(await get_bulk_embedding(texts, qdrant.EMBEDDING_MODEL))
+
+    rows = []
+    for document in documents:
+        windows = window_texts(document.texts)
+        for ordinal, text in enumerate(document.texts):
+            rows.append(
+                {
+                    corpus.filter_key: document.entity_id,
+                    "text": text,
+                    "doc_ordinal": ordinal,
+                    "window_text": windows[ordinal],
+                    "embedding": next(embeddings),
+                }
+            )
+
+    model = corpus.fragment_model
+    async with AsyncSessionLocal() as session:
+        # One executemany for the whole group instead of an ORM flush per fragment
+        result = await session.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows
+        )
+        ids = result.scalars().all()
+        await session.commit()
+
+    if corpus.collection_name:
+        names = {document.entity_id: document.name for document in documents}
+        points = []
+        for fragment_id, row in zip(ids, rows):
+            fragment = SimpleNamespace(**row)
+            payload = fragment_payload(corpus.filter_key, row[corpus.filter_key], fragment)
+            if corpus.payload_name:
+                payload[corpus.payload_name] = names[row[corpus.filter_key]]
+            points.append(PointStruct(id=fragment_id, vector=row["embedding"], payload=payload))
+        await upsert_in_batches(qdrant.async_client, corpus.collection_name, points, batch_size=50)
+
+
+async def ingest(session: AsyncSession, corpus: Corpus):
+    """
+    Reads, splits, embeds and stores every entity of the corpus that has no fragments
+    yet. Markdown files are read and split in threads while other groups embed, up to
+    INGEST_CONCURRENCY groups are embedded and inserted at a time, and each group
+    commits on its own, so an interrupted run resumes with the uncommitted entities.
+    """
+    data_dir = find_data_dir()
+    csv_path = os.path.join(data_dir, corpus.csv_file)
+    if not os.path.exists(csv_path):
+        logging.error(f"{csv_path} not found!")
+        return
+
+    rows = read_rows(csv_path)
+    print(f"Found {len(rows)} {corpus.name} to process.")
+    ids = await resolve_entities(session, corpus, rows)
+    done = await ingested_entities(session, corpus)
+    # Listed twice, an entity is still ingested once
+    pending = list({ids[row["name"]]: row for row in rows if ids[row["name"]] not in done}.values())
+    if len(pending) < len(rows):
+        print(f"Skipping {len(rows) - len(pending)} {corpus.name} that already have fragments.")
+
+    readers = asyncio.Semaphore(INGEST_READERS)
+    groups = asyncio.Semaphore(INGEST_CONCURRENCY)
+    finished = 0
+
+    async def read(row: dict) -> Document | None:
+        md_path = os.path.join(os.path.dirname(data_dir), row["md_file"].replace("\\", "/"))
+        async with readers:
+            texts = await asyncio.to_thread(read_fragments, md_path)
+        if texts is None:
+            logging.warning(f"Markdown file not found for {row['name']}: {md_path}")
+            return None
+        return Document(ids[row["name"]], row["name"], texts)
+
+    async def process(group_rows: List[dict]):
+        nonlocal finished
+        # Read ahead of the groups waiting for an embedding slot
+        documents = [
+            document
+            for document in await asyncio.gather(*(read(row) for row in group_rows))
+            if document is not None and document.texts
+        ]
+        async with groups:
+            if documents:
+                await store_group(corpus, documents)
+        finished += len(group_rows)
+        print(f"Populating {corpus.name}: {finished}/{len(pending)}")
+
+    await asyncio.gather(
+        *(
+            process(pending[start : start + INGEST_GROUP_SIZE])
+            for start in range(0, len(pending), INGEST_GROUP_SIZE)
+        )
+    )
+
+    print(f"Finished populating {corpus.name}.")
@@ -0,0 +1,237 @@
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import metrics
+from facts.names import fold, stem
+from qdrant.local_index import INDEXED_COLLECTIONS, IndexedCollection
+
+HYBRID_ENABLED = os.getenv("HYBRID_ENABLED", "true").lower() == "true"
+LEXICAL_INDEX_DIR = Path(
+    os.getenv(
+        "LEXICAL_INDEX_DIR",
+        Path(__file__).resolve().parent.parent / "data" / "lexical",
+    )
+)
+# Dense candidates per requested fragment that the lexical ranking may reorder
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "4"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Question words every fragment or question has, after folding
+STOPWORDS = {
+    "and", "are", "does", "for", "from", "has", "have", "its", "the", "this", "was", "with",
+    "czy", "jest", "nie", "oraz", "sie", "jak", "ten", "tym", "lub", "przez",
+}
+
+ARRAYS = ("targets", "ordinals", "lengths", "indptr", "terms", "counts")
+# Fragment count and highest id the saved index was built from
+SOURCE_FILE = "source.json"
+
+
+def tokenize(text: str) -> List[str]:
+    """Stemmed ASCII words, so 'Wisły' meets 'Wisła' and 'rzeki' meets 'rzeka'."""
+    return [stem(word) for word in fold(text).split() if len(word) > 2 and word not in STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = RRF_K) -> List[int]:
+    """Merges rankings best first: every list adds 1 / (k + rank) to an item's score."""
+    scores: Dict[int, float] = Counter()
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] += 1.0 / (k + rank)
+    return sorted(scores, key=lambda item: -scores[item])
+
+
+class LexicalIndex:
+    """
+    BM25 over a collection's fragments, partitioned by target: rows are sorted by
+    (target, doc_ordinal) and term frequencies stored as CSR arrays, so a search
+    only touches the rows of one target and statistics are per target document.
+    """
+
+    def __init__(self, vocabulary: List[str], **arrays: np.ndarray):
+        self.vocabulary = {term: term_id for term_id, term in enumerate(vocabulary)}
+        self._terms_list = vocabulary
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, int, str]]) -> "LexicalIndex":
+        """Indexes (target_id, doc_ordinal, text) rows."""
+        vocabulary: Dict[str, int] = {}
+        targets, ordinals, lengths, indptr, terms, counts = [], [], [], [0], [], []
+
+        for target_id, ordinal, text in sorted(rows, key=lambda row: (row[0], row[1])):
+            tokens = Counter(tokenize(text))
+            targets.append(target_id)
+            ordinals.append(ordinal)
+            lengths.append(sum(tokens.values()))
+            for token, count in sorted(tokens.items()):
+                terms.append(vocabulary.setdefault(token, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(terms))
+
+        return cls(
+            list(vocabulary),
+            targets=np.asarray(targets, dtype=np.int32),
+            ordinals=np.asarray(ordinals, dtype=np.int32),
+            lengths=np.asarray(lengths, dtype=np.int32),
+            indptr=np.asarray(indptr, dtype=np.int64),
+            terms=np.asarray(terms, dtype=np.int32),
+            counts=np.asarray(counts, dtype=np.uint16),
+        )
+
+    def save(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(path / f"{name}.npy", getattr(self, name))
+        (path / "vocabulary.json").write_text(
+            json.dumps(self._terms_list, ensure_ascii=False), encoding="utf8"
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        """Maps the arrays from disk, pages are only read for the targets searched."""
+        vocabulary = json.loads((path / "vocabulary.json").read_text(encoding="utf8"))
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+        return cls(vocabulary, **arrays)
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def search(self, target_id: int, query: str, limit: int | None = None) -> List[int]:
+        """The doc_ordinals of the target's fragments sharing a term with the query, best first."""
+        start, end = np.searchsorted(self.targets, [target_id, target_id + 1])
+        query_terms = sorted(
+            {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+        )
+        if start == end or not query_terms:
+            return []
+
+        rows = end - start
+        lengths = np.asarray(self.lengths[start:end], dtype=np.float32)
+        row_sizes = np.diff(self.indptr[start : end + 1])
+        entries = slice(self.indptr[start], self.indptr[end])
+        terms = np.asarray(self.terms[entries])
+        counts = np.asarray(self.counts[entries], dtype=np.float32)
+        row_of_entry = np.repeat(np.arange(rows), row_sizes)
+
+        query_terms = np.asarray(query_terms, dtype=np.int32)
+        matching = np.isin(terms, query_terms)
+        if not matching.any():
+            return []
+
+        term_slot = np.searchsorted(query_terms, terms[matching])
+        document_frequency = np.bincount(term_slot, minlength=len(query_terms))
+        idf = np.log1p((rows - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        row = row_of_entry[matching]
+        count = counts[matching]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[row] / max(lengths.mean(), 1.0))
+        weights = idf[term_slot] * count * (BM25_K1 + 1) / (count + norm)
+        scores = np.bincount(row, weights=weights, minlength=rows)
+
+        ranked = [int(i) for i in np.argsort(-scores, kind="stable") if scores[i] > 0]
+        return [int(self.ordinals[start + i]) for i in ranked[:limit]]
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+
+
+def get_lexical_index(collection_name: str) -> LexicalIndex | None:
+    if not HYBRID_ENABLED:
+        return None
+    return _indexes.get(collection_name)
+
+
+def lexical_ranking(collection_name: str, target_id: int, question: str) -> List[int]:
+    index = get_lexical_index(collection_name)
+    if index is None:
+        return []
+
+    with metrics.timer(f"lexical_index.{collection_name}.search"):
+        return index.search(target_id, question)
+
+
+def indexed_fragments(indexed: IndexedCollection):
+    return indexed.fragment_model.doc_ordinal.is_not(None)
+
+
+async def build_collection_index(session: AsyncSession, indexed: IndexedCollection) -> LexicalIndex:
+    model = indexed.fragment_model
+    result = await session.execute(
+        select(getattr(model, indexed.filter_key), model.doc_ordinal, model.text).where(
+            indexed_fragments(indexed)
+        )
+    )
+    return LexicalIndex.build(result.all())
+
+
+async def fragments_source(session: AsyncSession, indexed: IndexedCollection) -> Dict[str, int]:
+    """What the index is built from; re-ingesting fragments replaces them with new ids."""
+    model = indexed.fragment_model
+    result = await session.execute(
+        select(func.count(), func.coalesce(func.max(model.id), 0)).where(indexed_fragments(indexed))
+    )
+    fragments, max_id = result.one()
+    return {"fragments": fragments, "max_id": max_id}
+
+
+def saved_source(path: Path) -> Dict[str, int] | None:
+    try:
+        return json.loads((path / SOURCE_FILE).read_text(encoding="utf8"))
+    except (OSError, ValueError):
+        return None
+
+
+async def save_collection_index(
+    session: AsyncSession, indexed: IndexedCollection, path: Path, source: Dict[str, int]
+) -> LexicalIndex:
+    index = await build_collection_index(session, indexed)
+    if len(index):
+        index.save(path)
+        (path / SOURCE_FILE).write_text(json.dumps(source), encoding="utf8")
+    return index
+
+
+async def build_lexical_indexes(session: AsyncSession):
+    """Rebuilds and saves every collection's index, run after ingesting fragments."""
+    for indexed in INDEXED_COLLECTIONS:
+        source = await fragments_source(session, indexed)
+        path = LEXICAL_INDEX_DIR / indexed.collection_name
+        index = await save_collection_index(session, indexed, path, source)
+        _indexes[indexed.collection_name] = index
+        print(f"Built lexical index for '{indexed.collection_name}' ({len(index)} fragments)")
+
+
+async def load_lexical_indexes(session: AsyncSession):
+    """
+    Maps the saved indexes at startup. One never saved, or saved from other fragments
+    than the table holds now, is rebuilt first.
+    """
+    if not HYBRID_ENABLED:
+        return
+
+    for indexed in INDEXED_COLLECTIONS:
+        path = LEXICAL_INDEX_DIR / indexed.collection_name
+        try:
+            source = await fragments_source(session, indexed)
+            if (path / "vocabulary.json").exists() and saved_source(path) == source:
+                index = LexicalIndex.load(path)
+            else:
+                index = await save_collection_index(session, indexed, path, source)
+        except Exception as e:
+            print(f"Lexical index for '{indexed.collection_name}' unavailable: {e}")
+            continue
+
+        _indexes[indexed.collection_name] = index
+        print(f"Loaded lexical index for '{indexed.collection_name}' ({len(index)} fragments)")
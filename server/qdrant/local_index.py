@@ -0,0 +1,161 @@
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+import metrics
+from db import AsyncSessionLocal
+from db.models.fragment import (
+    CountryFragment,
+    PowiatFragment,
+    USStateFragment,
+    WojewodztwoFragment,
+)
+from db.repositories.countrydle import CountrydleRepository
+from db.repositories.powiatdle import PowiatdleDayRepository
+from db.repositories.us_statedle import USStatedleDayRepository
+from db.repositories.wojewodztwodle import WojewodztwodleDayRepository
+
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "true").lower() == "true"
+LOCAL_INDEX_DAYS_AHEAD = int(os.getenv("LOCAL_INDEX_DAYS_AHEAD", "1"))
+
+
+@dataclass
+class IndexedCollection:
+    collection_name: str
+    fragment_model: Any
+    filter_key: str
+    day_repository: Any
+    get_day_by_date: str
+
+
+INDEXED_COLLECTIONS = [
+    IndexedCollection(
+        "countries", CountryFragment, "country_id", CountrydleRepository, "get_day_country_by_date"
+    ),
+    IndexedCollection(
+        "powiaty", PowiatFragment, "powiat_id", PowiatdleDayRepository, "get_day_powiat_by_date"
+    ),
+    IndexedCollection(
+        "us_states", USStateFragment, "us_state_id", USStatedleDayRepository, "get_day_us_state_by_date"
+    ),
+    IndexedCollection(
+        "wojewodztwa",
+        WojewodztwoFragment,
+        "wojewodztwo_id",
+        WojewodztwodleDayRepository,
+        "get_day_wojewodztwo_by_date",
+    ),
+]
+
+
+class TargetIndex:
+    """
+    The fragments of one target in document order, with their embeddings as the
+    normalized rows of a float32 matrix: a search is one matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        ordinals: List[int] | None = None,
+    ):
+        self.texts = texts
+        self.ordinals = list(range(len(texts))) if ordinals is None else ordinals
+        self._positions = {ordinal: position for position, ordinal in enumerate(self.ordinals)}
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = np.ascontiguousarray(matrix / norms)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def search(self, query_vector: List[float], limit: int) -> List[int]:
+        """Positions of the `limit` best matching fragments, best first."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = self.matrix @ query
+        limit = min(limit, len(scores))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        return best[np.argsort(-scores[best])].tolist()
+
+    def positions(self, ordinals: List[int]) -> List[int]:
+        return [self._positions[o] for o in ordinals if o in self._positions]
+
+    def window(self, positions: List[int]) -> List[str]:
+        """The fragments at `positions` with the ones before and after, in document order."""
+        window = set()
+        for position in positions:
+            window.update((position - 1, position, position + 1))
+        return [self.texts[p] for p in sorted(window) if 0 <= p < len(self.texts)]
+
+    def context(self, query_vector: List[float], limit: int) -> List[str]:
+        if not self.texts:
+            return []
+        return self.window(self.search(query_vector, limit))
+
+
+# (collection_name, target_id) -> index, replaced as a whole on every reload
+_indexes: Dict[Tuple[str, int], TargetIndex] = {}
+
+
+def get_index(collection_name: str, target_id: int) -> TargetIndex | None:
+    if not LOCAL_INDEX_ENABLED:
+        return None
+
+    index = _indexes.get((collection_name, target_id))
+    outcome = "misses" if index is None else "hits"
+    metrics.inc(f"local_index.{collection_name}.{outcome}")
+    return index
+
+
+async def build_index(session, indexed: IndexedCollection, target_id: int) -> TargetIndex:
+    model = indexed.fragment_model
+    result = await session.execute(
+        select(model.text, model.embedding, model.doc_ordinal)
+        .where(getattr(model, indexed.filter_key) == target_id)
+        .where(model.embedding.is_not(None))
+        .order_by(model.doc_ordinal, model.id)
+    )
+    rows = result.all()
+    # Fragments stored without an ordinal fall back to their place in the list
+    return TargetIndex(
+        [text for text, _, _ in rows],
+        [embedding for _, embedding, _ in rows],
+        [position if ordinal is None else ordinal for position, (_, _, ordinal) in enumerate(rows)],
+    )
+
+
+async def load_day_indexes(days_ahead: int = LOCAL_INDEX_DAYS_AHEAD):
+    """
+    Loads the fragments of today's targets, and of the next `days_ahead` days so
+    nothing goes cold at midnight, replacing the previous days' indexes.
+    """
+    if not LOCAL_INDEX_ENABLED:
+        return
+
+    day_dates = [date.today() + timedelta(days=n) for n in range(days_ahead + 1)]
+    indexes: Dict[Tuple[str, int], TargetIndex] = {}
+
+    async with AsyncSessionLocal() as session:
+        for indexed in INDEXED_COLLECTIONS:
+            repo = indexed.day_repository(session)
+            for day_date in day_dates:
+                day = await getattr(repo, indexed.get_day_by_date)(day_date)
+                if day is None:
+                    continue
+
+                key = (indexed.collection_name, getattr(day, indexed.filter_key))
+                if key not in indexes:
+                    indexes[key] = await build_index(session, indexed, key[1])
+
+    _indexes.clear()
+    _indexes.update((key, index) for key, index in indexes.items() if len(index))
+    print(
+        f"Loaded local fragment indexes for {len(_indexes)} targets "
+        f"({sum(len(index) for index in _indexes.values())} fragments)"
+    )
@@ -0,0 +1,49 @@
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .local_index import INDEXED_COLLECTIONS
+
+FRAGMENT_COLLECTIONS = {indexed.collection_name: indexed for indexed in INDEXED_COLLECTIONS}
+
+
+async def search_fragments(
+    session: AsyncSession,
+    collection_name: str,
+    target_id: int,
+    query_vector: List[float],
+    limit: int,
+) -> List[Dict]:
+    """
+    The target's `limit` closest fragments by cosine distance, best first, shaped
+    like the Qdrant payloads: the precomputed window makes it a single query.
+
+    A target has a few dozen fragments, so they are ranked exactly on the target
+    index; the embeddings have no ANN index, since its ef_search nearest fragments of
+    all targets would rarely include the target's.
+    """
+    indexed = FRAGMENT_COLLECTIONS[collection_name]
+    model = indexed.fragment_model
+
+    target_fragments = (
+        select(model.doc_ordinal, model.text, model.window_text, model.embedding)
+        .where(getattr(model, indexed.filter_key) == target_id)
+        .where(model.embedding.is_not(None))
+        .cte("target_fragments")
+        .prefix_with("MATERIALIZED")
+    )
+    result = await session.execute(
+        select(target_fragments.c.doc_ordinal, target_fragments.c.text, target_fragments.c.window_text)
+        .order_by(target_fragments.c.embedding.cosine_distance(query_vector))
+        .limit(limit)
+    )
+    return [
+        {
+            indexed.filter_key: target_id,
+            "doc_ordinal": doc_ordinal,
+            "fragment_text": text,
+            "window_text": window_text or text,
+        }
+        for doc_ordinal, text, window_text in result.all()
+    ]
@@ -0,0 +1,129 @@
+import os
+from pathlib import Path
+from typing import List
+
+import httpx
+
+import metrics
+import qdrant
+
+QDRANT_SNAPSHOT_DIR = Path(
+    os.getenv(
+        "QDRANT_SNAPSHOT_DIR",
+        Path(__file__).resolve().parent.parent / "data" / "snapshots",
+    )
+)
+QDRANT_SNAPSHOT_KEEP = int(os.getenv("QDRANT_SNAPSHOT_KEEP", "3"))
+QDRANT_BOOTSTRAP = os.getenv("QDRANT_BOOTSTRAP", "true").lower() == "true"
+
+# Snapshots of a few hundred MB take a while to stream either way
+SNAPSHOT_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+
+def qdrant_url() -> str:
+    return f"http://{qdrant.QDRANT_HOST}:{qdrant.QDRANT_PORT}"
+
+
+def local_snapshots(collection_name: str) -> List[Path]:
+    """The collection's downloaded snapshots, newest first."""
+    directory = QDRANT_SNAPSHOT_DIR / collection_name
+    if not directory.exists():
+        return []
+    return sorted(directory.glob("*.snapshot"), key=lambda path: path.stat().st_mtime, reverse=True)
+
+
+async def backup_collection(collection_name: str) -> Path:
+    """
+    Snapshots the collection and downloads it next to the server, so the snapshot
+    outlives the Qdrant volume. Only the newest QDRANT_SNAPSHOT_KEEP are kept.
+    """
+    snapshot = await qdrant.async_client.create_snapshot(collection_name=collection_name, wait=True)
+    directory = QDRANT_SNAPSHOT_DIR / collection_name
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / snapshot.name
+
+    url = f"{qdrant_url()}/collections/{collection_name}/snapshots/{snapshot.name}"
+    async with httpx.AsyncClient(timeout=SNAPSHOT_TIMEOUT) as http:
+        async with http.stream("GET", url) as response:
+            response.raise_for_status()
+            # Written aside and renamed, a partial download is never restored
+            tmp = path.with_suffix(".part")
+            with tmp.open("wb") as file:
+                async for chunk in response.aiter_bytes():
+                    file.write(chunk)
+            tmp.replace(path)
+
+    await qdrant.async_client.delete_snapshot(
+        collection_name=collection_name, snapshot_name=snapshot.name
+    )
+    for old in local_snapshots(collection_name)[QDRANT_SNAPSHOT_KEEP:]:
+        old.unlink()
+    return path
+
+
+async def restore_collection(collection_name: str, path: Path):
+    """Replaces the collection (creating it if needed) with the snapshot's contents."""
+    url = f"{qdrant_url()}/collections/{collection_name}/snapshots/upload"
+    async with httpx.AsyncClient(timeout=SNAPSHOT_TIMEOUT) as http:
+        with path.open("rb") as file:
+            response = await http.post(
+                url,
+                params={"priority": "snapshot", "wait": "true"},
+                files={"snapshot": (path.name, file, "application/octet-stream")},
+            )
+    response.raise_for_status()
+
+
+async def is_empty(collection_name: str) -> bool:
+    if not await qdrant.async_client.collection_exists(collection_name):
+        return True
+    result = await qdrant.async_client.count(collection_name=collection_name, exact=False)
+    return result.count == 0
+
+
+def profile_mismatch(info) -> str | None:
+    """How a collection differs from the storage profile, or None when it matches."""
+    vectors = info.config.params.vectors
+    if vectors.size != qdrant.EMBEDDING_SIZE:
+        return f"{vectors.size}d vectors, EMBEDDING_SIZE is {qdrant.EMBEDDING_SIZE}"
+    quantized = qdrant.quantization_config() is not None
+    if (info.config.quantization_config is not None) != quantized or bool(vectors.on_disk) != quantized:
+        return f"other quantization than QDRANT_QUANTIZATION={qdrant.QDRANT_QUANTIZATION}"
+    return None
+
+
+async def check_restored(collection_name: str) -> bool:
+    """
+    Drops a restored collection taken before a storage profile change, so
+    init_qdrant recreates it empty in the current profile.
+    """
+    info = await qdrant.async_client.get_collection(collection_name)
+    mismatch = profile_mismatch(info)
+    if mismatch:
+        print(f"Snapshot of '{collection_name}' has {mismatch}, dropping it")
+        await qdrant.async_client.delete_collection(collection_name)
+        return False
+
+    print(f"Restored '{collection_name}': {info.points_count} points")
+    return True
+
+
+async def restore_latest(collection_name: str) -> bool:
+    """Fills the collection from its newest local snapshot, if there is a usable one."""
+    snapshots = local_snapshots(collection_name)
+    if not snapshots:
+        return False
+
+    path = snapshots[0]
+    print(f"Restoring '{collection_name}' from {path.name}...")
+    try:
+        await restore_collection(collection_name, path)
+    except Exception as e:
+        print(f"Restoring '{collection_name}' from {path.name} failed: {e}")
+        return False
+
+    if not await check_restored(collection_name):
+        return False
+
+    metrics.inc("qdrant_bootstrap.restored")
+    return True
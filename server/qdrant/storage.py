@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+BYTES_PER_VALUE = {"vector": 4, "halfvec": 2, "int8": 1, "none": 4}
+
+
+@dataclass
+class StorageProfile:
+    dimensions: int
+    pg_type: str = "vector"  # vector | halfvec
+    quantization: str = "none"  # none | int8
+
+    def postgres_bytes(self) -> int:
+        return self.dimensions * BYTES_PER_VALUE[self.pg_type]
+
+    def qdrant_ram_bytes(self) -> int:
+        """Quantized collections keep only the int8 copy in RAM, originals are on disk."""
+        return self.dimensions * BYTES_PER_VALUE[self.quantization]
+
+    def __str__(self) -> str:
+        return f"{self.dimensions}d {self.pg_type}/{self.quantization}"
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def reduce_dimensions(matrix: np.ndarray, dimensions: int) -> np.ndarray:
+    """
+    The first `dimensions` values, renormalized: for text-embedding-3 models this is
+    what the API returns when asked for `dimensions`.
+    """
+    return normalize(np.asarray(matrix, dtype=np.float32)[..., :dimensions])
+
+
+def quantize_int8(matrix: np.ndarray, quantile: float = 0.99) -> np.ndarray:
+    """Qdrant's scalar quantization: values clipped to the quantile range, 256 levels."""
+    low, high = np.quantile(matrix, [1 - quantile, quantile])
+    scale = max(high - low, 1e-12) / 255
+    levels = np.round((np.clip(matrix, low, high) - low) / scale)
+    return (levels * scale + low).astype(np.float32)
+
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = normalize(matrix) @ normalize(query)
+    return np.argsort(-scores, kind="stable")[:k]
+
+
+def profile_top_k(
+    matrix: np.ndarray, query: np.ndarray, profile: StorageProfile, k: int, oversampling: float
+) -> np.ndarray:
+    """The top k a search under the profile returns, int8 results rescored like Qdrant does."""
+    vectors = reduce_dimensions(matrix, profile.dimensions)
+    query = reduce_dimensions(query, profile.dimensions)
+    if profile.pg_type == "halfvec":
+        vectors = vectors.astype(np.float16).astype(np.float32)
+    if profile.quantization != "int8":
+        return top_k(vectors, query, k)
+
+    candidates = top_k(quantize_int8(vectors), query, max(k, int(np.ceil(k * oversampling))))
+    return candidates[top_k(vectors[candidates], query, k)]
+
+
+def recall_at_k(expected: List[np.ndarray], found: List[np.ndarray]) -> float:
+    hits = sum(len(np.intersect1d(e, f)) for e, f in zip(expected, found))
+    total = sum(len(e) for e in expected)
+    return hits / total if total else 1.0
@@ -0,0 +1,153 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Dict, List
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointIdsList, PointStruct
+from sqlalchemy import Text, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import metrics
+from .local_index import IndexedCollection
+from .postgres import FRAGMENT_COLLECTIONS
+from .utils import fragment_payload, upsert_in_batches
+
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "2000"))
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "256"))
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "4"))
+
+
+@dataclass
+class SyncResult:
+    collection_name: str
+    upserted: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.collection_name}: {self.upserted} upserted, "
+            f"{self.deleted} deleted, {self.unchanged} unchanged"
+        )
+
+
+def content_hash(indexed: IndexedCollection):
+    """md5 of everything a fragment's point is made of, computed by Postgres."""
+    model = indexed.fragment_model
+    return func.md5(
+        func.concat_ws(
+            "|",
+            getattr(model, indexed.filter_key),
+            model.doc_ordinal,
+            model.text,
+            model.window_text,
+            cast(model.embedding, Text),
+        )
+    )
+
+
+async def postgres_hashes(session: AsyncSession, indexed: IndexedCollection) -> Dict[int, str]:
+    """Content hash of every fragment with an embedding, paged by id (keyset)."""
+    model = indexed.fragment_model
+    hashes: Dict[int, str] = {}
+    last_id = 0
+    while True:
+        result = await session.execute(
+            select(model.id, content_hash(indexed))
+            .where(model.id > last_id, model.embedding.is_not(None))
+            .order_by(model.id)
+            .limit(SYNC_PAGE_SIZE)
+        )
+        rows = result.all()
+        if not rows:
+            return hashes
+        hashes.update(rows)
+        last_id = rows[-1][0]
+
+
+async def qdrant_hashes(client: AsyncQdrantClient, collection_name: str) -> Dict[int | str, str | None]:
+    """The stored content hash of every point, without reading vectors."""
+    hashes: Dict[int | str, str | None] = {}
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=collection_name,
+            limit=SYNC_PAGE_SIZE,
+            offset=offset,
+            with_payload=["content_hash"],
+            with_vectors=False,
+        )
+        hashes.update((point.id, (point.payload or {}).get("content_hash")) for point in points)
+        if offset is None:
+            return hashes
+
+
+async def fragment_points(
+    session: AsyncSession, indexed: IndexedCollection, ids: List[int], hashes: Dict[int, str]
+) -> List[PointStruct]:
+    model = indexed.fragment_model
+    result = await session.execute(select(model).where(model.id.in_(ids)))
+    points = []
+    for fragment in result.scalars():
+        target_id = getattr(fragment, indexed.filter_key)
+        payload = fragment_payload(indexed.filter_key, target_id, fragment)
+        payload["content_hash"] = hashes[fragment.id]
+        points.append(PointStruct(id=fragment.id, vector=list(fragment.embedding), payload=payload))
+    session.expunge_all()
+    return points
+
+
+async def sync_collection(
+    session: AsyncSession,
+    client: AsyncQdrantClient,
+    collection_name: str,
+    dry_run: bool = False,
+) -> SyncResult:
+    """
+    Brings a fragment collection in line with Postgres: upserts the fragments whose
+    content hash differs from the point's, deletes points without a fragment
+    (including ones stored under uuid ids), and leaves everything else alone.
+    """
+    indexed = FRAGMENT_COLLECTIONS[collection_name]
+    wanted = await postgres_hashes(session, indexed)
+    stored = await qdrant_hashes(client, collection_name)
+
+    changed = [point_id for point_id, digest in wanted.items() if stored.get(point_id) != digest]
+    orphans = [point_id for point_id in stored if point_id not in wanted]
+    result = SyncResult(
+        collection_name,
+        upserted=len(changed),
+        deleted=len(orphans),
+        unchanged=len(wanted) - len(changed),
+    )
+    if dry_run:
+        return result
+
+    # At most SYNC_CONCURRENCY batches are read and in flight at a time
+    semaphore = asyncio.Semaphore(SYNC_CONCURRENCY)
+
+    async def upsert(points: List[PointStruct]):
+        try:
+            await upsert_in_batches(client, collection_name, points, batch_size=SYNC_BATCH_SIZE)
+        finally:
+            semaphore.release()
+
+    tasks = []
+    for start in range(0, len(changed), SYNC_BATCH_SIZE):
+        await semaphore.acquire()
+        points = await fragment_points(
+            session, indexed, changed[start : start + SYNC_BATCH_SIZE], wanted
+        )
+        tasks.append(asyncio.create_task(upsert(points)))
+    await asyncio.gather(*tasks)
+
+    for start in range(0, len(orphans), SYNC_BATCH_SIZE):
+        await client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=orphans[start : start + SYNC_BATCH_SIZE]),
+        )
+
+    metrics.inc(f"qdrant_sync.{collection_name}.upserted", result.upserted)
+    metrics.inc(f"qdrant_sync.{collection_name}.deleted", result.deleted)
+    return result
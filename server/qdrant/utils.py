@@ -1,26 +1,34 @@
-import time
-from typing import List, Tuple, Any
+import asyncio
+import inspect
+from typing import Awaitable, List, Tuple, Any
 from dataclasses import dataclass
 
 from db.models import CountrydleDay
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.http.models import (
     FieldCondition,
     Filter,
     MatchValue,
-    GroupsResult,
-    PointGroup,
     ScoredPoint,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 import qdrant
+import metrics
 
 from qdrant_client.models import PointStruct
 
+from .lexical import HYBRID_CANDIDATES, lexical_ranking, reciprocal_rank_fusion
+from .local_index import get_index
+from .postgres import search_fragments
 from .vectorize import get_embedding, get_bulk_embedding
+from .writer import writer
+
+
+# Joins neighbouring fragments in a prompt context
+CONTEXT_SEPARATOR = "\n[ ... ]\n"
 
 
 @dataclass
@@ -28,6 +36,14 @@ class Fragment:
     text: str
 
 
+@dataclass
+class CachedAnswer:
+    answer: bool
+    explanation: str
+    context: str | None
+    score: float
+
+
 def split_document(content: str) -> List[Document]:
     # Use RecursiveCharacterTextSplitter to split the document into fragments per 300 tokens
     text_splitter = RecursiveCharacterTextSplitter(
@@ -41,42 +57,92 @@ def split_document(content: str) -> List[Document]:
     return fragments
 
 
-def get_points(client: QdrantClient, collection_name: str, ids: list[int]):
+def window_texts(texts: List[str]) -> List[str]:
+    """Each fragment of a document with the one before and after it."""
+    return [CONTEXT_SEPARATOR.join(texts[max(i - 1, 0) : i + 2]) for i in range(len(texts))]
+
+
+def fragment_payload(filter_key: str, target_id: int, fragment: Any) -> dict:
+    return {
+        filter_key: target_id,
+        "fragment_text": fragment.text,
+        "doc_ordinal": fragment.doc_ordinal,
+        "window_text": fragment.window_text,
+    }
+
+
+def assemble_windows(windows: List[dict]) -> List[Fragment]:
+    """
+    Prompt context from the hits' precomputed windows in document order. A hit
+    already inside an earlier window adds nothing, one right after it adds itself.
+    """
+    fragments = []
+    covered_until = None
+    for window in sorted(windows, key=lambda w: w["doc_ordinal"]):
+        ordinal = window["doc_ordinal"]
+        if covered_until is None or ordinal - 1 > covered_until:
+            fragments.append(Fragment(text=window["window_text"]))
+            covered_until = ordinal + 1
+        elif ordinal > covered_until:
+            fragments[-1].text += CONTEXT_SEPARATOR + window["fragment_text"]
+            covered_until = ordinal
+    return fragments
+
+
+def rerank(dense: List[int], lexical: List[int], limit: int) -> List[int]:
+    """
+    The `limit` best of the dense candidates (best first) after fusing them with the
+    lexical ranking. Lexical hits outside the candidates only reorder, they are never
+    added, so every backend picks from the same candidates.
+    """
+    candidates = set(dense)
+    fused = reciprocal_rank_fusion([dense, lexical])
+    return [item for item in fused if item in candidates][:limit]
+
+
+def fuse_windows(windows: List[dict], lexical: List[int], limit: int) -> List[Fragment]:
+    """The `limit` best of the dense hits (best first) reranked by the lexical ordinals."""
+    by_ordinal = {window["doc_ordinal"]: window for window in windows}
+    return assemble_windows([by_ordinal[o] for o in rerank(list(by_ordinal), lexical, limit)])
+
+
+async def get_points(client: AsyncQdrantClient, collection_name: str, ids: list[int]):
     try:
         # Try to get the point by its ID
-        points = client.retrieve(collection_name=collection_name, ids=ids)
+        points = await client.retrieve(collection_name=collection_name, ids=ids)
         return points
     except UnexpectedResponse:
         return []
 
 
-def search_matches(
+def target_filter(filter_key: str, filter_value: int) -> Filter:
+    return Filter(
+        must=[
+            FieldCondition(
+                key=filter_key,
+                match=MatchValue(value=filter_value),  # Strict match
+            )
+        ]
+    )
+
+
+async def search_matches(
     collection_name: str,
     query_vector: list,
     filter_key: str,
     filter_value: int,
     limit: int = 5,
 ) -> List[ScoredPoint]:
-    search_result: GroupsResult = qdrant.client.query_points_groups(
+    # Filtering on the target already yields a single group, no grouping needed
+    result = await qdrant.async_client.query_points(
         collection_name=collection_name,
-        query=query_vector,  # Use the query vector to search for similar vectors
-        group_by=filter_key,  # Group results by filter_key
-        group_size=limit,  # Return up to 5 points per group
-        limit=1,  # Limit to 3 groups (you can adjust as needed)
-        query_filter=Filter(
-            must=[
-                FieldCondition(
-                    key=filter_key,
-                    match=MatchValue(value=filter_value),  # Strict match
-                )
-            ]
-        ),
+        query=query_vector,
+        query_filter=target_filter(filter_key, filter_value),
+        search_params=qdrant.search_params(),
+        limit=limit,
         with_payload=True,
     )
-    if not search_result.groups:
-        return []
-    group, *_ = search_result.groups
-    return group.hits
+    return result.points
 
 
 async def get_fragments_matching_question(
@@ -86,21 +152,53 @@ async def get_fragments_matching_question(
     collection_name: str,
     session: AsyncSession,
     limit: int = 1,
+    query_vector: List[float] | None = None,
 ) -> Tuple[list[Fragment], List[float]]:
-    query = question
-    query_vector = get_embedding(query, qdrant.EMBEDDING_MODEL)
+    if query_vector is None:
+        query_vector = await get_embedding(question, qdrant.EMBEDDING_MODEL)
+
+    # Exact term matches (names of rivers, cities) rerank the closest fragments
+    lexical = lexical_ranking(collection_name, filter_value, question)
+    candidates = limit * HYBRID_CANDIDATES if lexical else limit
+
+    # Today's targets are searched in memory, Qdrant only serves cold targets
+    index = get_index(collection_name, filter_value)
+    if index is not None:
+        with metrics.timer(f"local_index.{collection_name}.search"):
+            positions = index.search(query_vector, candidates)
+            if lexical:
+                positions = rerank(positions, index.positions(lexical), limit)
+            texts = index.window(positions)
+        return [Fragment(text=text) for text in texts], query_vector
+
+    if qdrant.RETRIEVAL_BACKEND == "pgvector":
+        with metrics.timer(f"pgvector.{collection_name}.search"):
+            windows = await search_fragments(
+                session, collection_name, filter_value, query_vector, candidates
+            )
+        return fuse_windows(windows, lexical, limit), query_vector
 
-    points: List[ScoredPoint] = search_matches(
+    points: List[ScoredPoint] = await search_matches(
         collection_name=collection_name,
         query_vector=query_vector,
         filter_key=filter_key,
         filter_value=filter_value,
-        limit=limit,
+        limit=candidates,
     )
 
     if not points:
         return [], query_vector
 
+    if all(
+        point.payload and point.payload.get("window_text") and point.payload.get("doc_ordinal") is not None
+        for point in points
+    ):
+        windows = [point.payload for point in points]
+        return fuse_windows(windows, lexical, limit), query_vector
+
+    points = points[:limit]
+
+    # Points synced before windows were stored: fetch the neighbours by id
     # Collect all IDs to fetch (original, previous and next)
     ids_to_fetch = set()
     for point in points:
@@ -114,7 +212,7 @@ async def get_fragments_matching_question(
             ids_to_fetch.add(point.id)
 
     # Fetch all these points from Qdrant
-    all_points = get_points(qdrant.client, collection_name, list(ids_to_fetch))
+    all_points = await get_points(qdrant.async_client, collection_name, list(ids_to_fetch))
 
     # Filter points to ensure they belong to the same entity and are valid
     valid_points = []
@@ -141,34 +239,102 @@ async def get_fragments_matching_question(
 
 
 
+async def find_cached_answer(
+    query_vector: List[float],
+    filter_key: str,
+    filter_value: int,
+    collection_name: str,
+    threshold: float | None = None,
+) -> CachedAnswer | None:
+    """
+    Looks up an already answered question about the same target in a *_questions
+    collection. Returns it if it is similar enough to be reused instead of asking
+    the chat model again.
+    """
+    if not qdrant.ANSWER_CACHE_ENABLED:
+        return None
+
+    if threshold is None:
+        threshold = qdrant.ANSWER_CACHE_THRESHOLD
+
+    try:
+        result = await qdrant.async_client.query_points(
+            collection_name=collection_name,
+            query=query_vector,
+            query_filter=target_filter(filter_key, filter_value),
+            score_threshold=threshold,
+            search_params=qdrant.search_params(),
+            limit=3,
+            with_payload=True,
+        )
+    except Exception as e:
+        print(f"Answer cache lookup in '{collection_name}' failed: {e}")
+        metrics.inc(f"answer_cache.{collection_name}.errors")
+        return None
+
+    for point in result.points:
+        payload = point.payload or {}
+        # Uncertain (null) answers are not worth reusing
+        if payload.get("answer") is None or not payload.get("explanation"):
+            continue
+
+        metrics.inc(f"answer_cache.{collection_name}.hits")
+        return CachedAnswer(
+            answer=payload["answer"],
+            explanation=payload["explanation"],
+            context=payload.get("context"),
+            score=point.score,
+        )
+
+    metrics.inc(f"answer_cache.{collection_name}.misses")
+    return None
+
+
 async def add_question_to_qdrant(
     question: Any,
-    vector: List[float],
+    vector: List[float] | Awaitable[List[float]],
     filter_key: str,
     filter_value: int,
     collection_name: str = "questions",
+    point_id: int | str | None = None,
 ):
-    print(f"Adding question ID {question.id} to collection '{collection_name}'...")
-    point = PointStruct(
-        id=question.id,
-        vector=vector,
-        payload={
-            filter_key: filter_value,
-            "question_text": question.question,
-            "answer": question.answer,
-            "explanation": question.explanation,
-        },
-    )
-    qdrant.client.upsert(collection_name=collection_name, points=[point])
-    print(f"Successfully added question ID {question.id} to '{collection_name}'.")
+    """The vector may still be computing (an awaitable), then only the write waits for it."""
+    if not vector:
+        # Answer came from the cache or the facts store, nothing to remember
+        return
+
+    if point_id is None:
+        point_id = question.id
+
+    print(f"Adding question ID {point_id} to collection '{collection_name}'...")
+    payload = {
+        filter_key: filter_value,
+        "question_text": question.question,
+        "answer": question.answer,
+        "explanation": question.explanation,
+        "context": question.context,
+    }
+    if inspect.isawaitable(vector):
+        if writer.submit_when_ready(collection_name, point_id, payload, vector):
+            return
+        vector = await vector
+
+    point = PointStruct(id=point_id, vector=vector, payload=payload)
+    # Nobody waits on the point, so while the app runs it is written behind the answer
+    if writer.submit(collection_name, point):
+        return
+
+    await qdrant.async_client.upsert(collection_name=collection_name, points=[point])
+    print(f"Successfully added question ID {point_id} to '{collection_name}'.")
 
 
-def upsert_in_batches(
-    client: QdrantClient,
+async def upsert_in_batches(
+    client: AsyncQdrantClient,
     collection_name: str,
     points: List[PointStruct],
     batch_size: int = 50,
     max_retries: int = 3,
+    raise_errors: bool = False,
 ):
     """
     Upserts points into Qdrant in batches with retry logic.
@@ -185,7 +351,7 @@ def upsert_in_batches(
 
         for attempt in range(max_retries):
             try:
-                client.upsert(collection_name=collection_name, points=batch)
+                await client.upsert(collection_name=collection_name, points=batch)
                 print(
                     f"Successfully upserted batch {current_batch_num}/{total_batches} ({len(batch)} points) into '{collection_name}'."
                 )
@@ -198,9 +364,9 @@ def upsert_in_batches(
                     print(
                         f"Failed to upsert batch starting at index {i} after {max_retries} attempts."
                     )
-                    # Optionally raise the exception if you want to stop the whole process
-                    # raise e
-                time.sleep(1)  # Wait a bit before retrying
+                    if raise_errors:
+                        raise
+                await asyncio.sleep(1)  # Wait a bit before retrying
 
     print(
         f"Completed upsert of {total_points} points into collection '{collection_name}'."
@@ -1,21 +1,148 @@
-from typing import List
-from openai import OpenAI
+import asyncio
+import hashlib
+import os
+from array import array
+from typing import Dict, List
 
+import llm
+import metrics
+import qdrant
+from db import AsyncSessionLocal
+from db.repositories.embedding_cache import EmbeddingCacheRepository
+from llm.cache import LRUCache
 
-def get_embedding(text: str, model: str) -> List[float]:
-    print(f"Generating embedding for text (length: {len(text)}) using model '{model}'...")
-    client = OpenAI()
-    text = text.replace("\n", " ")
-    embedding = client.embeddings.create(input=[text], model=model).data[0].embedding
-    print("Embedding generated successfully.")
-    return embedding
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "5000"))
+EMBEDDING_CACHE_DB = os.getenv("EMBEDDING_CACHE_DB", "true").lower() == "true"
+# Requests are packed up to the API's limits: 2048 inputs and 300k tokens each
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "2048"))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "250000"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
 
+# An embedding never changes for the same (model, dimensions, text), so entries
+# only leave by eviction. Vectors are kept as float32 arrays, ~6 KB each.
+_cache = LRUCache(EMBEDDING_CACHE_SIZE, float("inf"))
 
-def get_bulk_embedding(texts: List[str], model: str) -> List[List[float]]:
-    print(f"Generating bulk embeddings for {len(texts)} texts using model '{model}'...")
-    client = OpenAI()
-    texts = [text.replace("\n", " ") for text in texts]
-    response = client.embeddings.create(input=texts, model=model)
-    embeddings = [data.embedding for data in response.data]
-    print(f"Successfully generated {len(embeddings)} bulk embeddings.")
+# Embedding requests in flight across all callers (e.g. the concurrent populate scripts)
+_embedding_slots = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+metrics.register_gauge("embedding_cache.size", lambda: len(_cache))
+metrics.register_gauge("embedding_cache.evictions", lambda: _cache.evictions)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+async def _load_from_db(
+    model: str, dimensions: int, text_hashes: List[str]
+) -> Dict[str, List[float]]:
+    try:
+        async with AsyncSessionLocal() as session:
+            return await EmbeddingCacheRepository(session).get_many(
+                model, dimensions, text_hashes
+            )
+    except Exception as e:
+        print(f"Embedding cache read failed: {e}")
+        return {}
+
+
+async def _store_in_db(model: str, dimensions: int, embeddings: Dict[str, List[float]]):
+    try:
+        async with AsyncSessionLocal() as session:
+            await EmbeddingCacheRepository(session).add_many(model, dimensions, embeddings)
+    except Exception as e:
+        print(f"Embedding cache write failed: {e}")
+
+
+def supports_dimensions(model: str) -> bool:
+    """text-embedding-3 embeddings can be shortened, by the API or by truncation."""
+    return model.startswith("text-embedding-3")
+
+
+def estimate_tokens(text: str) -> int:
+    # Pessimistic for English and Polish prose, so a packed batch stays under the limit
+    return len(text) // 3 + 1
+
+
+def pack_batches(texts: Dict[str, str]) -> List[List[str]]:
+    """Text hashes grouped into requests within the input and token limits."""
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    tokens = 0
+    for key, text in texts.items():
+        cost = estimate_tokens(text)
+        if batch and (len(batch) >= EMBEDDING_BATCH_SIZE or tokens + cost > EMBEDDING_BATCH_TOKENS):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(key)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _embed_missing(
+    texts: Dict[str, str], model: str, dimensions: int
+) -> Dict[str, List[float]]:
+    print(f"Generating embeddings for {len(texts)} texts using model '{model}'...")
+
+    async def embed_batch(batch: List[str]) -> List[List[float]]:
+        async with _embedding_slots:
+            vectors = await llm.embed(
+                [texts[key] for key in batch],
+                model,
+                dimensions=dimensions if supports_dimensions(model) else None,
+            )
+        metrics.inc("embedding_cache.api_calls")
+        return vectors
+
+    batches = pack_batches(texts)
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    embeddings = {}
+    for batch, vectors in zip(batches, results):
+        embeddings.update(zip(batch, vectors))
     return embeddings
+
+
+async def get_bulk_embedding(
+    texts: List[str], model: str, dimensions: int | None = None
+) -> List[List[float]]:
+    """
+    Embeds the texts, each distinct text at most once ever: embeddings are looked up
+    by (model, dimensions, sha256(text)) in an in-process LRU, then in the
+    embedding_cache table, and only the remaining texts go to the embeddings API.
+    """
+    dimensions = dimensions or qdrant.EMBEDDING_SIZE
+    texts = [text.replace("\n", " ") for text in texts]
+    text_hashes = [text_hash(text) for text in texts]
+
+    found: Dict[str, array] = {}
+    for key in set(text_hashes):
+        vector = _cache.get((model, dimensions, key))
+        if vector is not None:
+            found[key] = vector
+    metrics.inc("embedding_cache.memory_hits", len(found))
+
+    missing = {key: text for key, text in zip(text_hashes, texts) if key not in found}
+    if missing and EMBEDDING_CACHE_DB:
+        stored = await _load_from_db(model, dimensions, list(missing))
+        metrics.inc("embedding_cache.db_hits", len(stored))
+        for key, vector in stored.items():
+            found[key] = array("f", vector)
+            _cache.set((model, dimensions, key), found[key])
+            del missing[key]
+
+    if missing:
+        metrics.inc("embedding_cache.misses", len(missing))
+        embedded = await _embed_missing(missing, model, dimensions)
+        if EMBEDDING_CACHE_DB:
+            await _store_in_db(model, dimensions, embedded)
+        for key, vector in embedded.items():
+            found[key] = array("f", vector)
+            _cache.set((model, dimensions, key), found[key])
+
+    return [found[key].tolist() for key in text_hashes]
+
+
+async def get_embedding(text: str, model: str) -> List[float]:
+    return (await get_bulk_embedding([text], model))[0]
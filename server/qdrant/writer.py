@@ -0,0 +1,166 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Awaitable, Dict, List, Set, Tuple
+
+from qdrant_client.models import PointStruct
+
+import metrics
+import qdrant
+
+QDRANT_WRITE_BATCH_SIZE = int(os.getenv("QDRANT_WRITE_BATCH_SIZE", "64"))
+QDRANT_WRITE_INTERVAL = float(os.getenv("QDRANT_WRITE_INTERVAL", "0.5"))
+QDRANT_WRITE_QUEUE_SIZE = int(os.getenv("QDRANT_WRITE_QUEUE_SIZE", "10000"))
+QDRANT_WRITE_RETRIES = int(os.getenv("QDRANT_WRITE_RETRIES", "5"))
+QDRANT_WRITE_BACKOFF = float(os.getenv("QDRANT_WRITE_BACKOFF", "0.5"))
+
+
+class QdrantWriter:
+    """
+    Write-behind queue for points nobody waits on (answered questions): handlers
+    submit and return, a background task upserts them in batches of up to
+    `batch_size` or every `interval` seconds, retrying with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = QDRANT_WRITE_BATCH_SIZE,
+        interval: float = QDRANT_WRITE_INTERVAL,
+        max_size: int = QDRANT_WRITE_QUEUE_SIZE,
+        max_retries: int = QDRANT_WRITE_RETRIES,
+        backoff: float = QDRANT_WRITE_BACKOFF,
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue: asyncio.Queue[Tuple[str, PointStruct]] | None = None
+        self._task: asyncio.Task | None = None
+        self._in_flight = 0
+        # Points whose vector is still being computed
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def depth(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + self._in_flight + len(self._pending)
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flushes everything submitted so far, then stops."""
+        if not self.running:
+            return
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def submit(self, collection_name: str, point: PointStruct) -> bool:
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait((collection_name, point))
+        except asyncio.QueueFull:
+            print(f"Qdrant write queue full, dropping point {point.id} for '{collection_name}'")
+            metrics.inc("qdrant_writer.dropped")
+            return True
+        metrics.inc("qdrant_writer.submitted")
+        return True
+
+    def submit_when_ready(
+        self, collection_name: str, point_id, payload: dict, vector: Awaitable[List[float]]
+    ) -> bool:
+        """Queues the point once its vector is computed, without waiting for it."""
+        if not self.running:
+            return False
+        task = asyncio.ensure_future(self._submit_when_ready(collection_name, point_id, payload, vector))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return True
+
+    async def _submit_when_ready(
+        self, collection_name: str, point_id, payload: dict, vector: Awaitable[List[float]]
+    ):
+        try:
+            vector = await vector
+        except Exception as e:
+            print(f"Vector of point {point_id} for '{collection_name}' failed: {e}")
+            metrics.inc("qdrant_writer.failed")
+            return
+        self.submit(collection_name, PointStruct(id=point_id, vector=vector, payload=payload))
+
+    async def _next_batch(self) -> Tuple[List[Tuple[str, PointStruct]], bool]:
+        """Waits for a first point, then takes more until the batch or the interval is full."""
+        item = await self._queue.get()
+        if item is None:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if stopping:
+                # Drain what was submitted before stop()
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not None:
+                        batch.append(item)
+
+            by_collection: Dict[str, List[PointStruct]] = defaultdict(list)
+            for collection_name, point in batch:
+                by_collection[collection_name].append(point)
+
+            self._in_flight = len(batch)
+            for collection_name, points in by_collection.items():
+                for start in range(0, len(points), self.batch_size):
+                    await self._upsert(collection_name, points[start : start + self.batch_size])
+            self._in_flight = 0
+
+    async def _upsert(self, collection_name: str, points: List[PointStruct]):
+        for attempt in range(self.max_retries):
+            try:
+                with metrics.timer("qdrant_writer.upsert"):
+                    await qdrant.async_client.upsert(collection_name=collection_name, points=points)
+                metrics.inc("qdrant_writer.written", len(points))
+                return
+            except Exception as e:
+                print(
+                    f"Qdrant write of {len(points)} points to '{collection_name}' failed "
+                    f"(attempt {attempt + 1}/{self.max_retries}): {e}"
+                )
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(self.backoff * 2**attempt)
+
+        metrics.inc("qdrant_writer.failed", len(points))
+
+
+writer = QdrantWriter()
+
+metrics.register_gauge("qdrant_writer.queue_depth", lambda: writer.depth)
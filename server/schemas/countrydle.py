@@ -167,6 +167,18 @@ class LeaderboardEntry(BaseModel):
     wins: int
     average_points: float | None = None
     games_played: int | None = None
+    rank: int | None = None
+
+
+class LeaderboardPage(BaseModel):
+    entries: List[LeaderboardEntry]
+    next_cursor: str | None = None  # Pass back as ?cursor= for the following page
+
+
+class LeaderboardPercentile(BaseModel):
+    rank: int
+    total: int
+    percentile: float  # Share of the board ranked below the player
 
 
 class UserState(BaseModel):
@@ -34,7 +34,7 @@ class PowiatGuessBase(BaseModel):
 class PowiatGuessCreate(PowiatGuessBase):
     user_id: int
     day_id: int
-    answer: bool
+    answer: Optional[bool]
 
 
 class PowiatGuessDisplay(BaseModel):
@@ -42,7 +42,7 @@ class PowiatGuessDisplay(BaseModel):
     guess: str
     powiat_id: Optional[int]
     guessed_at: datetime
-    answer: bool
+    answer: Optional[bool]
 
     model_config = ConfigDict(from_attributes=True)
 
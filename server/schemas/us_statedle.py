@@ -35,7 +35,7 @@ class USStateGuessBase(BaseModel):
 class USStateGuessCreate(USStateGuessBase):
     user_id: int
     day_id: int
-    answer: bool
+    answer: Optional[bool]
 
 
 class USStateGuessDisplay(BaseModel):
@@ -43,7 +43,7 @@ class USStateGuessDisplay(BaseModel):
     guess: str
     us_state_id: Optional[int]
     guessed_at: datetime
-    answer: bool
+    answer: Optional[bool]
 
     model_config = ConfigDict(from_attributes=True)
 
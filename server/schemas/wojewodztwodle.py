@@ -34,7 +34,7 @@ class WojewodztwoGuessBase(BaseModel):
 class WojewodztwoGuessCreate(WojewodztwoGuessBase):
     user_id: int
     day_id: int
-    answer: bool
+    answer: Optional[bool]
 
 
 class WojewodztwoGuessDisplay(BaseModel):
@@ -42,7 +42,7 @@ class WojewodztwoGuessDisplay(BaseModel):
     guess: str
     wojewodztwo_id: Optional[int]
     guessed_at: datetime
-    answer: bool
+    answer: Optional[bool]
 
     model_config = ConfigDict(from_attributes=True)
 
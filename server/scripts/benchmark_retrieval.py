@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+
+# Add the server directory to sys.path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load .env from server directory
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
+
+import qdrant
+from db import AsyncSessionLocal
+from qdrant.postgres import search_fragments
+from qdrant.utils import search_matches
+from qdrant.vectorize import get_bulk_embedding
+from utils.prewarm import get_games, get_upcoming_days
+
+COLLECTIONS = {
+    "countrydle": "countries",
+    "powiatdle": "powiaty",
+    "us_statedle": "us_states",
+    "wojewodztwodle": "wojewodztwa",
+}
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def report(name: str, samples: list):
+    if not samples:
+        print(f"  {name:<9} no queries")
+        return
+    print(
+        f"  {name:<9} n={len(samples):<5} p50={percentile(samples, 0.5) * 1000:7.2f} ms"
+        f"  p95={percentile(samples, 0.95) * 1000:7.2f} ms  max={max(samples) * 1000:7.2f} ms"
+    )
+
+
+async def benchmark_game(game, days: int, questions: int, limit: int):
+    collection_name = COLLECTIONS[game.name]
+    day_dates = [date.today() - timedelta(days=n) for n in range(days)]
+
+    async with AsyncSessionLocal() as session:
+        asked = await game.question_repository(session).get_most_asked_questions(
+            date.today() - timedelta(days=30), questions
+        )
+    targets = {game.target_id(day) for day in await get_upcoming_days(game, day_dates)}
+    if not asked or not targets:
+        print(f"{game.name}: no questions or targets to benchmark")
+        return
+
+    # Embeddings come from the embedding cache after the first run
+    vectors = await get_bulk_embedding(asked, qdrant.EMBEDDING_MODEL)
+
+    timings = {"qdrant": [], "pgvector": []}
+    agree = 0
+    async with AsyncSessionLocal() as session:
+        for target_id in targets:
+            for vector in vectors:
+                started = time.perf_counter()
+                points = await search_matches(
+                    collection_name, vector, game.filter_key, target_id, limit=limit
+                )
+                timings["qdrant"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                windows = await search_fragments(
+                    session, collection_name, target_id, vector, limit
+                )
+                timings["pgvector"].append(time.perf_counter() - started)
+
+                qdrant_top = points[0].payload.get("doc_ordinal") if points else None
+                pg_top = windows[0]["doc_ordinal"] if windows else None
+                agree += qdrant_top == pg_top
+
+    total = len(timings["qdrant"])
+    print(f"{game.name}: {len(targets)} targets x {len(vectors)} questions, top {limit}")
+    for name, samples in timings.items():
+        report(name, samples)
+    print(f"  same top fragment: {agree}/{total} ({agree / total:.0%})")
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Compares Qdrant and pgvector fragment retrieval on the real corpus."
+    )
+    parser.add_argument("--days", type=int, default=7, help="Targets of the last N days")
+    parser.add_argument("--questions", type=int, default=50, help="Most asked questions per game")
+    parser.add_argument("--limit", type=int, default=4, help="Fragments per query")
+    args = parser.parse_args()
+
+    for game in get_games():
+        await benchmark_game(game, args.days, args.questions, args.limit)
+
+    await qdrant.close_qdrant_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
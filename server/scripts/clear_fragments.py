@@ -53,14 +53,8 @@ async def clear_fragments():
                 qdrant.client.delete_collection(collection)
                 print(f"Deleted {collection}.")
             
-            # Recreate with correct vector size (1536 for text-embedding-3-small)
-            qdrant.client.create_collection(
-                collection_name=collection,
-                vectors_config=qdrant.VectorParams(
-                    size=1536, 
-                    distance=qdrant.Distance.COSINE
-                ),
-            )
+            # Same storage profile (EMBEDDING_SIZE, QDRANT_QUANTIZATION) and payload index as init_qdrant
+            qdrant.create_collection(collection)
             print(f"Recreated {collection}.")
         except Exception as e:
             print(f"Error handling Qdrant collection {collection}: {e}")
@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select, text, update
+
+# Add the server directory to sys.path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load .env from server directory
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
+
+import qdrant
+from db import AsyncSessionLocal
+from db.models.fragment import EMBEDDING_PG_TYPE, EMBEDDING_SIZE
+from qdrant.postgres import FRAGMENT_COLLECTIONS
+from qdrant.storage import StorageProfile, profile_top_k, recall_at_k, reduce_dimensions, top_k
+from qdrant.sync import sync_collection
+from qdrant.utils import upsert_in_batches
+from qdrant.vectorize import get_bulk_embedding, supports_dimensions
+from qdrant_client.models import Disabled, PointStruct, VectorParamsDiff
+from utils.prewarm import get_games
+
+REEMBED_BATCH_SIZE = 512
+
+
+async def column_type(session, table: str) -> str:
+    result = await session.execute(
+        text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = CAST(:table AS regclass) AND attname = 'embedding'"
+        ),
+        {"table": table},
+    )
+    return result.scalar_one()
+
+
+async def migrate_table(session, indexed, reembed: bool):
+    model = indexed.fragment_model
+    table = model.__tablename__
+    current = await column_type(session, table)
+    wanted = f"{EMBEDDING_PG_TYPE}({EMBEDDING_SIZE})"
+    if current == wanted and not reembed:
+        print(f"{table}: already {wanted}")
+        return
+
+    current_size = int(current.split("(")[1].rstrip(")"))
+    truncatable = supports_dimensions(qdrant.EMBEDDING_MODEL) and current_size > EMBEDDING_SIZE
+    if reembed or (current_size != EMBEDDING_SIZE and not truncatable):
+        using = "NULL"
+    elif truncatable:
+        # text-embedding-3 vectors shorten by truncation, exactly as the API would
+        using = f"l2_normalize(subvector(embedding::vector, 1, {EMBEDDING_SIZE}))::{wanted}"
+    else:
+        using = f"embedding::{wanted}"
+
+    print(f"{table}: {current} -> {wanted}{' (re-embedding)' if using == 'NULL' else ''}")
+    await session.execute(
+        text(f"ALTER TABLE {table} ALTER COLUMN embedding TYPE {wanted} USING {using}")
+    )
+
+    if using == "NULL":
+        rows = (await session.execute(select(model.id, model.text).order_by(model.id))).all()
+        for start in range(0, len(rows), REEMBED_BATCH_SIZE):
+            batch = rows[start : start + REEMBED_BATCH_SIZE]
+            vectors = await get_bulk_embedding(
+                [row.text for row in batch], qdrant.EMBEDDING_MODEL, EMBEDDING_SIZE
+            )
+            await session.execute(
+                update(model),
+                [{"id": row.id, "embedding": vector} for row, vector in zip(batch, vectors)],
+            )
+            print(f"  re-embedded {start + len(batch)}/{len(rows)}")
+
+    await session.commit()
+
+
+async def seed_embedding_cache(session):
+    """Shortened copies of cached text-embedding-3 vectors, so old questions are not re-embedded."""
+    result = await session.execute(
+        text(
+            "INSERT INTO embedding_cache (model, dimensions, text_hash, embedding, created_at) "
+            "SELECT model, :size, text_hash, "
+            "l2_normalize(subvector(embedding, 1, :size)), now() FROM embedding_cache "
+            "WHERE dimensions > :size AND model LIKE 'text-embedding-3%' "
+            "ON CONFLICT ON CONSTRAINT uq_embedding_cache_model_dimensions_hash DO NOTHING"
+        ),
+        {"size": EMBEDDING_SIZE},
+    )
+    await session.commit()
+    print(f"embedding_cache: {result.rowcount} entries shortened to {EMBEDDING_SIZE}")
+
+
+async def read_points(collection_name: str) -> list:
+    points, offset = [], None
+    while True:
+        batch, offset = await qdrant.async_client.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        points.extend(batch)
+        if offset is None:
+            return points
+
+
+async def migrate_collections(session):
+    quantized = qdrant.quantization_config() is not None
+    rebuilt = []
+    for name in [*qdrant.COLLECTIONS.values(), "questions"]:
+        if not qdrant.client.collection_exists(name):
+            continue
+        config = qdrant.client.get_collection(name).config
+        size = config.params.vectors.size
+        if size != EMBEDDING_SIZE:
+            rebuilt.append((name, size))
+        elif (config.quantization_config is not None) != quantized:
+            print(f"{name}: {'enabling' if quantized else 'disabling'} int8 quantization")
+            qdrant.client.update_collection(
+                collection_name=name,
+                vectors_config={"": VectorParamsDiff(on_disk=quantized)},
+                quantization_config=qdrant.quantization_config() or Disabled.DISABLED,
+            )
+        else:
+            print(f"{name}: already {size}d, quantization {qdrant.QDRANT_QUANTIZATION}")
+
+    # Answered questions are kept when their vectors can be shortened, the fragments
+    # are written again from Postgres
+    kept = {}
+    for name, size in rebuilt:
+        if name in qdrant.FRAGMENT_KEYS:
+            continue
+        if size > EMBEDDING_SIZE and supports_dimensions(qdrant.EMBEDDING_MODEL):
+            kept[name] = await read_points(name)
+        else:
+            print(f"{name}: answered questions cannot be converted, the answer cache starts empty")
+
+    for name, size in rebuilt:
+        print(f"{name}: recreating with {EMBEDDING_SIZE}d vectors (was {size}d)")
+        qdrant.client.delete_collection(name)
+    await qdrant.init_qdrant(session)
+
+    for name, size in rebuilt:
+        if name in qdrant.FRAGMENT_KEYS:
+            print(f"Synced {await sync_collection(session, qdrant.async_client, name)}")
+        elif kept.get(name):
+            vectors = reduce_dimensions(np.asarray([p.vector for p in kept[name]]), EMBEDDING_SIZE)
+            points = [
+                PointStruct(id=p.id, vector=vector.tolist(), payload=p.payload)
+                for p, vector in zip(kept[name], vectors)
+            ]
+            await upsert_in_batches(qdrant.async_client, name, points, batch_size=256)
+            print(f"{name}: {len(points)} answered questions shortened")
+
+
+async def evaluate(sizes: list, k: int, questions: int, targets: int, oversampling: float):
+    """Recall@k of each storage profile against the stored vectors, on asked questions."""
+    random.seed(0)
+    for game in get_games():
+        indexed = FRAGMENT_COLLECTIONS[game.collection_name.removesuffix("_questions")]
+        model = indexed.fragment_model
+        async with AsyncSessionLocal() as session:
+            asked = await game.question_repository(session).get_most_asked_questions(
+                date.today() - timedelta(days=30), questions
+            )
+            rows = (
+                await session.execute(
+                    select(getattr(model, indexed.filter_key), model.embedding).where(
+                        model.embedding.is_not(None)
+                    )
+                )
+            ).all()
+        if not asked or not rows:
+            print(f"{game.name}: no questions or fragments to evaluate")
+            continue
+
+        by_target = defaultdict(list)
+        for target_id, embedding in rows:
+            by_target[target_id].append(embedding)
+        sample = random.sample(sorted(by_target), min(targets, len(by_target)))
+        stored_size = len(rows[0][1])
+        queries = np.asarray(await get_bulk_embedding(asked, qdrant.EMBEDDING_MODEL, stored_size))
+
+        profiles = [
+            StorageProfile(size, pg_type, quantization)
+            for size in sizes
+            if size <= stored_size
+            for pg_type, quantization in (("vector", "none"), ("halfvec", "none"), ("vector", "int8"))
+        ]
+        expected, found = [], defaultdict(list)
+        for target_id in sample:
+            matrix = np.asarray(by_target[target_id], dtype=np.float32)
+            for query in queries:
+                expected.append(top_k(matrix, query, k))
+                for profile in profiles:
+                    found[str(profile)].append(profile_top_k(matrix, query, profile, k, oversampling))
+
+        print(
+            f"{game.name}: {len(sample)} targets x {len(queries)} questions, "
+            f"recall@{k} against the stored {stored_size}d vectors ({len(rows)} fragments)"
+        )
+        for profile in profiles:
+            print(
+                f"  {str(profile):<22} recall={recall_at_k(expected, found[str(profile)]):.3f}"
+                f"  postgres={profile.postgres_bytes() * len(rows) / 2**20:7.1f} MiB"
+                f"  qdrant ram={profile.qdrant_ram_bytes() * len(rows) / 2**20:7.1f} MiB"
+            )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Converts stored embeddings to the configured storage profile (EMBEDDING_SIZE, "
+            "EMBEDDING_PG_TYPE, QDRANT_QUANTIZATION), or with --evaluate only compares profiles."
+        )
+    )
+    parser.add_argument("--evaluate", action="store_true", help="Report recall, change nothing")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1536, 1024, 768, 512, 256])
+    parser.add_argument("--k", type=int, default=4, help="Fragments per query")
+    parser.add_argument("--questions", type=int, default=100, help="Most asked questions per game")
+    parser.add_argument("--targets", type=int, default=50, help="Targets sampled per game")
+    parser.add_argument("--reembed", action="store_true", help="Embed again instead of truncating")
+    args = parser.parse_args()
+
+    if args.evaluate:
+        await evaluate(args.sizes, args.k, args.questions, args.targets, qdrant.QDRANT_OVERSAMPLING)
+        await qdrant.close_qdrant_client()
+        return
+
+    async with AsyncSessionLocal() as session:
+        for indexed in FRAGMENT_COLLECTIONS.values():
+            await migrate_table(session, indexed, args.reembed)
+        if supports_dimensions(qdrant.EMBEDDING_MODEL):
+            await seed_embedding_cache(session)
+        await migrate_collections(session)
+
+    await qdrant.close_qdrant_client()
+    print("\nStored embeddings match the configured profile.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
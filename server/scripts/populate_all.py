@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 
 from db import AsyncSessionLocal
+from qdrant.lexical import build_lexical_indexes
 
 # Import from sibling scripts
 try:
@@ -24,31 +25,33 @@ except ImportError:
     from scripts.populate_wojewodztwa import populate_wojewodztwa
     from scripts.populate_us_states import populate_us_states
 
+async def populate(name, populate_corpus):
+    # Each corpus on its own session, they run side by side
+    async with AsyncSessionLocal() as session:
+        print(f"Populating {name}...")
+        await populate_corpus(session)
+        print(f"{name} populated.")
+
+
 async def main():
     print("Starting full database population (Postgres only)...")
-    async with AsyncSessionLocal() as session:
-        try:
-            print("Populating countries...")
-            await populate_countries(session)
-            print("Countries populated.")
-            
-            print("Populating powiaty...")
-            await populate_powiaty(session)
-            print("Powiaty populated.")
- 
-            print("Populating wojewodztwa...")
-            await populate_wojewodztwa(session)
-            print("Wojewodztwa populated.")
-
-            print("Populating US States...")
-            await populate_us_states(session)
-            print("US States populated.")
-            
-            print("Full database population completed successfully.")
-        except Exception as e:
-            print(f"An error occurred during population: {e}")
-            import traceback
-            traceback.print_exc()
+    try:
+        await asyncio.gather(
+            populate("Countries", populate_countries),
+            populate("Powiaty", populate_powiaty),
+            populate("Wojewodztwa", populate_wojewodztwa),
+            populate("US States", populate_us_states),
+        )
+
+        async with AsyncSessionLocal() as session:
+            print("Building lexical indexes...")
+            await build_lexical_indexes(session)
+
+        print("Full database population completed successfully.")
+    except Exception as e:
+        print(f"An error occurred during population: {e}")
+        import traceback
+        traceback.print_exc()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,11 +1,7 @@
 import asyncio
 import sys
 import os
-import csv
-import logging
 from dotenv import load_dotenv
-from tqdm import tqdm
-from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Add the server directory to sys.path to allow imports
@@ -17,84 +13,24 @@ load_dotenv(
 )
 
 from db import AsyncSessionLocal
-import qdrant.utils as qutils
 from db.models.wojewodztwo import Wojewodztwo
 from db.models.fragment import WojewodztwoFragment
-from db.repositories.wojewodztwo import WojewodztwoRepository
+from qdrant.ingest import Corpus, ingest
 
 
-async def populate_wojewodztwa(session: AsyncSession):
-    # Try to find data directory (either sibling to server or inside server)
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_dir = os.path.join(base_dir, "data")
-    
-    if not os.path.exists(data_dir):
-        # Try sibling directory (for host machine execution)
-        data_dir = os.path.join(os.path.dirname(base_dir), "data")
-
-    csv_file = os.path.join(data_dir, "wojewodztwa.csv")
-
-    if not os.path.exists(csv_file):
-        logging.error(f"{csv_file} not found!")
-        return
-
-    # Read all rows first to use tqdm
-    rows = []
-    with open(csv_file, "r", encoding="utf8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-
-    print(f"Found {len(rows)} wojewodztwa to process.")
-
-    for row in tqdm(rows, desc="Populating Wojewodztwa"):
-        nazwa = row.get("name")
-        md_filename = row.get("md_file")
-
-        if not nazwa or not md_filename:
-            continue
-
-        # Find or create wojewodztwo
-        res = await session.execute(select(Wojewodztwo).where(Wojewodztwo.nazwa == nazwa))
-        wojewodztwo = res.scalars().first()
-
-        if not wojewodztwo:
-            wojewodztwo = Wojewodztwo(nazwa=nazwa)
-            session.add(wojewodztwo)
-            await session.commit()
-            await session.refresh(wojewodztwo)
-        
-        # Check if fragments exist for this wojewodztwo
-        f_res = await session.execute(select(func.count(WojewodztwoFragment.id)).where(WojewodztwoFragment.wojewodztwo_id == wojewodztwo.id))
-        if f_res.scalar() > 0:
-            continue
-
-        # Read the markdown content
-        md_path = os.path.join(os.path.dirname(data_dir), md_filename.replace("\\", "/"))
-        try:
-            with open(md_path, encoding="utf8") as md_file:
-                md_content = md_file.read()
-        except FileNotFoundError:
-            logging.warning(f"Markdown file not found for {wojewodztwo.nazwa}: {md_path}")
-            continue
-
-        doc_fragments = qutils.split_document(md_content)
-        embedding_model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-        
-        fragment_texts = [fragment.page_content for fragment in doc_fragments]
-        embeddings = qutils.get_bulk_embedding(fragment_texts, embedding_model)
-
-        for i, fragment in enumerate(doc_fragments):
-            # Save to Postgres
-            db_fragment = WojewodztwoFragment(
-                wojewodztwo_id=wojewodztwo.id,
-                text=fragment.page_content,
-                embedding=embeddings[i]
-            )
-            session.add(db_fragment)
+WOJEWODZTWA = Corpus(
+    name="wojewodztwa",
+    csv_file="wojewodztwa.csv",
+    entity_model=Wojewodztwo,
+    name_column="nazwa",
+    new_entity=lambda nazwa, md_file: Wojewodztwo(nazwa=nazwa),
+    fragment_model=WojewodztwoFragment,
+    filter_key="wojewodztwo_id",
+)
 
-        await session.commit()
 
-    print("Wojewodztwa population finished.")
+async def populate_wojewodztwa(session: AsyncSession):
+    await ingest(session, WOJEWODZTWA)
 
 
 async def main():
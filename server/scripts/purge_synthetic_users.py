@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Add the server directory to sys.path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load .env from server directory
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
+
+from db import AsyncSessionLocal
+from db.repositories.user import UserRepository
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Deletes the users flagged is_synthetic (test and load-test accounts) with "
+            "their games, in batches that each commit on their own."
+        )
+    )
+    parser.add_argument(
+        "--flag",
+        action="append",
+        default=[],
+        metavar="PREFIX",
+        help="First flag the usernames starting with this prefix, e.g. 'guest_' (repeatable)",
+    )
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only flag and count")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as session:
+        repo = UserRepository(session)
+        for prefix in args.flag:
+            flagged = await repo.flag_synthetic_users(prefix)
+            print(f"Flagged {flagged} users starting with '{prefix}'")
+
+        total = await repo.count_synthetic_users()
+        print(f"{total} synthetic users")
+        if args.dry_run or not total:
+            return
+
+        deleted = 0
+        while batch := await repo.purge_synthetic_users(args.batch_size):
+            deleted += batch
+            print(f"Deleted {deleted}/{total} synthetic users")
+
+    print(f"\nTotal users deleted: {deleted}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import sys
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Add the server directory to sys.path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load .env from server directory
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
+
+import qdrant
+from db import AsyncSessionLocal
+from qdrant.snapshots import check_restored, is_empty, restore_collection, restore_latest
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Restores Qdrant collections from their newest local snapshot, then syncs "
+            "the fragments changed in Postgres since."
+        )
+    )
+    parser.add_argument("--collections", nargs="+", default=list(qdrant.COLLECTIONS.values()))
+    parser.add_argument("--snapshot", type=Path, help="Restore this file (one collection)")
+    parser.add_argument("--force", action="store_true", help="Also replace non-empty collections")
+    parser.add_argument("--no-sync", action="store_true", help="Skip the Postgres delta")
+    args = parser.parse_args()
+
+    if args.snapshot and len(args.collections) != 1:
+        parser.error("--snapshot needs exactly one collection")
+
+    for name in args.collections:
+        if not args.force and not await is_empty(name):
+            print(f"'{name}' is not empty, skipping (--force replaces it)")
+            continue
+        if args.snapshot:
+            await restore_collection(name, args.snapshot)
+            if await check_restored(name):
+                print(f"Restored '{name}' from {args.snapshot}")
+        elif not await restore_latest(name):
+            print(f"No usable snapshot of '{name}'")
+
+    # Creates what is still missing and streams what changed since the snapshots
+    async with AsyncSessionLocal() as session:
+        await qdrant.init_qdrant(session)
+        if not args.no_sync:
+            for name in args.collections:
+                await qdrant.sync_from_postgres(session, name)
+
+    await qdrant.close_qdrant_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
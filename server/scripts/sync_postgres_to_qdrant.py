@@ -1,10 +1,12 @@
+import argparse
 import asyncio
-import sys
+import json
 import os
-import logging
-import uuid
+import sys
+from pathlib import Path
+from typing import Dict, List
+
 from dotenv import load_dotenv
-from tqdm import tqdm
 from sqlalchemy import select
 
 # Add the server directory to sys.path to allow imports
@@ -16,102 +18,186 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file_
 from db import AsyncSessionLocal
 import qdrant
 import qdrant.utils as qutils
-from db.models.fragment import CountryFragment, PowiatFragment, WojewodztwoFragment, USStateFragment
+from qdrant.postgres import FRAGMENT_COLLECTIONS
+from qdrant.sync import content_hash, sync_collection
 from qdrant_client.models import PointStruct
 
-async def sync_countries(session):
-    print("Syncing countries from Postgres to Qdrant...")
-    res = await session.execute(select(CountryFragment).order_by(CountryFragment.id))
-    fragments = res.scalars().all()
-    
-    points = []
-    for f in fragments:
-        points.append(PointStruct(
-            id=str(uuid.uuid4()),
-            vector=f.embedding,
-            payload={
-                "country_id": f.country_id,
-                "fragment_text": f.text,
-            }
-        ))
-    
-    if points:
-        qutils.upsert_in_batches(qdrant.client, "countries", points, batch_size=100)
-    print(f"Synced {len(points)} country fragments.")
-
-async def sync_powiaty(session):
-    print("Syncing powiaty from Postgres to Qdrant...")
-    res = await session.execute(select(PowiatFragment).order_by(PowiatFragment.id))
-    fragments = res.scalars().all()
-    
-    points = []
-    for f in fragments:
-        points.append(PointStruct(
-            id=str(uuid.uuid4()),
-            vector=f.embedding,
-            payload={
-                "powiat_id": f.powiat_id,
-                "fragment_text": f.text,
-            }
-        ))
-    
-    if points:
-        qutils.upsert_in_batches(qdrant.client, "powiaty", points, batch_size=100)
-    print(f"Synced {len(points)} powiat fragments.")
-
-async def sync_wojewodztwa(session):
-    print("Syncing wojewodztwa from Postgres to Qdrant...")
-    res = await session.execute(select(WojewodztwoFragment).order_by(WojewodztwoFragment.id))
-    fragments = res.scalars().all()
-    
-    points = []
-    for f in fragments:
-        points.append(PointStruct(
-            id=str(uuid.uuid4()),
-            vector=f.embedding,
-            payload={
-                "wojewodztwo_id": f.wojewodztwo_id,
-                "fragment_text": f.text,
-            }
-        ))
-    
-    if points:
-        qutils.upsert_in_batches(qdrant.client, "wojewodztwa", points, batch_size=100)
-    print(f"Synced {len(points)} wojewodztwo fragments.")
-
-async def sync_us_states(session):
-    print("Syncing US states from Postgres to Qdrant...")
-    res = await session.execute(select(USStateFragment).order_by(USStateFragment.id))
-    fragments = res.scalars().all()
-    
-    points = []
-    for f in fragments:
-        points.append(PointStruct(
-            id=str(uuid.uuid4()),
-            vector=f.embedding,
-            payload={
-                "us_state_id": f.us_state_id,
-                "fragment_text": f.text,
-            }
-        ))
-    
-    if points:
-        qutils.upsert_in_batches(qdrant.client, "us_states", points, batch_size=100)
-    print(f"Synced {len(points)} US state fragments.")
+DEFAULT_CHECKPOINT = Path(__file__).resolve().parent.parent / "data" / "qdrant_resync_checkpoint.json"
+
+
+class Checkpoint:
+    """Last fragment id per collection below which every batch is in Qdrant."""
+
+    def __init__(self, path: Path, restart: bool):
+        self.path = path
+        self.state: Dict[str, int] = {}
+        if path.exists() and not restart:
+            self.state = json.loads(path.read_text())
+
+    def get(self, collection_name: str) -> int:
+        return self.state.get(collection_name, 0)
+
+    def save(self, collection_name: str, last_id: int):
+        self.state[collection_name] = last_id
+        self._write()
+
+    def finish(self, collection_name: str):
+        self.state.pop(collection_name, None)
+        self._write()
+
+    def _write(self):
+        # Written aside and renamed, so an interrupted run never leaves half a file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state))
+        tmp.replace(self.path)
+
+
+class Watermark:
+    """Batches finish out of order; the checkpoint only moves past finished prefixes."""
+
+    def __init__(self, start: int):
+        self.value = start
+        self._pending: List[int] = []
+        self._done: set[int] = set()
+
+    def queued(self, last_id: int):
+        self._pending.append(last_id)
+
+    def done(self, last_id: int) -> bool:
+        self._done.add(last_id)
+        moved = False
+        while self._pending and self._pending[0] in self._done:
+            self.value = self._pending.pop(0)
+            self._done.discard(self.value)
+            moved = True
+        return moved
+
+
+async def resync_collection(
+    collection_name: str,
+    checkpoint: Checkpoint,
+    batch_size: int,
+    workers: int,
+    queue_size: int,
+):
+    indexed = FRAGMENT_COLLECTIONS[collection_name]
+    model = indexed.fragment_model
+    key = indexed.filter_key
+    start_id = checkpoint.get(collection_name)
+    if start_id:
+        print(f"Resuming '{collection_name}' after fragment id {start_id}")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    watermark = Watermark(start_id)
+    synced = 0
+
+    async def worker():
+        nonlocal synced
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            last_id, points = batch
+            await qutils.upsert_in_batches(
+                qdrant.async_client,
+                collection_name,
+                points,
+                batch_size=len(points),
+                raise_errors=True,
+            )
+            synced += len(points)
+            if watermark.done(last_id):
+                checkpoint.save(collection_name, watermark.value)
+
+    # Columns rather than entities: nothing is kept in the session's identity map
+    stmt = (
+        select(
+            model.id,
+            getattr(model, key).label("target_id"),
+            model.doc_ordinal,
+            model.text,
+            model.window_text,
+            model.embedding,
+            content_hash(indexed).label("content_hash"),
+        )
+        .where(model.id > start_id, model.embedding.is_not(None))
+        .order_by(model.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    async def read():
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(stmt)
+            async for rows in result.partitions():
+                points = [
+                    PointStruct(
+                        id=row.id,
+                        vector=list(row.embedding),
+                        payload={
+                            **qutils.fragment_payload(key, row.target_id, row),
+                            "content_hash": row.content_hash,
+                        },
+                    )
+                    for row in rows
+                ]
+                last_id = rows[-1].id
+                watermark.queued(last_id)
+                # Blocks while queue_size batches wait, so memory stays flat
+                await queue.put((last_id, points))
+
+        for _ in range(workers):
+            await queue.put(None)
+
+    # A batch failing for good stops the run, the checkpoint stays before it
+    await asyncio.gather(read(), *(worker() for _ in range(workers)))
+    print(f"Upserted {synced} '{collection_name}' fragments")
+
+    # Ids are fragment ids, so what is left over are orphans and old uuid points
+    async with AsyncSessionLocal() as session:
+        result = await sync_collection(session, qdrant.async_client, collection_name)
+    print(f"Cleaned up {result}")
+    checkpoint.finish(collection_name)
+
 
 async def main():
+    parser = argparse.ArgumentParser(
+        description="Streams every fragment from Postgres into Qdrant under its fragment id."
+    )
+    parser.add_argument(
+        "--collections",
+        nargs="+",
+        choices=list(FRAGMENT_COLLECTIONS),
+        default=list(FRAGMENT_COLLECTIONS),
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent upserts")
+    parser.add_argument("--queue-size", type=int, default=8, help="Batches read ahead")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report what differs from Postgres"
+    )
+    args = parser.parse_args()
+
     async with AsyncSessionLocal() as session:
         await qdrant.init_qdrant(session)
-        try:
-            await sync_countries(session)
-            await sync_powiaty(session)
-            await sync_wojewodztwa(session)
-            await sync_us_states(session)
-            print("\nAll data successfully synced from Postgres to Qdrant!")
-        except Exception as e:
-            print(f"Error during sync: {e}")
-            import traceback
-            traceback.print_exc()
+
+        if args.dry_run:
+            for collection_name in args.collections:
+                result = await sync_collection(
+                    session, qdrant.async_client, collection_name, dry_run=True
+                )
+                print(f"Would sync {result}")
+            return
+
+    checkpoint = Checkpoint(args.checkpoint, args.restart)
+    for collection_name in args.collections:
+        await resync_collection(
+            collection_name, checkpoint, args.batch_size, args.workers, args.queue_size
+        )
+    print("\nAll data successfully synced from Postgres to Qdrant!")
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,74 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import metrics
+from qdrant.utils import find_cached_answer
+
+
+def make_point(score: float, payload: dict):
+    point = MagicMock()
+    point.score = score
+    point.payload = payload
+    return point
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.mark.anyio
+async def test_cache_hit_returns_stored_answer():
+    result = MagicMock()
+    result.points = [
+        make_point(
+            0.98,
+            {
+                "country_id": 100,
+                "question_text": "Is the country located in Europe?",
+                "answer": True,
+                "explanation": "Poland is located in Central Europe.",
+                "context": "Poland is a country in Central Europe.",
+            },
+        )
+    ]
+
+    with patch("qdrant.async_client.query_points", new_callable=AsyncMock, return_value=result) as mock_query:
+        cached = await find_cached_answer(
+            [0.1] * 1536, "country_id", 100, "countries_questions"
+        )
+
+    assert cached is not None
+    assert cached.answer is True
+    assert cached.explanation == "Poland is located in Central Europe."
+    assert mock_query.call_args.kwargs["query_filter"].must[0].match.value == 100
+    assert metrics.get("answer_cache.countries_questions.hits") == 1
+
+
+@pytest.mark.anyio
+async def test_cache_skips_uncertain_answers():
+    result = MagicMock()
+    result.points = [
+        make_point(0.99, {"answer": None, "explanation": "Unknown."}),
+    ]
+
+    with patch("qdrant.async_client.query_points", new_callable=AsyncMock, return_value=result):
+        cached = await find_cached_answer(
+            [0.1] * 1536, "powiat_id", 5, "powiaty_questions"
+        )
+
+    assert cached is None
+    assert metrics.get("answer_cache.powiaty_questions.misses") == 1
+
+
+@pytest.mark.anyio
+async def test_cache_lookup_failure_is_a_miss():
+    with patch("qdrant.async_client.query_points", new_callable=AsyncMock, side_effect=Exception("down")):
+        cached = await find_cached_answer(
+            [0.1] * 1536, "us_state_id", 3, "us_states_questions"
+        )
+
+    assert cached is None
+    assert metrics.get("answer_cache.us_states_questions.errors") == 1
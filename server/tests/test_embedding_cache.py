@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+import qdrant.vectorize as vectorize
+
+
+def fake_embed(texts, model, dimensions=None):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def embed():
+    vectorize._cache.clear()
+    with (
+        patch("llm.embed", AsyncMock(side_effect=fake_embed)) as mock_embed,
+        patch("qdrant.vectorize._load_from_db", AsyncMock(return_value={})),
+        patch("qdrant.vectorize._store_in_db", AsyncMock()),
+    ):
+        yield mock_embed
+    vectorize._cache.clear()
+
+
+@pytest.mark.anyio
+async def test_second_run_makes_no_api_calls(embed):
+    texts = ["Poland borders Germany", "Austria is landlocked"]
+
+    first = await vectorize.get_bulk_embedding(texts, "model")
+    second = await vectorize.get_bulk_embedding(texts, "model")
+
+    assert first == second == [[22.0, 1.0], [21.0, 1.0]]
+    assert embed.await_count == 1
+
+
+@pytest.mark.anyio
+async def test_duplicates_are_embedded_once(embed):
+    texts = ["a fragment", "another\nfragment", "a fragment", "another fragment"]
+
+    result = await vectorize.get_bulk_embedding(texts, "model")
+
+    assert len(result) == 4
+    assert result[0] == result[2]
+    embed.assert_awaited_once_with(["a fragment", "another fragment"], "model", dimensions=None)
+
+
+@pytest.mark.anyio
+async def test_db_hits_skip_the_api(embed):
+    stored = {vectorize.text_hash("stored text"): [0.5, 0.5]}
+
+    with patch("qdrant.vectorize._load_from_db", AsyncMock(return_value=stored)):
+        result = await vectorize.get_bulk_embedding(["stored text", "new text"], "model")
+
+    assert result == [[0.5, 0.5], [8.0, 1.0]]
+    embed.assert_awaited_once_with(["new text"], "model", dimensions=None)
+    vectorize._store_in_db.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_key_includes_model_and_dimensions(embed):
+    await vectorize.get_bulk_embedding(["text"], "model", dimensions=256)
+    await vectorize.get_bulk_embedding(["text"], "model", dimensions=512)
+    await vectorize.get_bulk_embedding(["text"], "other-model", dimensions=256)
+
+    assert embed.await_count == 3
+
+
+@pytest.mark.anyio
+async def test_shortened_embeddings_are_requested_from_the_api(embed):
+    await vectorize.get_bulk_embedding(["text"], "text-embedding-3-small", dimensions=512)
+
+    assert embed.call_args.kwargs["dimensions"] == 512
+
+
+def test_batches_respect_input_and_token_limits():
+    texts = {f"hash{i}": "x" * 300 for i in range(10)}
+
+    with (
+        patch("qdrant.vectorize.EMBEDDING_BATCH_SIZE", 4),
+        patch("qdrant.vectorize.EMBEDDING_BATCH_TOKENS", 250),
+    ):
+        batches = vectorize.pack_batches(texts)
+
+    assert [len(batch) for batch in batches] == [2, 2, 2, 2, 2]
+    assert sum(batches, []) == list(texts)
+
+    with patch("qdrant.vectorize.EMBEDDING_BATCH_SIZE", 4):
+        assert [len(batch) for batch in vectorize.pack_batches(texts)] == [4, 4, 2]
@@ -0,0 +1,66 @@
+import numpy as np
+from unittest.mock import patch
+
+import qdrant
+from qdrant.storage import (
+    StorageProfile,
+    profile_top_k,
+    quantize_int8,
+    recall_at_k,
+    reduce_dimensions,
+    top_k,
+)
+
+rng = np.random.default_rng(0)
+FRAGMENTS = rng.normal(size=(40, 64)).astype(np.float32)
+QUERIES = rng.normal(size=(10, 64)).astype(np.float32)
+
+
+def recall(profile: StorageProfile, oversampling: float = 2.0) -> float:
+    expected = [top_k(FRAGMENTS, query, 4) for query in QUERIES]
+    found = [profile_top_k(FRAGMENTS, query, profile, 4, oversampling) for query in QUERIES]
+    return recall_at_k(expected, found)
+
+
+def test_reduced_vectors_are_unit_length():
+    reduced = reduce_dimensions(FRAGMENTS, 16)
+
+    assert reduced.shape == (40, 16)
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0)
+
+
+def test_int8_keeps_values_within_one_level():
+    quantized = quantize_int8(FRAGMENTS, quantile=1.0)
+    step = (FRAGMENTS.max() - FRAGMENTS.min()) / 255
+
+    assert np.abs(quantized - FRAGMENTS).max() <= step / 2 + 1e-6
+
+
+def test_full_profile_has_full_recall_and_halfvec_nearly():
+    assert recall(StorageProfile(64)) == 1.0
+    assert recall(StorageProfile(64, "halfvec")) >= 0.95
+
+
+def test_rescoring_recovers_int8_recall():
+    assert recall(StorageProfile(64, quantization="int8"), oversampling=4.0) >= recall(
+        StorageProfile(64, quantization="int8"), oversampling=1.0
+    )
+
+
+def test_profile_sizes():
+    profile = StorageProfile(512, "halfvec", "int8")
+
+    assert profile.postgres_bytes() * 6 == StorageProfile(1536).postgres_bytes()
+    assert profile.qdrant_ram_bytes() == 512
+
+
+def test_search_params_follow_quantization():
+    with patch("qdrant.QDRANT_QUANTIZATION", "none"):
+        assert qdrant.search_params() is None
+        assert qdrant.quantization_config() is None
+        assert not qdrant.vectors_config().on_disk
+
+    with patch("qdrant.QDRANT_QUANTIZATION", "int8"):
+        assert qdrant.search_params().quantization.rescore
+        assert qdrant.quantization_config().scalar.type == "int8"
+        assert qdrant.vectors_config().on_disk
@@ -0,0 +1,136 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import facts
+from facts import geo
+from facts.names import NameIndex
+from schemas.wojewodztwodle import WojewodztwoQuestionEnhanced
+
+
+def square(x: float, y: float) -> dict:
+    ring = [[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def ask(game: str, target: str, question: str, required_info: str):
+    return facts.evaluate(
+        game, target, SimpleNamespace(question=question, required_info=required_info)
+    )
+
+
+def test_adjacency_separates_corner_contacts():
+    features = {"a": square(0, 0), "b": square(1, 0), "c": square(1, 1)}
+
+    neighbours, touching = geo.adjacency(features)
+
+    assert neighbours["a"] == {"b"}
+    assert touching["a"] == {"c"}
+    assert neighbours["b"] == {"a", "c"}
+
+
+def test_interior_point_of_ring_shaped_unit():
+    outer = [[0, 0], [3, 0], [3, 3], [0, 3], [0, 0]]
+    hole = [[1, 1], [2, 1], [2, 2], [1, 2], [1, 1]]
+    ring_shaped = {"type": "Polygon", "coordinates": [outer, hole]}
+
+    point = geo.interior_point(ring_shaped)
+
+    assert geo.contains(ring_shaped, point)
+    assert not geo.contains(square(1, 1), point)
+
+
+def test_polish_names_resolve_inflected_and_reject_ambiguity():
+    index = NameIndex(
+        [
+            "Kraków",
+            "Powiat krakowski",
+            "Powiat bielski (województwo podlaskie)",
+            "Powiat bielski (województwo śląskie)",
+        ],
+        inflected=True,
+        unit="miast",
+    )
+
+    assert index.resolve("powiatem krakowskim") == "Powiat krakowski"
+    assert index.resolve("Krakowa") == "Kraków"
+    assert index.resolve("bielski") is None
+    assert (
+        index.resolve("bielski w województwie śląskim")
+        == "Powiat bielski (województwo śląskie)"
+    )
+
+
+def test_powiat_parent_voivodeship():
+    result = ask(
+        "powiatdle",
+        "Powiat wielicki",
+        "Czy powiat znajduje się w województwie małopolskim?",
+        "Nazwa województwa, w którym leży powiat",
+    )
+
+    assert result.answer is True
+    assert result.explanation == "Powiat leży w województwie małopolskim."
+
+
+def test_wojewodztwo_neighbours():
+    required_info = "Sąsiednie województwa"
+
+    assert ask("wojewodztwodle", "małopolskie", "Czy województwo sąsiaduje ze śląskim?", required_info).answer is True
+    assert ask("wojewodztwodle", "małopolskie", "Czy województwo graniczy z mazowieckim lub łódzkim?", required_info).answer is False
+    # Counted as bordering itself, like the answer prompt says
+    assert ask("wojewodztwodle", "małopolskie", "Czy województwo graniczy z małopolskim?", required_info).answer is True
+
+
+def test_us_state_name_guess_and_corner():
+    assert ask("us_statedle", "Nevada", "Is the state one of the following: California, Texas, or Nevada?", "The name of the state").answer is True
+    assert ask("us_statedle", "Arizona", "Does the state border Texas?", "List of bordering states").answer is False
+    # Four Corners: left to the model
+    assert ask("us_statedle", "Arizona", "Does the state border Colorado?", "List of bordering states") is None
+
+
+@pytest.mark.parametrize(
+    "question, required_info",
+    [
+        # Not routed to a fact
+        ("Czy województwo sąsiaduje ze śląskim?", "Liczba ludności"),
+        # Negated
+        ("Czy województwo nie graniczy ze śląskim?", "Sąsiednie województwa"),
+        # Unknown name
+        ("Czy województwo graniczy z Niemcami?", "Sąsiednie państwa"),
+        # No template
+        ("Czy województwo ma więcej niż 3 miliony mieszkańców?", "Liczba ludności"),
+    ],
+)
+def test_uncertain_questions_fall_through(question, required_info):
+    assert ask("wojewodztwodle", "małopolskie", question, required_info) is None
+
+
+@pytest.mark.anyio
+async def test_ask_question_answers_from_facts_without_retrieval():
+    import wojewodztwodle.utils as wutils
+
+    enhanced = WojewodztwoQuestionEnhanced(
+        original_question="Czy jest nad morzem?",
+        question="Czy województwo ma dostęp do Morza Bałtyckiego?",
+        required_info="Położenie geograficzne i granice morskie województwa",
+        valid=True,
+        explanation=None,
+    )
+    day = SimpleNamespace(id=3, wojewodztwo_id=11)
+
+    with (
+        patch(
+            "wojewodztwodle.utils.WojewodztwoRepository.get",
+            AsyncMock(return_value=SimpleNamespace(nazwa="pomorskie")),
+        ),
+        patch("wojewodztwodle.utils.get_embedding", AsyncMock()) as mock_embed,
+        patch("llm.chat_json", AsyncMock()) as mock_chat,
+    ):
+        question_create, vector = await wutils.ask_question(enhanced, day, None, AsyncMock())
+
+    assert question_create.answer is True
+    assert question_create.context.startswith("[facts]")
+    assert vector is None
+    mock_embed.assert_not_called()
+    mock_chat.assert_not_called()
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import qdrant.local_index as local_index
+from qdrant.utils import (
+    CONTEXT_SEPARATOR,
+    assemble_windows,
+    get_fragments_matching_question,
+    window_texts,
+)
+
+TEXTS = ["f0", "f1", "f2", "f3", "f4", "f5", "f6"]
+WINDOWS = window_texts(TEXTS)
+
+
+def window(ordinal: int) -> dict:
+    return {
+        "country_id": 7,
+        "doc_ordinal": ordinal,
+        "fragment_text": TEXTS[ordinal],
+        "window_text": WINDOWS[ordinal],
+    }
+
+
+def joined(*texts: str) -> str:
+    return CONTEXT_SEPARATOR.join(texts)
+
+
+def test_window_texts_cover_neighbours():
+    assert WINDOWS[0] == joined("f0", "f1")
+    assert WINDOWS[3] == joined("f2", "f3", "f4")
+    assert WINDOWS[6] == joined("f5", "f6")
+
+
+@pytest.mark.parametrize(
+    "ordinals, expected",
+    [
+        ([3], [joined("f2", "f3", "f4")]),
+        # Inside the first window
+        ([3, 4], [joined("f2", "f3", "f4")]),
+        # Right after it
+        ([1, 3], [joined("f0", "f1", "f2", "f3")]),
+        # Apart, ranked order does not matter
+        ([5, 1], [joined("f0", "f1", "f2"), joined("f4", "f5", "f6")]),
+    ],
+)
+def test_assemble_windows_merges_overlaps(ordinals, expected):
+    fragments = assemble_windows([window(ordinal) for ordinal in ordinals])
+
+    assert [fragment.text for fragment in fragments] == expected
+
+
+@pytest.mark.anyio
+async def test_retrieval_is_one_query_with_windows():
+    with (
+        patch.dict(local_index._indexes, clear=True),
+        patch("qdrant.async_client", AsyncMock()) as mock_client,
+    ):
+        mock_client.query_points.return_value = MagicMock(points=[MagicMock(payload=window(3))])
+        fragments, _ = await get_fragments_matching_question(
+            "Does it border Germany?", "country_id", 7, "countries", AsyncMock(), query_vector=[1.0]
+        )
+
+    assert [fragment.text for fragment in fragments] == [joined("f2", "f3", "f4")]
+    mock_client.retrieve.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_pgvector_backend_reads_windows_from_postgres():
+    search = AsyncMock(return_value=[window(5), window(1)])
+
+    with (
+        patch.dict(local_index._indexes, clear=True),
+        patch("qdrant.RETRIEVAL_BACKEND", "pgvector"),
+        patch("qdrant.utils.search_fragments", search),
+        patch("qdrant.async_client", AsyncMock()) as mock_client,
+    ):
+        fragments, _ = await get_fragments_matching_question(
+            "Does it border Germany?", "country_id", 7, "countries", "session", limit=1, query_vector=[1.0]
+        )
+
+    assert [fragment.text for fragment in fragments] == [joined("f4", "f5", "f6")]
+    search.assert_awaited_once_with("session", "countries", 7, [1.0], 1)
+    mock_client.query_points.assert_not_called()
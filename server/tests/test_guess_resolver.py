@@ -0,0 +1,93 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import utils.resolver as resolver
+from utils.resolver import NameResolver, edit_distance, resolver_names
+
+COUNTRIES = [
+    (1, ["Poland", "Republic of Poland"]),
+    (2, ["Austria", "Republic of Austria"]),
+    (3, ["Australia", "Commonwealth of Australia"]),
+    (4, ["United States", "United States of America"]),
+    (5, ["Niger", None]),
+    (6, ["Nigeria", "Federal Republic of Nigeria"]),
+]
+
+
+@pytest.fixture
+def countries():
+    return NameResolver(resolver_names("countrydle", COUNTRIES))
+
+
+@pytest.mark.parametrize(
+    "guess, expected",
+    [
+        ("Poland", 1),
+        ("  POLSKA ", 1),
+        ("Republic of Poland", 1),
+        ("USA", 4),
+        ("Stany Zjednoczone", 4),
+        ("Österreich", 2),
+        # Typos and swapped letters
+        ("Polnad", 1),
+        ("Austrai", 2),
+        ("Australai", 3),
+    ],
+)
+def test_resolves_names_aliases_and_typos(countries, guess, expected):
+    assert countries.resolve(guess) == expected
+
+
+@pytest.mark.parametrize(
+    "guess",
+    [
+        "Nigera",  # one edit from both Niger and Nigeria
+        "Germany or Poland",
+        "Austr",
+        "",
+    ],
+)
+def test_ambiguous_or_unknown_guesses_are_none(countries, guess):
+    assert countries.resolve(guess) is None
+
+
+def test_powiat_namesakes_need_their_voivodeship():
+    powiaty = NameResolver(
+        resolver_names(
+            "powiatdle",
+            [
+                (1, ["Powiat bielski (województwo podlaskie)"]),
+                (2, ["Powiat bielski (województwo śląskie)"]),
+                (3, ["Powiat bialski"]),
+                (4, ["Kraków"]),
+            ],
+        )
+    )
+
+    assert powiaty.resolve("bielski") is None
+    assert powiaty.resolve("Powiat bielski (województwo śląskie)") == 2
+    assert powiaty.resolve("bialski") == 3
+    assert powiaty.resolve("Cracow") == 4
+
+
+def test_edit_distance_stops_at_limit():
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 1) == 2
+
+
+@pytest.mark.anyio
+async def test_give_guess_resolves_without_llm():
+    import countrydle.utils as gutils
+
+    with (
+        patch.dict(resolver._resolvers, clear=True),
+        patch("utils.resolver.load_targets", AsyncMock(return_value=COUNTRIES)),
+        patch("llm.chat_json", AsyncMock()) as mock_chat,
+    ):
+        day = SimpleNamespace(country_id=1)
+        assert await gutils.give_guess("Polska", day, None, AsyncMock()) == {"answer": True}
+        assert await gutils.give_guess("Austria", day, None, AsyncMock()) == {"answer": False}
+        assert await gutils.give_guess("Nigera", day, None, AsyncMock()) == {"answer": None}
+
+    mock_chat.assert_not_called()
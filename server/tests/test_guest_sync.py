@@ -39,6 +39,7 @@ async def test_sync_guest_data_success(async_client: AsyncClient, mock_user, moc
         patch("db.repositories.guess.CountrydleGuessRepository.add_guess", new_callable=AsyncMock) as mock_add_guess,
         patch("db.repositories.countrydle.CountrydleStateRepository.calc_points", new_callable=AsyncMock) as mock_calc_points,
         patch("db.repositories.user.UserRepository.update_points", new_callable=AsyncMock) as mock_update_points,
+        patch("db.repositories.leaderboard.LeaderboardRepository.record_game", new_callable=AsyncMock) as mock_record_game,
         patch("sqlalchemy.ext.asyncio.AsyncSession.execute", new_callable=AsyncMock) as mock_execute,
         patch("countrydle.get_state", new_callable=AsyncMock) as mock_get_final_state
     ):
@@ -103,6 +104,65 @@ async def test_sync_guest_data_success(async_client: AsyncClient, mock_user, moc
         mock_update_state.assert_called_once_with(initial_state)
         mock_add_guess.assert_called_once()
         mock_update_points.assert_called_once()
+        mock_record_game.assert_awaited_once_with("countrydle", initial_state)
+
+@pytest.mark.anyio
+async def test_sync_finished_game_twice_records_it_once(async_client: AsyncClient, mock_user, mock_day, override_get_current_user):
+    with (
+        patch("db.repositories.countrydle.CountrydleRepository.get_day_country_by_date", new_callable=AsyncMock) as mock_get_day,
+        patch("db.repositories.countrydle.CountrydleStateRepository.get_state", new_callable=AsyncMock) as mock_get_state,
+        patch("db.repositories.countrydle.CountrydleStateRepository.update_countrydle_state", new_callable=AsyncMock),
+        patch("db.repositories.user.UserRepository.update_points", new_callable=AsyncMock) as mock_update_points,
+        patch("db.repositories.leaderboard.LeaderboardRepository.record_game", new_callable=AsyncMock) as mock_record_game,
+        patch("countrydle.get_state", new_callable=AsyncMock) as mock_get_final_state
+    ):
+        mock_get_day.return_value = mock_day
+
+        # A game lost without a question or guess passes the progress check on every sync
+        state = MagicMock(spec=CountrydleState)
+        state.questions_asked = 0
+        state.guesses_made = 0
+        state.won = False
+        state.is_game_over = False
+        mock_get_state.return_value = state
+
+        from schemas.countrydle import CountrydleStateResponse, CountrydleStateSchema
+        mock_get_final_state.return_value = CountrydleStateResponse(
+            user=None,
+            date="2023-01-01",
+            state=CountrydleStateSchema(
+                remaining_questions=10,
+                remaining_guesses=3,
+                questions_asked=0,
+                guesses_made=0,
+                is_game_over=True,
+                won=False
+            ),
+            questions=[],
+            guesses=[]
+        )
+
+        sync_payload = {
+            "date": "2023-01-01",
+            "state": {
+                "remaining_questions": 10,
+                "remaining_guesses": 3,
+                "questions_asked": 0,
+                "guesses_made": 0,
+                "is_game_over": True,
+                "won": False
+            },
+            "questions": [],
+            "guesses": []
+        }
+
+        first = await async_client.post("/countrydle/sync", json=sync_payload)
+        second = await async_client.post("/countrydle/sync", json=sync_payload)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        mock_record_game.assert_awaited_once_with("countrydle", state)
+        mock_update_points.assert_awaited_once()
 
 @pytest.mark.anyio
 async def test_sync_guest_data_already_has_progress(async_client: AsyncClient, mock_user, mock_day, override_get_current_user):
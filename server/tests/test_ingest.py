@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from qdrant.ingest import Corpus, ingest
+
+CORPUS = Corpus(
+    name="powiaty",
+    csv_file="powiaty.csv",
+    entity_model=MagicMock(),
+    name_column="nazwa",
+    new_entity=MagicMock(),
+    fragment_model=MagicMock(),
+    filter_key="powiat_id",
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / "data"
+    (data / "pages").mkdir(parents=True)
+    rows = ["name,md_file"]
+    for i in range(5):
+        rows.append(f"powiat {i},data/pages/{i}.md")
+        if i != 3:
+            (data / "pages" / f"{i}.md").write_text(f"Powiat {i} lies in Poland.\n\nIt has a river.")
+    rows.append("powiat 0,data/pages/0.md")
+    (data / "powiaty.csv").write_text("\n".join(rows))
+    with patch("qdrant.ingest.find_data_dir", return_value=str(data)):
+        yield data
+
+
+@pytest.mark.anyio
+async def test_only_entities_without_fragments_are_stored(data_dir):
+    ids = {f"powiat {i}": 10 + i for i in range(5)}
+    with (
+        patch("qdrant.ingest.resolve_entities", AsyncMock(return_value=ids)),
+        patch("qdrant.ingest.ingested_entities", AsyncMock(return_value={11})),
+        patch("qdrant.ingest.store_group", AsyncMock()) as mock_store,
+        patch("qdrant.ingest.INGEST_GROUP_SIZE", 2),
+    ):
+        await ingest(AsyncMock(), CORPUS)
+
+    stored = [document for call in mock_store.await_args_list for document in call.args[1]]
+    # powiat 1 is done, powiat 3 has no file and the duplicate row is stored once
+    assert sorted(document.entity_id for document in stored) == [10, 12, 14]
+    assert all(document.texts for document in stored)
+    assert mock_store.await_count == 2
@@ -0,0 +1,183 @@
+import base64
+import json
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from db.repositories.leaderboard import (
+    LeaderboardRepository,
+    decode_cursor,
+    encode_cursor,
+    month_period,
+)
+
+
+def mock_session(rows=()):
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=list(rows))))
+    session.scalar = AsyncMock()
+    return session
+
+
+def board_row(user_id, points, wins, games_played=5, streak=0):
+    score = SimpleNamespace(
+        period="all", user_id=user_id, points=points, wins=wins, games_played=games_played
+    )
+    return SimpleNamespace(LeaderboardScore=score, username=f"player{user_id}", streak=streak)
+
+
+@pytest.mark.anyio
+async def test_record_game_upserts_month_and_all_time():
+    session = mock_session()
+    session.execute.return_value.one.return_value = (date(2026, 3, 14), False)
+    state = SimpleNamespace(user_id=3, day_id=7, points=450, won=True)
+
+    await LeaderboardRepository(session).record_game("powiatdle", state)
+
+    stmt = session.execute.await_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (game, period, user_id) DO UPDATE" in sql
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert {params["period_m0"], params["period_m1"]} == {"2026-03", "all"}
+    assert params["points_m0"] == 450 and params["wins_m0"] == 1
+    session.commit.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_record_game_skips_synthetic_players():
+    session = mock_session()
+    session.execute.return_value.one.return_value = (date(2026, 3, 14), True)
+
+    await LeaderboardRepository(session).record_game("powiatdle", SimpleNamespace(user_id=3, day_id=7))
+
+    session.execute.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_monthly_leaderboard_is_ranked_in_order():
+    session = mock_session([board_row(1, 900, 3, streak=2), board_row(2, 400, 1)])
+
+    entries = await LeaderboardRepository(session).get_leaderboard("countrydle", "monthly", limit=2)
+
+    assert [(entry.id, entry.rank, entry.streak) for entry in entries] == [(1, 1, 2), (2, 2, 0)]
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "LIMIT" in sql and "user_points" in sql
+    assert month_period(date.today()) in str(
+        session.execute.await_args.args[0].compile(compile_kwargs={"literal_binds": True})
+    )
+
+
+@pytest.mark.anyio
+async def test_average_leaderboard_reports_average():
+    session = mock_session([board_row(1, 1001, 4, games_played=6)])
+
+    [entry] = await LeaderboardRepository(session).get_leaderboard("wojewodztwodle", "average")
+
+    assert entry.average_points == 166.83
+    assert entry.games_played == 6
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "user_points" not in sql
+
+
+@pytest.mark.anyio
+async def test_user_rank_counts_players_ahead():
+    session = mock_session()
+    session.execute.return_value = MagicMock(first=MagicMock(return_value=board_row(5, 300, 2)))
+    session.scalar.return_value = 41
+
+    entry = await LeaderboardRepository(session).get_user_rank("us_statedle", 5)
+
+    assert (entry.id, entry.rank) == (5, 42)
+
+
+@pytest.mark.anyio
+async def test_unknown_leaderboard_type_is_empty():
+    session = mock_session()
+    repository = LeaderboardRepository(session)
+
+    assert await repository.get_leaderboard("countrydle", "weekly") == []
+    assert await repository.get_user_rank("countrydle", 1, "weekly") is None
+    session.execute.assert_not_called()
+
+
+def test_cursor_round_trip_and_garbage():
+    last, rank = decode_cursor(encode_cursor(board_row(9, 700, 4).LeaderboardScore, 40))
+
+    assert (last.points, last.wins, last.games_played, last.user_id, rank) == (700, 4, 5, 9, 40)
+    with pytest.raises(HTTPException):
+        decode_cursor("not a cursor")
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        [700, 4, 0, 9, 40],  # the average board divides by games_played
+        [700, 4, 5, "9", 40],
+        [700.5, 4, 5, 9, 40],
+        [700, 4, True, 9, 40],
+        [700, 4, 5, 9],
+        {"points": 700},
+    ],
+)
+def test_cursor_with_invalid_keys_is_rejected(key):
+    cursor = base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_page_continues_after_cursor():
+    rows = [board_row(user_id, 1000 - user_id, 1) for user_id in range(1, 4)]
+    session = mock_session(rows)
+    cursor = encode_cursor(board_row(7, 1200, 2).LeaderboardScore, 20)
+
+    page = await LeaderboardRepository(session).get_page("powiatdle", "monthly", limit=2, cursor=cursor)
+
+    assert [entry.rank for entry in page.entries] == [21, 22]
+    last, rank = decode_cursor(page.next_cursor)
+    assert (last.user_id, rank) == (2, 22)
+    sql = str(session.execute.await_args.args[0].compile(compile_kwargs={"literal_binds": True}))
+    assert "leaderboard_scores.points <= 1200" in sql
+
+
+@pytest.mark.anyio
+async def test_last_page_has_no_cursor():
+    session = mock_session([board_row(1, 10, 0)])
+
+    page = await LeaderboardRepository(session).get_page("powiatdle", "monthly", limit=2)
+
+    assert page.next_cursor is None
+
+
+@pytest.mark.anyio
+async def test_around_user_ranks_neighbours():
+    me = board_row(5, 300, 2)
+    session = mock_session()
+    session.execute.side_effect = [
+        MagicMock(first=MagicMock(return_value=me)),
+        # Closest first, as the reversed order returns them
+        MagicMock(all=MagicMock(return_value=[board_row(4, 310, 2), board_row(3, 320, 2)])),
+        MagicMock(all=MagicMock(return_value=[board_row(6, 290, 2)])),
+    ]
+    session.scalar.return_value = 9
+
+    entries = await LeaderboardRepository(session).get_around_user("countrydle", 5, neighbours=2)
+
+    assert [(entry.id, entry.rank) for entry in entries] == [(3, 8), (4, 9), (5, 10), (6, 11)]
+
+
+@pytest.mark.anyio
+async def test_percentile_is_share_ranked_below():
+    session = mock_session()
+    session.execute.return_value = MagicMock(first=MagicMock(return_value=board_row(5, 300, 2)))
+    session.scalar.side_effect = [9, 200]
+
+    percentile = await LeaderboardRepository(session).get_percentile("countrydle", 5)
+
+    assert (percentile.rank, percentile.total, percentile.percentile) == (10, 200, 95.0)
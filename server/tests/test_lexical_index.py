@@ -0,0 +1,136 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+import qdrant.lexical as lexical
+import qdrant.local_index as local_index
+from qdrant.lexical import LexicalIndex, reciprocal_rank_fusion
+from qdrant.local_index import TargetIndex
+from qdrant.utils import CONTEXT_SEPARATOR, get_fragments_matching_question, window_texts
+
+ROWS = [
+    (7, 0, "Poland is a country in Central Europe."),
+    (7, 1, "The Vistula is the longest river of Poland, it flows through Kraków and Warsaw."),
+    (7, 2, "The climate of the country is temperate."),
+    (7, 3, "Poland borders Germany, Czechia, Slovakia, Ukraine, Belarus, Lithuania and Russia."),
+    (8, 0, "The Danube flows through Vienna."),
+]
+
+
+@pytest.fixture
+def index():
+    return LexicalIndex.build(ROWS)
+
+
+def test_search_ranks_fragments_of_one_target(index):
+    assert index.search(7, "Does the Vistula flow through the country?")[0] == 1
+    assert index.search(7, "Does it border Germany?") == [3]
+    # Other targets' fragments are never returned
+    assert index.search(7, "Does the Danube flow through it?") == [1]
+    assert index.search(9, "Vistula") == []
+
+
+def test_polish_inflections_share_a_stem():
+    index = LexicalIndex.build([(1, 0, "Przez powiat przepływa Wisła."), (1, 1, "Stolicą jest Kraków.")])
+
+    assert index.search(1, "Czy przez powiat przepływa rzeka Wisły?") == [0]
+
+
+def test_saved_index_is_memory_mapped(index, tmp_path):
+    index.save(tmp_path)
+    loaded = LexicalIndex.load(tmp_path)
+
+    assert loaded.search(7, "Germany") == index.search(7, "Germany")
+    assert loaded.terms.filename is not None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    assert reciprocal_rank_fusion([[1, 2, 3], [2, 4]]) == [2, 1, 4, 3]
+
+
+@pytest.mark.anyio
+async def test_lexical_match_reaches_the_prompt(index):
+    # Dense similarity prefers the intro, only the lexical index knows the river
+    target = TargetIndex(
+        [text for _, _, text in ROWS[:4]],
+        [[1.0, 0.0], [0.6, 0.8], [0.9, 0.1], [0.0, 1.0]],
+    )
+
+    with (
+        patch.dict(lexical._indexes, {"countries": index}),
+        patch.dict(local_index._indexes, {("countries", 7): target}),
+    ):
+        fragments, _ = await get_fragments_matching_question(
+            "Does the Vistula flow through the country?",
+            "country_id",
+            7,
+            "countries",
+            AsyncMock(),
+            query_vector=[1.0, 0.0],
+        )
+
+    assert ROWS[1][2] in [fragment.text for fragment in fragments]
+
+
+@pytest.mark.anyio
+async def test_stale_saved_index_is_rebuilt(index, tmp_path):
+    indexed = local_index.INDEXED_COLLECTIONS[0]
+    path = tmp_path / indexed.collection_name
+    index.save(path)
+    (path / lexical.SOURCE_FILE).write_text('{"fragments": 5, "max_id": 5}')
+
+    rebuilt = LexicalIndex.build(ROWS[:2])
+    with (
+        patch.object(lexical, "LEXICAL_INDEX_DIR", tmp_path),
+        patch.object(lexical, "INDEXED_COLLECTIONS", [indexed]),
+        patch.object(lexical, "fragments_source", AsyncMock(return_value={"fragments": 2, "max_id": 9})),
+        patch.object(lexical, "build_collection_index", AsyncMock(return_value=rebuilt)) as mock_build,
+        patch.dict(lexical._indexes, clear=True),
+    ):
+        await lexical.load_lexical_indexes(AsyncMock())
+        assert lexical._indexes[indexed.collection_name] is rebuilt
+        assert lexical.saved_source(path) == {"fragments": 2, "max_id": 9}
+
+        # Saved from the current fragments, the next start maps it instead
+        await lexical.load_lexical_indexes(AsyncMock())
+        mock_build.assert_awaited_once()
+        assert len(lexical._indexes[indexed.collection_name]) == 2
+
+
+@pytest.mark.anyio
+async def test_local_and_database_targets_fuse_alike():
+    texts = [
+        "Poland is a country in Central Europe.",
+        "Its capital is Warsaw.",
+        "The Vistula crosses the country.",
+        "The climate is temperate.",
+        "Poland borders Germany.",
+        "The Baltic Sea lies to the north.",
+    ]
+    vectors = [[1.0, 0.0], [0.6, 0.8], [0.0, 1.0], [0.8, 0.6], [0.95, 0.31], [0.9, 0.44]]
+    dense_order = [0, 4, 5, 3, 1, 2]
+    windows = [
+        {"doc_ordinal": ordinal, "fragment_text": text, "window_text": window}
+        for ordinal, (text, window) in enumerate(zip(texts, window_texts(texts)))
+    ]
+
+    async def search_fragments(session, collection_name, target_id, query_vector, limit):
+        return [windows[ordinal] for ordinal in dense_order[:limit]]
+
+    async def context(local: bool) -> str:
+        local_indexes = {("countries", 7): TargetIndex(texts, vectors)} if local else {}
+        with (
+            patch.dict(lexical._indexes, {"countries": LexicalIndex.build((7, o, t) for o, t in enumerate(texts))}),
+            patch.dict(local_index._indexes, local_indexes, clear=True),
+            patch("qdrant.utils.HYBRID_CANDIDATES", 1),
+            patch("qdrant.RETRIEVAL_BACKEND", "pgvector"),
+            patch("qdrant.utils.search_fragments", search_fragments),
+        ):
+            fragments, _ = await get_fragments_matching_question(
+                "Does the Vistula flow there?", "country_id", 7, "countries", AsyncMock(),
+                limit=2, query_vector=[1.0, 0.0],
+            )
+        return CONTEXT_SEPARATOR.join(fragment.text for fragment in fragments)
+
+    # The Vistula fragment is no dense candidate, so neither backend adds it
+    assert await context(local=True) == await context(local=False)
+    assert "Vistula" not in await context(local=True)
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import llm
+
+
+def make_completion(content: dict):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = json.dumps(content)
+    return response
+
+
+@pytest.mark.anyio
+async def test_chat_json_parses_answer():
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(
+        return_value=make_completion({"answer": True})
+    )
+
+    with patch("llm.get_llm_client", return_value=mock_client):
+        answer = await llm.chat_json([{"role": "user", "content": "Is it Poland?"}])
+
+    assert answer == {"answer": True}
+    kwargs = mock_client.chat.completions.create.call_args.kwargs
+    assert kwargs["temperature"] == 0.0
+    assert kwargs["timeout"] == llm.LLM_TIMEOUT
+
+
+@pytest.mark.anyio
+async def test_chat_json_bounds_concurrency():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_create(**kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return make_completion({"answer": False})
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = slow_create
+
+    with (
+        patch("llm.get_llm_client", return_value=mock_client),
+        patch("llm.semaphore", asyncio.Semaphore(3)),
+    ):
+        await asyncio.gather(
+            *(llm.chat_json([{"role": "user", "content": str(i)}]) for i in range(10))
+        )
+
+    assert max_in_flight == 3
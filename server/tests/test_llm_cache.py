@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+import metrics
+from llm.cache import LRUCache, cached_enhancement, normalize_question
+from schemas.countrydle import QuestionEnhanced
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_normalize_question_folds_case_punctuation_and_spaces():
+    assert normalize_question("  Czy  graniczy z NIEMCAMI?! ") == "czy graniczy z niemcami"
+    assert normalize_question("Is it in Europe?") == normalize_question("is it in europe")
+    assert normalize_question("Czy jest w Łodzi?") == "czy jest w łodzi"
+
+
+def test_lru_cache_evicts_and_expires():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    expired = LRUCache(maxsize=2, ttl=0)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+    assert expired.expirations == 1
+
+
+@pytest.mark.anyio
+async def test_cached_enhancement_calls_llm_once_per_normalized_question():
+    calls = 0
+
+    @cached_enhancement("test", QuestionEnhanced)
+    async def enhance(question: str) -> QuestionEnhanced:
+        nonlocal calls
+        calls += 1
+        return QuestionEnhanced(
+            original_question=question,
+            question="Is the country located in Europe?",
+            valid=True,
+            explanation=None,
+        )
+
+    with (
+        patch("llm.cache._load_from_db", AsyncMock(return_value=None)) as mock_load,
+        patch("llm.cache._store_in_db", AsyncMock()) as mock_store,
+    ):
+        first = await enhance("Is it in Europe?")
+        second = await enhance("is it in europe")
+
+    assert calls == 1
+    assert mock_load.await_count == 1
+    assert mock_store.await_count == 1
+    assert second.question == first.question
+    assert second.original_question == "is it in europe"
+    assert metrics.get("enhance_cache.test.memory_hits") == 1
+    assert metrics.snapshot()["gauges"]["enhance_cache.test.hit_rate"] == 0.5
+
+
+@pytest.mark.anyio
+async def test_cached_enhancement_uses_shared_db_tier():
+    enhance_llm = AsyncMock()
+    stored = {"question": "Does the country border Germany?", "valid": True, "explanation": None}
+
+    @cached_enhancement("test_db", QuestionEnhanced)
+    async def enhance(question: str) -> QuestionEnhanced:
+        return await enhance_llm(question)
+
+    with patch("llm.cache._load_from_db", AsyncMock(return_value=stored)):
+        enhanced = await enhance("Does it border Germany?")
+
+    enhance_llm.assert_not_awaited()
+    assert enhanced.question == "Does the country border Germany?"
+    assert metrics.get("enhance_cache.test_db.db_hits") == 1
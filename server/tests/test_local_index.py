@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import qdrant.local_index as local_index
+from qdrant.local_index import TargetIndex
+from qdrant.utils import get_fragments_matching_question
+
+TEXTS = ["intro", "borders", "rivers", "economy", "sport"]
+EMBEDDINGS = [
+    [1.0, 0.0, 0.0],
+    [0.0, 2.0, 0.0],  # rows are normalized, the length does not matter
+    [0.0, 0.0, 1.0],
+    [0.7, 0.7, 0.0],
+    [0.0, 0.0, 0.0],
+]
+
+
+def test_search_ranks_by_cosine_similarity():
+    index = TargetIndex(TEXTS, EMBEDDINGS)
+
+    assert index.search([0.0, 1.0, 0.0], limit=2) == [1, 3]
+    assert index.search([0.0, 1.0, 0.0], limit=10)[:2] == [1, 3]
+
+
+def test_context_adds_neighbours_in_document_order():
+    index = TargetIndex(TEXTS, EMBEDDINGS)
+
+    assert index.context([0.0, 0.0, 1.0], limit=1) == ["borders", "rivers", "economy"]
+    assert index.context([1.0, 0.0, 0.0], limit=1) == ["intro", "borders"]
+
+
+@pytest.mark.anyio
+async def test_retrieval_uses_local_index_for_live_targets():
+    with (
+        patch.dict(local_index._indexes, {("countries", 7): TargetIndex(TEXTS, EMBEDDINGS)}),
+        patch("qdrant.async_client", AsyncMock()) as mock_client,
+        patch("qdrant.utils.get_embedding", AsyncMock(return_value=[0.0, 1.0, 0.0])),
+    ):
+        fragments, vector = await get_fragments_matching_question(
+            "Does it border Germany?", "country_id", 7, "countries", AsyncMock()
+        )
+
+    assert [fragment.text for fragment in fragments] == ["intro", "borders", "rivers"]
+    assert vector == [0.0, 1.0, 0.0]
+    mock_client.query_points.assert_not_called()
+    mock_client.retrieve.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_cold_targets_fall_back_to_qdrant():
+    with (
+        patch.dict(local_index._indexes, clear=True),
+        patch("qdrant.async_client", AsyncMock()) as mock_client,
+    ):
+        mock_client.query_points.return_value = MagicMock(points=[])
+        fragments, _ = await get_fragments_matching_question(
+            "Does it border Germany?", "country_id", 7, "countries", AsyncMock(), query_vector=[1.0]
+        )
+
+    assert fragments == []
+    mock_client.query_points.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_qdrant_fallback_fetches_neighbours_of_the_same_target():
+    # Synced before windows were stored
+    hit = MagicMock(id=11, payload={"country_id": 7, "fragment_text": "hit"})
+    neighbours = [
+        MagicMock(id=12, payload={"country_id": 7, "fragment_text": "after"}),
+        MagicMock(id=10, payload={"country_id": 8, "fragment_text": "other country"}),
+        MagicMock(id=11, payload={"country_id": 7, "fragment_text": "hit"}),
+    ]
+
+    with (
+        patch.dict(local_index._indexes, clear=True),
+        patch("qdrant.async_client", AsyncMock()) as mock_client,
+    ):
+        mock_client.query_points.return_value = MagicMock(points=[hit])
+        mock_client.retrieve.return_value = neighbours
+        fragments, _ = await get_fragments_matching_question(
+            "Does it border Germany?", "country_id", 7, "countries", AsyncMock(), query_vector=[1.0]
+        )
+
+    assert [fragment.text for fragment in fragments] == ["hit", "after"]
+    assert sorted(mock_client.retrieve.call_args.kwargs["ids"]) == [10, 11, 12]
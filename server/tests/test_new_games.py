@@ -141,6 +141,10 @@ async def test_us_statedle_guess_correct(async_client, mock_user_override):
             "db.repositories.us_statedle.USStatedleStateRepository.update_state",
             new_callable=AsyncMock,
         ) as mock_update_state,
+        patch(
+            "db.repositories.leaderboard.LeaderboardRepository.record_game",
+            new_callable=AsyncMock,
+        ) as mock_record_game,
     ):
         # Mock Day
         mock_day = MagicMock()
@@ -175,6 +179,7 @@ async def test_us_statedle_guess_correct(async_client, mock_user_override):
         data = response.json()
         assert data["answer"] is True
         assert mock_update_state.called
+        assert mock_record_game.await_args.args[1] is mock_state
 
 
 @pytest.mark.anyio
@@ -196,6 +201,10 @@ async def test_wojewodztwodle_guess_correct(async_client, mock_user_override):
             "db.repositories.wojewodztwodle.WojewodztwodleStateRepository.update_state",
             new_callable=AsyncMock,
         ) as mock_update_state,
+        patch(
+            "db.repositories.leaderboard.LeaderboardRepository.record_game",
+            new_callable=AsyncMock,
+        ) as mock_record_game,
     ):
         # Mock Day
         mock_day = MagicMock()
@@ -230,3 +239,56 @@ async def test_wojewodztwodle_guess_correct(async_client, mock_user_override):
         data = response.json()
         assert data["answer"] is True
         assert mock_update_state.called
+        assert mock_record_game.await_args.args[1] is mock_state
+
+
+@pytest.mark.anyio
+async def test_wojewodztwodle_unresolved_guess_is_neither(async_client, mock_user_override):
+    with (
+        patch(
+            "db.repositories.wojewodztwodle.WojewodztwodleDayRepository.get_today_wojewodztwo",
+            new_callable=AsyncMock,
+        ) as mock_get_today,
+        patch(
+            "db.repositories.wojewodztwodle.WojewodztwodleStateRepository.get_state",
+            new_callable=AsyncMock,
+        ) as mock_get_state,
+        patch(
+            "db.repositories.wojewodztwodle.WojewodztwodleGuessRepository.add_guess",
+            new_callable=AsyncMock,
+        ) as mock_add_guess,
+        patch(
+            "db.repositories.wojewodztwodle.WojewodztwodleStateRepository.update_state",
+            new_callable=AsyncMock,
+        ),
+        patch("wojewodztwodle.resolve_guess", new_callable=AsyncMock, return_value=None),
+    ):
+        mock_day = MagicMock()
+        mock_day.id = 1
+        mock_day.wojewodztwo_id = 5
+        mock_get_today.return_value = mock_day
+
+        mock_state = MagicMock()
+        mock_state.remaining_guesses = 3
+        mock_state.remaining_questions = 10
+        mock_state.guesses_made = 0
+        mock_state.won = False
+        mock_state.is_game_over = False
+        mock_get_state.return_value = mock_state
+
+        from datetime import datetime
+
+        mock_guess_result = MagicMock()
+        mock_guess_result.id = 1
+        mock_guess_result.guess = "Atlantyda"
+        mock_guess_result.wojewodztwo_id = None
+        mock_guess_result.answer = None
+        mock_guess_result.guessed_at = datetime.now()
+        mock_add_guess.return_value = mock_guess_result
+
+        response = await async_client.post("/wojewodztwodle/guess", json={"guess": "Atlantyda"})
+        assert response.status_code == 200
+        assert response.json()["answer"] is None
+        # Stored like countrydle's: neither a hit nor a miss
+        assert mock_add_guess.await_args.args[0].answer is None
+        assert mock_state.won is False
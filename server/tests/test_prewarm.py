@@ -0,0 +1,114 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import metrics
+from schemas.countrydle import QuestionCreate, QuestionEnhanced
+from utils.prewarm import PrewarmGame, prewarm_point_id, prewarm_question
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def game():
+    enhanced = QuestionEnhanced(
+        original_question="Is the country located in Europe?",
+        question="Is the country located in Europe?",
+        valid=True,
+        explanation=None,
+    )
+    answered = QuestionCreate(
+        user_id=None,
+        day_id=1,
+        original_question=enhanced.original_question,
+        valid=True,
+        question=enhanced.question,
+        answer=True,
+        explanation="Poland is in Central Europe.",
+        context="Poland is a country in Central Europe.",
+    )
+    utils = SimpleNamespace(
+        enhance_question=AsyncMock(return_value=enhanced),
+        ask_question=AsyncMock(return_value=(answered, [0.1] * 1536)),
+    )
+    return PrewarmGame(
+        "countrydle",
+        utils,
+        MagicMock(),
+        "get_day_country_by_date",
+        MagicMock(),
+        "country_id",
+        "countries_questions",
+    )
+
+
+def test_point_id_is_stable_across_wordings():
+    first = prewarm_point_id("countries_questions", 100, "Is the country in Europe?")
+    second = prewarm_point_id("countries_questions", 100, "is the country in europe")
+    other = prewarm_point_id("countries_questions", 101, "Is the country in Europe?")
+
+    assert first == second
+    assert first != other
+
+
+@pytest.mark.anyio
+async def test_prewarm_question_stores_answer_under_deterministic_id(game):
+    day = MagicMock()
+    day.country_id = 100
+
+    with (
+        patch("utils.prewarm.get_points", AsyncMock(return_value=[])),
+        patch("utils.prewarm.AsyncSessionLocal", MagicMock()),
+        patch("utils.prewarm.add_question_to_qdrant", AsyncMock()) as mock_add,
+    ):
+        await prewarm_question(game, day, "Is the country located in Europe?")
+
+    kwargs = mock_add.call_args.kwargs
+    assert kwargs["point_id"] == prewarm_point_id(
+        "countries_questions", 100, "Is the country located in Europe?"
+    )
+    assert kwargs["filter_value"] == 100
+    assert metrics.get("prewarm.countrydle.answered") == 1
+
+
+@pytest.mark.anyio
+async def test_prewarm_question_resumes_past_finished_points(game):
+    day = MagicMock()
+    day.country_id = 100
+
+    with (
+        patch("utils.prewarm.get_points", AsyncMock(return_value=[MagicMock()])),
+        patch("utils.prewarm.add_question_to_qdrant", AsyncMock()) as mock_add,
+    ):
+        await prewarm_question(game, day, "Is the country located in Europe?")
+
+    game.utils.enhance_question.assert_not_awaited()
+    mock_add.assert_not_awaited()
+    assert metrics.get("prewarm.countrydle.skipped") == 1
+
+
+@pytest.mark.anyio
+async def test_prewarm_question_stores_answers_given_without_a_vector(game):
+    # The facts store and the answer cache answer without embedding the question
+    answered, _ = game.utils.ask_question.return_value
+    game.utils.ask_question.return_value = (answered, None)
+    day = MagicMock()
+    day.country_id = 100
+
+    with (
+        patch("utils.prewarm.get_points", AsyncMock(return_value=[])),
+        patch("utils.prewarm.AsyncSessionLocal", MagicMock()),
+        patch("utils.prewarm.get_embedding", AsyncMock(return_value=[0.2] * 1536)),
+        patch("utils.prewarm.add_question_to_qdrant", AsyncMock()) as mock_add,
+    ):
+        await prewarm_question(game, day, "Is the country located in Europe?")
+
+    assert mock_add.call_args.args[1] == [0.2] * 1536
+    assert mock_add.call_args.kwargs["point_id"] == prewarm_point_id(
+        "countries_questions", 100, "Is the country located in Europe?"
+    )
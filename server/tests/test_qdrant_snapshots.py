@@ -0,0 +1,93 @@
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import qdrant
+from qdrant import snapshots
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    directory = tmp_path / "countries"
+    directory.mkdir()
+    for age, name in enumerate(["newest", "older", "oldest"]):
+        path = directory / f"{name}.snapshot"
+        path.write_bytes(b"")
+        os.utime(path, (1000 - age, 1000 - age))
+    (directory / "partial.part").write_bytes(b"")
+    with patch("qdrant.snapshots.QDRANT_SNAPSHOT_DIR", tmp_path):
+        yield directory
+
+
+@pytest.fixture
+def client():
+    with patch("qdrant.async_client", AsyncMock()) as mock_client:
+        yield mock_client
+
+
+def collection_info(size: int, quantized: bool = False):
+    info = MagicMock(points_count=10)
+    info.config.params.vectors.size = size
+    info.config.params.vectors.on_disk = quantized
+    info.config.quantization_config = MagicMock() if quantized else None
+    return info
+
+
+def test_local_snapshots_newest_first(snapshot_dir):
+    names = [path.name for path in snapshots.local_snapshots("countries")]
+
+    assert names == ["newest.snapshot", "older.snapshot", "oldest.snapshot"]
+    assert snapshots.local_snapshots("powiaty") == []
+
+
+@pytest.mark.anyio
+async def test_restores_newest_snapshot(snapshot_dir, client):
+    client.get_collection.return_value = collection_info(qdrant.EMBEDDING_SIZE)
+
+    with patch("qdrant.snapshots.restore_collection", AsyncMock()) as mock_restore:
+        assert await snapshots.restore_latest("countries")
+
+    assert mock_restore.call_args.args[1].name == "newest.snapshot"
+    client.delete_collection.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_snapshot_of_another_size_is_dropped(snapshot_dir, client):
+    client.get_collection.return_value = collection_info(qdrant.EMBEDDING_SIZE * 2)
+
+    with patch("qdrant.snapshots.restore_collection", AsyncMock()):
+        assert not await snapshots.restore_latest("countries")
+
+    client.delete_collection.assert_awaited_once_with("countries")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("quantization, quantized", [("none", True), ("int8", False)])
+async def test_snapshot_of_another_quantization_is_dropped(snapshot_dir, client, quantization, quantized):
+    client.get_collection.return_value = collection_info(qdrant.EMBEDDING_SIZE, quantized)
+
+    with (
+        patch("qdrant.QDRANT_QUANTIZATION", quantization),
+        patch("qdrant.snapshots.restore_collection", AsyncMock()),
+    ):
+        assert not await snapshots.restore_latest("countries")
+
+    client.delete_collection.assert_awaited_once_with("countries")
+
+
+@pytest.mark.anyio
+async def test_snapshot_in_current_profile_is_kept(snapshot_dir, client):
+    client.get_collection.return_value = collection_info(qdrant.EMBEDDING_SIZE, quantized=True)
+
+    with patch("qdrant.QDRANT_QUANTIZATION", "int8"):
+        assert await snapshots.check_restored("countries")
+
+    client.delete_collection.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_without_snapshot_nothing_is_restored(snapshot_dir, client):
+    with patch("qdrant.snapshots.restore_collection", AsyncMock()) as mock_restore:
+        assert not await snapshots.restore_latest("powiaty")
+
+    mock_restore.assert_not_called()
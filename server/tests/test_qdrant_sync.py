@@ -0,0 +1,50 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from qdrant.sync import sync_collection
+
+ORPHAN_UUID = "0f8e7d6c-5b4a-4392-8170-6f5e4d3c2b1a"
+
+
+@pytest.fixture
+def stores():
+    postgres = {1: "a", 2: "b", 3: "c-edited", 4: "d"}
+    qdrant = {1: "a", 2: "b", 3: "c", 9: "removed", ORPHAN_UUID: None}
+
+    async def points(session, indexed, ids, hashes):
+        return [MagicMock(id=point_id) for point_id in ids]
+
+    with (
+        patch("qdrant.sync.postgres_hashes", AsyncMock(return_value=postgres)),
+        patch("qdrant.sync.qdrant_hashes", AsyncMock(return_value=qdrant)),
+        patch("qdrant.sync.fragment_points", AsyncMock(side_effect=points)) as mock_points,
+        patch("qdrant.sync.upsert_in_batches", AsyncMock()) as mock_upsert,
+    ):
+        yield mock_points, mock_upsert
+
+
+@pytest.mark.anyio
+async def test_only_changed_fragments_are_upserted(stores):
+    mock_points, mock_upsert = stores
+    client = AsyncMock()
+
+    result = await sync_collection(AsyncMock(), client, "powiaty")
+
+    assert (result.upserted, result.deleted, result.unchanged) == (2, 2, 2)
+    assert mock_points.call_args.args[2] == [3, 4]
+    mock_upsert.assert_awaited_once()
+    deleted = client.delete.call_args.kwargs["points_selector"].points
+    assert sorted(map(str, deleted)) == sorted(["9", ORPHAN_UUID])
+
+
+@pytest.mark.anyio
+async def test_dry_run_writes_nothing(stores):
+    mock_points, mock_upsert = stores
+    client = AsyncMock()
+
+    result = await sync_collection(AsyncMock(), client, "powiaty", dry_run=True)
+
+    assert (result.upserted, result.deleted) == (2, 2)
+    mock_points.assert_not_called()
+    mock_upsert.assert_not_called()
+    client.delete.assert_not_called()
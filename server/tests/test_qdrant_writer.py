@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from qdrant_client.models import PointStruct
+
+from qdrant.utils import add_question_to_qdrant
+from qdrant.writer import QdrantWriter
+
+
+def point(point_id: int) -> PointStruct:
+    return PointStruct(id=point_id, vector=[0.1, 0.2], payload={})
+
+
+@pytest.fixture
+def client():
+    with patch("qdrant.async_client", AsyncMock()) as mock_client:
+        yield mock_client
+
+
+@pytest.mark.anyio
+async def test_points_are_batched_per_collection(client):
+    writer = QdrantWriter(batch_size=3, interval=0.05)
+    writer.start()
+    for point_id in range(5):
+        writer.submit("countries_questions", point(point_id))
+    writer.submit("powiaty_questions", point(10))
+    await writer.stop()
+
+    written = {}
+    for call in client.upsert.await_args_list:
+        written.setdefault(call.kwargs["collection_name"], []).append(
+            [p.id for p in call.kwargs["points"]]
+        )
+    assert sum(written["countries_questions"], []) == [0, 1, 2, 3, 4]
+    assert all(len(batch) <= 3 for batch in written["countries_questions"])
+    assert written["powiaty_questions"] == [[10]]
+    assert writer.depth == 0
+
+
+@pytest.mark.anyio
+async def test_failed_upsert_is_retried(client):
+    client.upsert.side_effect = [Exception("unavailable"), None]
+    writer = QdrantWriter(interval=0.01, backoff=0)
+    writer.start()
+    writer.submit("countries_questions", point(1))
+    await writer.stop()
+
+    assert client.upsert.await_count == 2
+
+
+@pytest.mark.anyio
+async def test_full_queue_drops_instead_of_blocking(client):
+    writer = QdrantWriter(max_size=1, interval=0.01)
+    writer.start()
+    assert writer.submit("countries_questions", point(1))
+    assert writer.submit("countries_questions", point(2))
+    await writer.stop()
+
+    ids = [p.id for call in client.upsert.await_args_list for p in call.kwargs["points"]]
+    assert ids == [1]
+
+
+@pytest.mark.anyio
+async def test_question_upserts_directly_without_running_writer(client):
+    question = MagicMock(id=7, question="Is it big?", answer=True, explanation="", context="")
+
+    await add_question_to_qdrant(
+        question, [0.1, 0.2], "country_id", 1, collection_name="countries_questions"
+    )
+
+    client.upsert.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_question_with_pending_vector_is_written_when_ready(client):
+    writer = QdrantWriter(interval=0.01)
+    writer.start()
+    embedded = asyncio.Event()
+
+    async def embed():
+        await embedded.wait()
+        return [0.1, 0.2]
+
+    question = MagicMock(id=7, question="Is it big?", answer=True, explanation="", context="")
+    with patch("qdrant.utils.writer", writer):
+        # Returns before the vector exists
+        await add_question_to_qdrant(
+            question, asyncio.ensure_future(embed()), "country_id", 1, collection_name="countries_questions"
+        )
+    assert writer.depth == 1
+
+    embedded.set()
+    await writer.stop()
+
+    [call] = client.upsert.await_args_list
+    assert [p.id for p in call.kwargs["points"]] == [7]
+    assert call.kwargs["points"][0].vector == [0.1, 0.2]
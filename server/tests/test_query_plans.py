@@ -0,0 +1,353 @@
+import json
+import os
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db.base import Base
+import db.models  # noqa: F401
+from db.repositories.countrydle import CountrydleRepository, CountrydleStateRepository
+from db.repositories.guess import CountrydleGuessRepository
+from db.repositories.leaderboard import LeaderboardRepository, encode_cursor
+from db.repositories.powiatdle import (
+    PowiatdleDayRepository,
+    PowiatdleGuessRepository,
+    PowiatdleQuestionRepository,
+    PowiatdleStateRepository,
+)
+from db.repositories.question import CountrydleQuestionsRepository
+from db.repositories.user import UserRepository
+from db.repositories.us_statedle import (
+    USStatedleDayRepository,
+    USStatedleGuessRepository,
+    USStatedleQuestionRepository,
+    USStatedleStateRepository,
+)
+from db.repositories.wojewodztwodle import (
+    WojewodztwodleDayRepository,
+    WojewodztwodleGuessRepository,
+    WojewodztwodleQuestionRepository,
+    WojewodztwodleStateRepository,
+)
+
+# Any Postgres with pgvector: everything happens in a throwaway schema
+QUERY_PLAN_DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL")
+SCHEMA = "query_plans"
+
+GAMES = ("countrydle", "powiatdle", "us_statedle", "wojewodztwodle")
+USERS = 2000
+DAYS = 1500
+PLAYED_DAYS = range(1, DAYS, 150)  # Every user played these 10 days
+FIRST_DAY = date(2020, 1, 1)
+
+# Planned as a sequential scan, a lookup in these would read every row
+LARGE_TABLES = {"leaderboard_scores"} | {
+    f"{game}_{table}" for game in GAMES for table in ("days", "states", "questions", "guesses")
+}
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(
+        not QUERY_PLAN_DATABASE_URL,
+        reason="set QUERY_PLAN_DATABASE_URL to a Postgres with pgvector",
+    ),
+]
+
+USER = SimpleNamespace(id=17)
+DAY = SimpleNamespace(id=PLAYED_DAYS[3], date=FIRST_DAY + timedelta(days=PLAYED_DAYS[3]))
+
+LOOKUPS = [
+    ("countrydle.get_state", lambda s: CountrydleStateRepository(s).get_state(USER, DAY)),
+    (
+        "countrydle.get_player_countrydle_state",
+        lambda s: CountrydleStateRepository(s).get_player_countrydle_state(USER, DAY),
+    ),
+    (
+        "countrydle.get_user_day_questions",
+        lambda s: CountrydleQuestionsRepository(s).get_user_day_questions(USER, DAY),
+    ),
+    (
+        "countrydle.get_user_day_guesses",
+        lambda s: CountrydleGuessRepository(s).get_user_day_guesses(USER, DAY),
+    ),
+    (
+        "countrydle.get_day_country_by_date",
+        lambda s: CountrydleRepository(s).get_day_country_by_date(DAY.date),
+    ),
+    ("countrydle.get_today_country", lambda s: CountrydleRepository(s).get_today_country()),
+]
+for game, day_repository, state_repository, question_repository, guess_repository, target in (
+    (
+        "powiatdle",
+        PowiatdleDayRepository,
+        PowiatdleStateRepository,
+        PowiatdleQuestionRepository,
+        PowiatdleGuessRepository,
+        "powiat",
+    ),
+    (
+        "us_statedle",
+        USStatedleDayRepository,
+        USStatedleStateRepository,
+        USStatedleQuestionRepository,
+        USStatedleGuessRepository,
+        "us_state",
+    ),
+    (
+        "wojewodztwodle",
+        WojewodztwodleDayRepository,
+        WojewodztwodleStateRepository,
+        WojewodztwodleQuestionRepository,
+        WojewodztwodleGuessRepository,
+        "wojewodztwo",
+    ),
+):
+    LOOKUPS += [
+        (f"{game}.get_state", lambda s, r=state_repository: r(s).get_state(USER, DAY)),
+        (
+            f"{game}.get_user_day_questions",
+            lambda s, r=question_repository: r(s).get_user_day_questions(USER, DAY),
+        ),
+        (
+            f"{game}.get_user_day_guesses",
+            lambda s, r=guess_repository: r(s).get_user_day_guesses(USER, DAY),
+        ),
+        (
+            f"{game}.get_day_{target}_by_date",
+            lambda s, r=day_repository, t=target: getattr(r(s), f"get_day_{t}_by_date")(DAY.date),
+        ),
+        (
+            f"{game}.get_today_{target}",
+            lambda s, r=day_repository, t=target: getattr(r(s), f"get_today_{t}")(),
+        ),
+    ]
+
+for game in GAMES:
+    LOOKUPS += [
+        (
+            f"{game}.leaderboard.{type}",
+            lambda s, g=game, t=type: LeaderboardRepository(s).get_leaderboard(g, t),
+        )
+        for type in ("monthly", "average")
+    ]
+    LOOKUPS += [
+        (
+            f"{game}.leaderboard.rank",
+            lambda s, g=game: LeaderboardRepository(s).get_user_rank(g, USER.id, "average"),
+        ),
+        (
+            f"{game}.leaderboard.around_me",
+            lambda s, g=game: LeaderboardRepository(s).get_around_user(g, USER.id, "average"),
+        ),
+        (
+            f"{game}.leaderboard.percentile",
+            lambda s, g=game: LeaderboardRepository(s).get_percentile(g, USER.id, "average"),
+        ),
+        (
+            f"{game}.leaderboard.page",
+            lambda s, g=game: LeaderboardRepository(s).get_page(
+                g, "average", 20, encode_cursor(SimpleNamespace(points=0, wins=0, games_played=10, user_id=500), 500)
+            ),
+        ),
+    ]
+
+
+def seed_statements(game: str) -> list:
+    played = f"generate_series({PLAYED_DAYS.start}, {PLAYED_DAYS.stop - 1}, {PLAYED_DAYS.step})"
+    return [
+        f"INSERT INTO {game}_days (id, date) "
+        f"SELECT g, DATE '{FIRST_DAY}' + g FROM generate_series(1, {DAYS}) g",
+        f"INSERT INTO {game}_states (user_id, day_id, remaining_questions, remaining_guesses, "
+        "questions_asked, guesses_made, is_game_over, won, points) "
+        f"SELECT u, d, 0, 0, 0, 0, true, false, 0 FROM generate_series(1, {USERS}) u, {played} d",
+        f"INSERT INTO {game}_questions (user_id, day_id, original_question, valid, explanation) "
+        f"SELECT u, d, 'Is it big?', true, '' FROM generate_series(1, {USERS}) u, {played} d, "
+        "generate_series(1, 3) q",
+        f"INSERT INTO {game}_guesses (user_id, day_id, guess) "
+        f"SELECT u, d, 'guess' FROM generate_series(1, {USERS}) u, {played} d",
+    ]
+
+
+@pytest.fixture(scope="module")
+async def engine():
+    engine = create_async_engine(
+        QUERY_PLAN_DATABASE_URL,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA}, public"}},
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            text(
+                "INSERT INTO users (id, email, verified, is_admin) SELECT g, "
+                f"'plan' || g || '@example.com', true, false FROM generate_series(1, {USERS}) g"
+            )
+        )
+        for game in GAMES:
+            for statement in seed_statements(game):
+                await conn.execute(text(statement))
+    async with AsyncSession(engine) as session:
+        for game in GAMES:
+            await LeaderboardRepository(session).verify(game)
+    async with engine.begin() as conn:
+        for table in sorted(LARGE_TABLES):
+            await conn.execute(text(f"ANALYZE {table}"))
+
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+def seq_scans(plan: dict) -> list:
+    found = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+@pytest.mark.parametrize("name, lookup", LOOKUPS, ids=[name for name, _ in LOOKUPS])
+async def test_lookup_uses_an_index(engine, name, lookup):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(engine) as session:
+            await lookup(session)
+            await session.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    assert statements, f"{name} ran no query"
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+            scanned = [table for table in seq_scans(plan) if table in LARGE_TABLES]
+            assert not scanned, f"{name} scans {scanned} sequentially:\n{statement}"
+
+
+async def test_reconcile_streaks(engine):
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO user_points (user_id, points, streak, longest_streak) "
+                f"SELECT g, 0, 3, 1 FROM generate_series(1, {USERS}) g"
+            )
+        )
+        await conn.execute(
+            text("UPDATE countrydle_states SET won = true WHERE day_id = :day AND user_id <= 10"),
+            {"day": DAY.id},
+        )
+        states = (await conn.execute(text("SELECT count(*) FROM countrydle_states"))).scalar()
+
+    try:
+        async with AsyncSession(engine) as session:
+            started = time.perf_counter()
+            recorded, reset = await UserRepository(session).reconcile_streaks(DAY)
+            elapsed = time.perf_counter() - started
+            # A day nobody played resets every streak
+            _, reset_all = await UserRepository(session).reconcile_streaks(
+                SimpleNamespace(id=DAY.id + 1, date=DAY.date + timedelta(days=1))
+            )
+
+        assert (recorded, reset) == (10, 0)
+        assert reset_all == USERS
+        assert elapsed < 1
+        async with engine.connect() as conn:
+            start = (
+                await conn.execute(text("SELECT longest_streak_start FROM user_points WHERE user_id = 1"))
+            ).scalar()
+            assert start == DAY.date - timedelta(days=2)
+            assert (await conn.execute(text("SELECT count(*) FROM countrydle_states"))).scalar() == states
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM user_points"))
+            await conn.execute(text("UPDATE countrydle_states SET won = false"))
+
+
+async def test_leaderboard_verification_repairs_drift(engine):
+    async with AsyncSession(engine) as session:
+        repository = LeaderboardRepository(session)
+        assert await repository.verify("powiatdle") == 0
+
+        await session.execute(
+            text(
+                "UPDATE leaderboard_scores SET points = points + 1 "
+                "WHERE game = 'powiatdle' AND period = 'all' AND user_id = 1"
+            )
+        )
+        await session.execute(text("DELETE FROM leaderboard_scores WHERE game = 'powiatdle' AND user_id = 2"))
+        await session.commit()
+        # One changed row, plus every period of the deleted player
+        assert await repository.verify("powiatdle") == 1 + len(PLAYED_DAYS) + 1
+        assert await repository.verify("powiatdle") == 0
+
+
+async def test_leaderboard_pages_match_ranks(engine):
+    async with engine.begin() as conn:
+        # Spread the all-time averages, with ties
+        await conn.execute(
+            text("UPDATE leaderboard_scores SET points = (user_id % 37) * 100 WHERE game = 'us_statedle'")
+        )
+
+    try:
+        async with AsyncSession(engine) as session:
+            repository = LeaderboardRepository(session)
+            entries, cursor = [], None
+            while True:
+                page = await repository.get_page("us_statedle", "average", 100, cursor)
+                entries += page.entries
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+
+            assert len(entries) == USERS
+            assert [entry.rank for entry in entries] == list(range(1, USERS + 1))
+            keys = [(-entry.average_points, entry.id) for entry in entries]
+            assert keys == sorted(keys)
+
+            me = entries[777]
+            assert (await repository.get_user_rank("us_statedle", me.id, "average")).rank == me.rank
+            around = await repository.get_around_user("us_statedle", me.id, "average", neighbours=3)
+            assert [entry.id for entry in around] == [entry.id for entry in entries[774:781]]
+            percentile = await repository.get_percentile("us_statedle", me.id, "average")
+            assert (percentile.rank, percentile.total) == (778, USERS)
+    finally:
+        async with AsyncSession(engine) as session:
+            await LeaderboardRepository(session).verify("us_statedle")
+
+
+async def test_purge_synthetic_users(engine):
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(f"UPDATE users SET username = 'load_' || id WHERE id > {USERS - 5}")
+        )
+
+    async with AsyncSession(engine) as session:
+        repository = UserRepository(session)
+        assert await repository.flag_synthetic_users("load_") == 5
+        batches = []
+        while batch := await repository.purge_synthetic_users(2):
+            batches.append(batch)
+
+    assert batches == [2, 2, 1]
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("SELECT count(*) FROM users"))).scalar() == USERS - 5
+        for game in GAMES:
+            orphans = await conn.execute(
+                text(f"SELECT count(*) FROM {game}_questions WHERE user_id IS NULL")
+            )
+            assert orphans.scalar() == 5 * len(PLAYED_DAYS) * 3
@@ -0,0 +1,121 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import metrics
+from countrydle import utils as gutils
+from qdrant.utils import Fragment
+from schemas.countrydle import QuestionEnhanced
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def day_country():
+    day = MagicMock()
+    day.id = 1
+    day.country_id = 100
+    return day
+
+
+@pytest.fixture
+def retrieval():
+    country = MagicMock()
+    country.name = "Poland"
+    with (
+        patch("countrydle.utils.get_embedding", AsyncMock(return_value=[0.1] * 1536)),
+        patch(
+            "countrydle.utils.get_fragments_matching_question",
+            AsyncMock(return_value=([Fragment(text="Poland borders Germany.")], None)),
+        ),
+        patch("countrydle.utils.CountryRepository.get", AsyncMock(return_value=country)),
+        patch("countrydle.utils.AsyncSessionLocal", MagicMock()),
+    ):
+        yield
+
+
+@pytest.mark.anyio
+async def test_fused_pipeline_answers_in_one_completion(day_country, retrieval):
+    fused_answer = {
+        "question": "Does the country border Germany?",
+        "intent": "Border check",
+        "required_info": "Neighbouring countries",
+        "valid": True,
+        "answer": True,
+        "explanation": "Poland shares its western border with Germany.",
+    }
+    user = MagicMock()
+    user.id = 7
+
+    with (
+        patch("countrydle.utils.pipeline_mode", return_value="fused"),
+        patch("llm.chat_json", AsyncMock(return_value=fused_answer)) as mock_chat,
+    ):
+        enhanced, question_create, vector = await gutils.process_question(
+            "Czy graniczy z Niemcami?", day_country, user
+        )
+
+    assert mock_chat.await_count == 1
+    assert enhanced.valid is True
+    assert question_create.user_id == 7
+    assert question_create.original_question == "Czy graniczy z Niemcami?"
+    assert question_create.question == "Does the country border Germany?"
+    assert question_create.answer is True
+    assert question_create.context == "Poland borders Germany."
+    # The answer is returned while the question is still being embedded for its point
+    assert await vector == [0.1] * 1536
+
+    timings = metrics.snapshot()["timings"]
+    assert timings["pipeline.countrydle.fused.total"]["count"] == 1
+    assert timings["pipeline.countrydle.fused.answer"]["count"] == 1
+    assert "pipeline.countrydle.fused.embed_question" not in timings
+
+
+@pytest.mark.anyio
+async def test_fused_pipeline_invalid_question(day_country, retrieval):
+    invalid = {"valid": False, "explanation": "Not a True/False question."}
+
+    with (
+        patch("countrydle.utils.pipeline_mode", return_value="fused"),
+        patch("llm.chat_json", AsyncMock(return_value=invalid)),
+    ):
+        enhanced, question_create, vector = await gutils.process_question(
+            "Tell me about the capital.", day_country, None
+        )
+
+    assert enhanced.valid is False
+    assert enhanced.explanation == "Not a True/False question."
+    assert question_create is None
+    assert vector is None
+
+
+@pytest.mark.anyio
+async def test_parallel_pipeline_matches_classic_fields(day_country, retrieval):
+    enhanced = QuestionEnhanced(
+        original_question="Is it in Europe?",
+        question="Is the country located in Europe?",
+        valid=True,
+        explanation=None,
+    )
+    answer = {"answer": True, "explanation": "Poland is in Central Europe."}
+
+    with (
+        patch("countrydle.utils.pipeline_mode", return_value="parallel"),
+        patch("countrydle.utils.enhance_question", AsyncMock(return_value=enhanced)),
+        patch("llm.chat_json", AsyncMock(return_value=answer)),
+    ):
+        _, question_create, vector = await gutils.process_question(
+            "Is it in Europe?", day_country, None
+        )
+
+    assert question_create.user_id is None
+    assert question_create.day_id == 1
+    assert question_create.question == "Is the country located in Europe?"
+    assert question_create.explanation == "Poland is in Central Europe."
+    assert question_create.context == "Poland borders Germany."
+    assert vector == [0.1] * 1536
+    assert "pipeline.countrydle.parallel.enhance" in metrics.snapshot()["timings"]
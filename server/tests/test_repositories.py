@@ -0,0 +1,130 @@
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from db.repositories import add_unique
+from db.models import User
+from db.repositories.user import UserRepository
+
+
+class FailingSavepoint:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        raise IntegrityError("INSERT", {}, Exception("duplicate key"))
+
+
+def session(savepoint=None):
+    mock_session = MagicMock()
+    mock_session.begin_nested.return_value = savepoint or AsyncMock()
+    mock_session.commit = AsyncMock()
+    mock_session.refresh = AsyncMock()
+    return mock_session
+
+
+@pytest.mark.anyio
+async def test_add_unique_commits_new_row():
+    mock_session = session()
+    entry = object()
+
+    assert await add_unique(mock_session, entry, AsyncMock()) is entry
+    mock_session.add.assert_called_once_with(entry)
+    mock_session.commit.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_add_unique_returns_row_of_concurrent_insert():
+    mock_session = session(FailingSavepoint())
+    winner = object()
+
+    assert await add_unique(mock_session, object(), AsyncMock(return_value=winner)) is winner
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_add_unique_reraises_without_existing_row():
+    mock_session = session(FailingSavepoint())
+
+    with pytest.raises(IntegrityError):
+        await add_unique(mock_session, object(), AsyncMock(return_value=None))
+
+
+@pytest.mark.anyio
+async def test_reconcile_streaks_is_two_updates():
+    mock_session = MagicMock()
+    mock_session.execute = AsyncMock(return_value=MagicMock(rowcount=2))
+    mock_session.commit = AsyncMock()
+
+    day = SimpleNamespace(id=7, date=date(2026, 1, 2))
+    assert await UserRepository(mock_session).reconcile_streaks(day) == (2, 2)
+
+    statements = [
+        str(call.args[0].compile(dialect=postgresql.dialect()))
+        for call in mock_session.execute.await_args_list
+    ]
+    assert [statement.split()[0] for statement in statements] == ["UPDATE", "UPDATE"]
+    assert all("countrydle_states" in statement for statement in statements)
+    mock_session.add.assert_not_called()
+    mock_session.commit.assert_awaited_once()
+
+
+def test_synthetic_usernames():
+    assert User.is_synthetic_username("pytest_user")
+    assert User.is_synthetic_username("ask_q_42")
+    assert not User.is_synthetic_username("testowy")
+    assert not User.is_synthetic_username(None)
+
+
+@pytest.mark.anyio
+async def test_purge_deletes_dependents_before_users():
+    mock_session = MagicMock()
+    ids = MagicMock()
+    ids.scalars.return_value.all.return_value = [3, 4]
+    mock_session.execute = AsyncMock(side_effect=[ids] + [MagicMock()] * 50)
+    mock_session.commit = AsyncMock()
+
+    assert await UserRepository(mock_session).purge_synthetic_users(100) == 2
+
+    statements = [
+        str(call.args[0].compile(dialect=postgresql.dialect()))
+        for call in mock_session.execute.await_args_list[1:]
+    ]
+    assert statements[-1].startswith("DELETE FROM users")
+    assert any(statement.startswith("UPDATE countrydle_questions SET user_id") for statement in statements)
+    assert any(statement.startswith("DELETE FROM leaderboard_scores") for statement in statements)
+    mock_session.commit.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_purge_stops_without_synthetic_users():
+    mock_session = MagicMock()
+    ids = MagicMock()
+    ids.scalars.return_value.all.return_value = []
+    mock_session.execute = AsyncMock(return_value=ids)
+    mock_session.commit = AsyncMock()
+
+    assert await UserRepository(mock_session).purge_synthetic_users(100) == 0
+    mock_session.execute.assert_awaited_once()
+    mock_session.commit.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_flag_matches_prefix_literally():
+    mock_session = MagicMock()
+    ids = MagicMock()
+    ids.scalars.return_value.all.return_value = [7]
+    mock_session.execute = AsyncMock(side_effect=[ids, MagicMock()])
+    mock_session.commit = AsyncMock()
+
+    assert await UserRepository(mock_session).flag_synthetic_users("load_") == 1
+
+    flag = mock_session.execute.await_args_list[0].args[0].compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    # An unescaped `_` would also flag "loadtest"
+    assert "LIKE 'load/_' || '%%' ESCAPE '/'" in str(flag)
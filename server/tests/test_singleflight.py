@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+import metrics
+from countrydle import utils as gutils
+from llm.singleflight import SingleFlight
+from schemas.countrydle import QuestionCreate, QuestionEnhanced
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_result():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["answer"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert metrics.get("singleflight.test.shared") == 4
+
+    # Once finished, the next call runs again
+    await flight.do("key", work)
+    assert calls == 2
+
+
+@pytest.mark.anyio
+async def test_failure_reaches_every_waiter():
+    flight = SingleFlight("test_error")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("LLM timeout")
+
+    results = await asyncio.gather(
+        flight.do("key", work), flight.do("key", work), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight._calls == {}
+
+
+@pytest.mark.anyio
+async def test_duplicate_questions_keep_their_own_owner():
+    day = MagicMock()
+    day.id = 1
+    day.country_id = 100
+    enhanced = QuestionEnhanced(
+        original_question="Is it in Europe?",
+        question="Is the country located in Europe?",
+        valid=True,
+        explanation=None,
+    )
+    answered = QuestionCreate(
+        user_id=None,
+        day_id=1,
+        original_question="Is it in Europe?",
+        valid=True,
+        question="Is the country located in Europe?",
+        answer=True,
+        explanation="Poland is in Central Europe.",
+        context=None,
+    )
+    calls = 0
+
+    async def pipeline(question, day_country, user, session):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return enhanced, answered.model_copy(update={"user_id": user.id}), [0.1] * 1536
+
+    first_user, second_user = MagicMock(), MagicMock()
+    first_user.id, second_user.id = 1, 2
+
+    with (
+        patch("countrydle.utils._process_question", pipeline),
+        patch("countrydle.utils.AsyncSessionLocal", MagicMock()),
+    ):
+        first, second = await asyncio.gather(
+            gutils.process_question("Is it in Europe?", day, first_user),
+            gutils.process_question("is it in europe", day, second_user),
+        )
+
+    assert calls == 1
+    assert first[1].user_id == 1
+    assert second[1].user_id == 2
+    assert second[1].original_question == "is it in europe"
+    assert second[0].original_question == "is it in europe"
+    assert first[2] == [0.1] * 1536
+    assert second[2] is None
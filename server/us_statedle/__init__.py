@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_db
 from db.models import User
+from db.repositories.leaderboard import LEADERBOARD_SIZE, LeaderboardRepository
 from db.repositories.us_statedle import (
     USStatedleDayRepository,
     USStatedleStateRepository,
@@ -28,6 +29,7 @@ from schemas.us_statedle import (
 )
 from users.utils import get_current_or_guest_user, get_current_user, get_admin_user
 import us_statedle.utils as uutils
+from utils.resolver import resolve_guess
 from game_logic import GameConfig, GameRules, GameState
 
 router = APIRouter(prefix="/us_statedle")
@@ -88,8 +90,8 @@ async def sync_guest_data(
         )
 
     for guess in sync_data.guesses:
-        is_correct = False
-        if guess.us_state_id:
+        is_correct = None
+        if guess.us_state_id is not None:
             is_correct = guess.us_state_id == day_state.us_state_id
             
         guess_create = USStateGuessCreate(
@@ -101,6 +103,8 @@ async def sync_guest_data(
         )
         await USStatedleGuessRepository(session).add_guess(guess_create)
 
+    # A game already recorded as over must not reach the leaderboard a second time
+    was_over = state.is_game_over
     state.remaining_questions = sync_data.state.remaining_questions
     state.remaining_guesses = sync_data.state.remaining_guesses
     state.questions_asked = sync_data.state.questions_asked
@@ -111,6 +115,9 @@ async def sync_guest_data(
     if state.won:
         state.points = await USStatedleStateRepository(session).calc_points(state)
         
+    if state.is_game_over and not was_over:
+        await LeaderboardRepository(session).record_game("us_statedle", state)
+
     await USStatedleStateRepository(session).update_state(state)
     
     return await get_state(user, session)
@@ -196,12 +203,54 @@ async def get_state(
     )
 
 
-from schemas.countrydle import LeaderboardEntry
+from schemas.countrydle import LeaderboardEntry, LeaderboardPage, LeaderboardPercentile
 
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
-async def get_leaderboard(type: str = "monthly", session: AsyncSession = Depends(get_db)):
-    return await USStatedleStateRepository(session).get_leaderboard(type)
+async def get_leaderboard(
+    type: str = "monthly",
+    limit: int = LEADERBOARD_SIZE,
+    session: AsyncSession = Depends(get_db),
+):
+    return await USStatedleStateRepository(session).get_leaderboard(type, limit)
+
+
+@router.get("/leaderboard/me", response_model=LeaderboardEntry | None)
+async def get_my_rank(
+    type: str = "monthly",
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await USStatedleStateRepository(session).get_user_rank(user, type)
+
+
+@router.get("/leaderboard/page", response_model=LeaderboardPage)
+async def get_leaderboard_page(
+    type: str = "monthly",
+    limit: int = LEADERBOARD_SIZE,
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_page("us_statedle", type, limit, cursor)
+
+
+@router.get("/leaderboard/around-me", response_model=List[LeaderboardEntry])
+async def get_leaderboard_around_me(
+    type: str = "monthly",
+    neighbours: int = 5,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_around_user("us_statedle", user.id, type, neighbours)
+
+
+@router.get("/leaderboard/percentile", response_model=LeaderboardPercentile | None)
+async def get_leaderboard_percentile(
+    type: str = "monthly",
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    return await LeaderboardRepository(session).get_percentile("us_statedle", user.id, type)
 
 
 @router.get("/states", response_model=List[USStateDisplay])
@@ -230,7 +279,9 @@ async def ask_question(
     from qdrant.utils import add_question_to_qdrant
 
     if user is None:
-        enh_question = await uutils.enhance_question(question.question)
+        enh_question, question_create, question_vector = await uutils.process_question(
+            question.question, day_state, None
+        )
         if not enh_question.valid:
             question_create = USStateQuestionCreate(
                 user_id=None,
@@ -247,13 +298,6 @@ async def ask_question(
             )
             return new_quest
 
-        question_create, question_vector = await uutils.ask_question(
-            enh_question,
-            day_state,
-            None,
-            session,
-        )
-
         new_quest = await USStatedleQuestionRepository(session).create_question(
             question_create
         )
@@ -300,7 +344,9 @@ async def ask_question(
             detail="No more questions left or game over!",
         )
 
-    enh_question = await uutils.enhance_question(question.question)
+    enh_question, question_create, question_vector = await uutils.process_question(
+        question.question, day_state, user
+    )
     if not enh_question.valid:
         question_create = USStateQuestionCreate(
             user_id=user.id,
@@ -326,13 +372,6 @@ async def ask_question(
 
         return new_quest
 
-    question_create, question_vector = await uutils.ask_question(
-        enh_question,
-        day_state,
-        user,
-        session,
-    )
-
     new_quest = await USStatedleQuestionRepository(session).create_question(
         question_create
     )
@@ -385,10 +424,14 @@ async def make_guess(
     session: AsyncSession = Depends(get_db),
 ):
     day_state = await USStatedleDayRepository(session).get_today_us_state()
+
+    # Free-text guesses name the target instead of picking it
+    if guess.us_state_id is None and guess.guess:
+        guess.us_state_id = await resolve_guess("us_statedle", guess.guess, session)
     
     if user is None:
-        is_correct = False
-        if guess.us_state_id:
+        is_correct = None
+        if guess.us_state_id is not None:
             is_correct = guess.us_state_id == day_state.us_state_id
             
         from datetime import datetime
@@ -409,8 +452,8 @@ async def make_guess(
             detail="No more guesses left or game over!",
         )
 
-    is_correct = False
-    if guess.us_state_id:
+    is_correct = None
+    if guess.us_state_id is not None:
         is_correct = guess.us_state_id == day_state.us_state_id
 
     guess_create = USStateGuessCreate(
@@ -424,7 +467,7 @@ async def make_guess(
     new_guess = await USStatedleGuessRepository(session).add_guess(guess_create)
 
     # Update state
-    new_game_state = game_rules.process_guess(current_game_state, is_correct)
+    new_game_state = game_rules.process_guess(current_game_state, is_correct is True)
     state.remaining_guesses = (
         USSTATEDLE_CONFIG.max_guesses - new_game_state.guesses_used
     )
@@ -435,6 +478,9 @@ async def make_guess(
     if state.won:
         state.points = await USStatedleStateRepository(session).calc_points(state)
 
+    if state.is_game_over:
+        await LeaderboardRepository(session).record_game("us_statedle", state)
+
     await USStatedleStateRepository(session).update_state(state)
 
     return new_guess
@@ -1,19 +1,26 @@
-import os
-import json
-from typing import List, Tuple
-from openai import OpenAI
+import asyncio
+from typing import Awaitable, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db import AsyncSessionLocal
 from db.models import USState, USStatedleDay, User
-from qdrant.utils import get_fragments_matching_question
+from qdrant.utils import find_cached_answer, get_fragments_matching_question
+from qdrant.vectorize import get_embedding
 import qdrant
+import facts
+import llm
+import metrics
+from llm.cache import cached_enhancement, normalize_question
+from llm.pipeline import FROM_ANALYSIS, fused_prompts, pipeline_mode
+from llm.singleflight import SingleFlight
 from schemas.us_statedle import USStateQuestionCreate, USStateQuestionEnhanced
 from db.repositories.us_state import USStateRepository
 
+question_flight = SingleFlight("us_statedle")
 
-async def enhance_question(question: str) -> USStateQuestionEnhanced:
-    system_prompt = """
+
+ENHANCE_SYSTEM_PROMPT = """
 You are an AI assistant for a game where players guess a US State by asking True/False questions. 
 Your task is to:
 
@@ -86,31 +93,22 @@ Output:
 }
 """
 
+
+@cached_enhancement("us_statedle", USStateQuestionEnhanced)
+async def enhance_question(question: str) -> USStateQuestionEnhanced:
     question_prompt = f"""User's Question: {question}"""
 
     prompts = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": ENHANCE_SYSTEM_PROMPT},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    answer_dict: dict = await llm.chat_json(prompts)
+
+    return parse_enhanced(question, answer_dict)
 
-    answer = response.choices[0].message.content
 
-    try:
-        answer_dict: dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
 
+def parse_enhanced(question: str, answer_dict: dict) -> USStateQuestionEnhanced:
     return USStateQuestionEnhanced(
         original_question=question,
         valid=answer_dict["valid"],
@@ -121,22 +119,10 @@ Output:
     )
 
 
-
-async def ask_question(
-    question: USStateQuestionEnhanced,
-    day_state: USStatedleDay,
-    user: User | None,
-    session: AsyncSession,
-) -> Tuple[USStateQuestionCreate, List[float]]:
-
-
-    fragments, question_vector = await get_fragments_matching_question(
-        question.question, "us_state_id", day_state.us_state_id, "us_states", session, limit=qdrant.US_STATEDLE_CONTEXT_LIMIT
-    )
-    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
-    state: USState = await USStateRepository(session).get(day_state.us_state_id)
-
-    system_prompt = f"""
+def answer_system_prompt(
+    state: USState, context: str, intent: str | None, required_info: str | None
+) -> str:
+    return f"""
 You are an AI assistant in a game where players try to guess a US State by asking True/False questions. 
 Your task is to:
 1. Receive a valid True/False question from the player.
@@ -152,8 +138,8 @@ Instructions:
 - **Handle Logical 'OR' and Lists**: If a question contains 'or' or provides a list of options (e.g., 'Is it California or Texas?'), the answer is `true` if the target state matches **at least one** of those options.
 
 ### State to Guess: {state.name}
-### Question Intent: {question.intent}
-### Required Information: {question.required_info}
+### Question Intent: {intent}
+### Required Information: {required_info}
 ### Context: 
 [...]
 {context}
@@ -167,32 +153,77 @@ Answer with JSON format and nothing else. Use the specific format:
 }}
 """
 
+
+def answer_prompts(
+    state: USState, question: USStateQuestionEnhanced, context: str
+) -> List[dict]:
+    system_prompt = answer_system_prompt(
+        state, context, question.intent, question.required_info
+    )
+
     question_prompt = f"""User's Original Question: {question.original_question}
 Simplified Question: {question.question}"""
 
-
     prompts = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    return prompts
+
+
+async def ask_question(
+    question: USStateQuestionEnhanced,
+    day_state: USStatedleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[USStateQuestionCreate, List[float] | None]:
 
-    answer = response.choices[0].message.content
+    state: USState = await USStateRepository(session).get(day_state.us_state_id)
+    known = facts.evaluate("us_statedle", state.name, question)
+    if known is not None:
+        question_create = _answered_question(
+            question, known.as_answer(), known.context, day_state, user
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.us_statedle.classic.embed"):
+        question_vector = await get_embedding(question.question, qdrant.EMBEDDING_MODEL)
+
+    with metrics.timer("pipeline.us_statedle.classic.answer_cache"):
+        cached = await find_cached_answer(
+            question_vector,
+            "us_state_id",
+            day_state.us_state_id,
+            "us_states_questions",
+        )
+    if cached:
+        question_create = USStateQuestionCreate(
+            user_id=user.id if user else None,
+            day_id=day_state.id,
+            original_question=question.original_question,
+            valid=question.valid,
+            question=question.question,
+            answer=cached.answer,
+            explanation=cached.explanation,
+            context=cached.context,
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.us_statedle.classic.retrieve"):
+        fragments, question_vector = await get_fragments_matching_question(
+            question.question,
+            "us_state_id",
+            day_state.us_state_id,
+            "us_states",
+            session,
+            limit=qdrant.US_STATEDLE_CONTEXT_LIMIT,
+            query_vector=question_vector,
+        )
+    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
 
-    try:
-        answer_dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
+    prompts = answer_prompts(state, question, context)
+    with metrics.timer("pipeline.us_statedle.classic.answer"):
+        answer_dict = await llm.chat_json(prompts)
 
     question_create = USStateQuestionCreate(
         user_id=user.id if user else None,
@@ -206,3 +237,179 @@ Simplified Question: {question.question}"""
     )
 
     return question_create, question_vector
+
+
+async def process_question(
+    question: str,
+    day_state: USStatedleDay,
+    user: User | None,
+) -> Tuple[USStateQuestionEnhanced, USStateQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    """
+    Validates and answers a player's question in the configured QUESTION_PIPELINE mode.
+    The answer is None for invalid questions; the vector is None when nothing should
+    be added to the us_states_questions collection, and still computing (awaitable) in fused mode.
+
+    Identical questions about the same target that arrive while one is being answered
+    share its result; each caller still gets its own copy to store as its row.
+    """
+    key = (day_state.us_state_id, normalize_question(question))
+    (enhanced, question_create, question_vector), shared = await question_flight.do(
+        key, lambda: _process_question_in_session(question, day_state, user)
+    )
+
+    if shared:
+        enhanced = enhanced.model_copy(update={"original_question": question})
+        if question_create is not None:
+            question_create = question_create.model_copy(
+                update={
+                    "user_id": user.id if user else None,
+                    "original_question": question,
+                }
+            )
+        # The first caller adds the question to the collection
+        question_vector = None
+
+    return enhanced, question_create, question_vector
+
+
+async def _process_question_in_session(
+    question: str, day_state: USStatedleDay, user: User | None
+) -> Tuple[USStateQuestionEnhanced, USStateQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    # Not the caller's session: the shared call can outlive the request that started it
+    async with AsyncSessionLocal() as session:
+        return await _process_question(question, day_state, user, session)
+
+
+async def _process_question(
+    question: str,
+    day_state: USStatedleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[USStateQuestionEnhanced, USStateQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    mode = pipeline_mode()
+    with metrics.timer(f"pipeline.us_statedle.{mode}.total"):
+        if mode == "parallel":
+            return await _process_parallel(question, day_state, user, session)
+        if mode == "fused":
+            return await _process_fused(question, day_state, user, session)
+
+        with metrics.timer("pipeline.us_statedle.classic.enhance"):
+            enhanced = await enhance_question(question)
+        if not enhanced.valid:
+            return enhanced, None, None
+
+        question_create, question_vector = await ask_question(
+            question=enhanced, day_state=day_state, user=user, session=session
+        )
+        return enhanced, question_create, question_vector
+
+
+async def _raw_question_context(
+    question: str, day_state: USStatedleDay, session: AsyncSession, mode: str
+) -> str:
+    raw_vector = await metrics.timed(
+        f"pipeline.us_statedle.{mode}.embed",
+        get_embedding(question, qdrant.EMBEDDING_MODEL),
+    )
+
+    with metrics.timer(f"pipeline.us_statedle.{mode}.retrieve"):
+        fragments, _ = await get_fragments_matching_question(
+            question,
+            "us_state_id",
+            day_state.us_state_id,
+            "us_states",
+            session,
+            limit=qdrant.US_STATEDLE_CONTEXT_LIMIT,
+            query_vector=raw_vector,
+        )
+    return "\n[ ... ]\n".join(fragment.text for fragment in fragments)
+
+
+def _answered_question(
+    enhanced: USStateQuestionEnhanced,
+    answer_dict: dict,
+    context: str,
+    day_state: USStatedleDay,
+    user: User | None,
+) -> USStateQuestionCreate:
+    return USStateQuestionCreate(
+        user_id=user.id if user else None,
+        day_id=day_state.id,
+        original_question=enhanced.original_question,
+        valid=enhanced.valid,
+        question=enhanced.question,
+        answer=answer_dict.get("answer"),
+        explanation=answer_dict.get("explanation") or "No explanation provided.",
+        context=context,
+    )
+
+
+async def _process_parallel(
+    question: str,
+    day_state: USStatedleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[USStateQuestionEnhanced, USStateQuestionCreate | None, List[float] | None]:
+    # Retrieval uses the raw question so it does not wait for the rewrite
+    enhanced, context = await asyncio.gather(
+        metrics.timed("pipeline.us_statedle.parallel.enhance", enhance_question(question)),
+        _raw_question_context(question, day_state, session, "parallel"),
+    )
+    if not enhanced.valid:
+        return enhanced, None, None
+
+    state: USState = await USStateRepository(session).get(day_state.us_state_id)
+    known = facts.evaluate("us_statedle", state.name, enhanced)
+    if known is not None:
+        question_create = _answered_question(
+            enhanced, known.as_answer(), known.context, day_state, user
+        )
+        return enhanced, question_create, None
+
+    answer_dict, question_vector = await asyncio.gather(
+        metrics.timed(
+            "pipeline.us_statedle.parallel.answer",
+            llm.chat_json(answer_prompts(state, enhanced, context)),
+        ),
+        metrics.timed(
+            "pipeline.us_statedle.parallel.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        ),
+    )
+
+    question_create = _answered_question(enhanced, answer_dict, context, day_state, user)
+    return enhanced, question_create, question_vector
+
+
+async def _process_fused(
+    question: str,
+    day_state: USStatedleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[USStateQuestionEnhanced, USStateQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    context = await _raw_question_context(question, day_state, session, "fused")
+    state: USState = await USStateRepository(session).get(day_state.us_state_id)
+
+    prompts = fused_prompts(
+        ENHANCE_SYSTEM_PROMPT,
+        answer_system_prompt(state, context, FROM_ANALYSIS, FROM_ANALYSIS),
+        question,
+    )
+    answer_dict = await metrics.timed(
+        "pipeline.us_statedle.fused.answer", llm.chat_json(prompts)
+    )
+
+    enhanced = parse_enhanced(question, answer_dict)
+    if not enhanced.valid:
+        return enhanced, None, None
+
+    # Only the question's Qdrant point needs the vector, the answer does not wait for it
+    question_vector = asyncio.ensure_future(
+        metrics.timed(
+            "question_point.us_statedle.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        )
+    )
+
+    question_create = _answered_question(enhanced, answer_dict, context, day_state, user)
+    return enhanced, question_create, question_vector
@@ -1,24 +1,31 @@
 from datetime import date, timedelta
 import logging
+import os
 
 
+import metrics
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from db import AsyncSessionLocal
 from db.base import Base
 from db.models import *  # noqa: F403
-from db.repositories.countrydle import CountrydleRepository, CountrydleStateRepository
+from db.repositories.countrydle import CountrydleRepository
+from db.repositories.leaderboard import GAMES, LeaderboardRepository
+from db.repositories.powiatdle import PowiatdleDayRepository
+from db.repositories.us_statedle import USStatedleDayRepository
+from db.repositories.wojewodztwodle import WojewodztwodleDayRepository
 from sqlalchemy.ext.asyncio import AsyncEngine
 
 from db.repositories.user import UserRepository
+from qdrant.local_index import load_day_indexes
+from utils.prewarm import prewarm_answer_cache
+
+PREWARM_HOUR = int(os.getenv("PREWARM_HOUR", "23"))
+LEADERBOARD_VERIFY_HOUR = int(os.getenv("LEADERBOARD_VERIFY_HOUR", "3"))
 
 
 async def check_streaks():
     async with AsyncSessionLocal() as session:
-        u_repo = UserRepository(session)
-        cs_repo = CountrydleStateRepository(session)
-
-        users = await u_repo.get_all_verified_users()
         yesterday = date.today() - timedelta(days=1)
         dc_yesterday = await CountrydleRepository(session).get_day_country_by_date(
             yesterday
@@ -28,19 +35,22 @@ async def check_streaks():
             logging.error(f"DayCountry for {yesterday} not found.")
             return
 
-        for user in users:
-            points = await u_repo.get_user_points(user.id)
-            if not points:
-                points = await u_repo.add_user_points(user.id)
+        with metrics.timer("scheduler.check_streaks"):
+            recorded, reset = await UserRepository(session).reconcile_streaks(dc_yesterday)
+        print(f"Streaks for {yesterday}: {reset} reset, {recorded} new longest")
 
-            yesterday_state = await cs_repo.get_player_countrydle_state(
-                user, dc_yesterday
-            )
 
-            if yesterday_state is None or not yesterday_state.is_game_over:
-                points.streak = 0
-
-            await session.commit()
+async def verify_leaderboards():
+    """Recomputes every leaderboard from the finished games and repairs any drift."""
+    async with AsyncSessionLocal() as session:
+        for game in GAMES:
+            with metrics.timer("scheduler.verify_leaderboards"):
+                mismatches = await LeaderboardRepository(session).verify(game)
+            if mismatches:
+                metrics.inc(f"leaderboard.{game}.repaired", mismatches)
+                logging.error(f"Leaderboard of {game} drifted: {mismatches} rows rebuilt")
+            else:
+                print(f"Leaderboard of {game} verified")
 
 
 async def generate_day_countries():
@@ -56,7 +66,29 @@ async def generate_day_countries():
             print(f"Generating country for {day_date}")
             await c_repo.generate_new_day_country(day_date)
 
+        # The other games create today's target lazily; generating it ahead
+        # lets prewarm_answer_cache see tomorrow's targets too
+        p_repo = PowiatdleDayRepository(session)
+        us_repo = USStatedleDayRepository(session)
+        w_repo = WojewodztwodleDayRepository(session)
+        sub_games = [
+            ("powiat", p_repo.get_day_powiat_by_date, p_repo.generate_new_day_powiat),
+            ("US state", us_repo.get_day_us_state_by_date, us_repo.generate_new_day_us_state),
+            ("wojewodztwo", w_repo.get_day_wojewodztwo_by_date, w_repo.generate_new_day_wojewodztwo),
+        ]
+        for day_date in (date.today() + timedelta(days=n) for n in range(5)):
+            for name, get_by_date, generate in sub_games:
+                if await get_by_date(day_date) is not None:
+                    continue
+
+                print(f"Generating {name} for {day_date}")
+                await generate(day_date)
+
+    await load_day_indexes()
+
 
 scheduler = AsyncIOScheduler()
 scheduler.add_job(generate_day_countries, CronTrigger(hour=0, minute=0))
 scheduler.add_job(check_streaks, CronTrigger(hour=0, minute=0))
+scheduler.add_job(verify_leaderboards, CronTrigger(hour=LEADERBOARD_VERIFY_HOUR, minute=0))
+scheduler.add_job(prewarm_answer_cache, CronTrigger(hour=PREWARM_HOUR, minute=0))
@@ -0,0 +1,274 @@
+"""
+Other names players use for guess targets: short and official forms, abbreviations
+and the names in Polish and a few other languages.
+
+Each group lists names of one place. A group is attached to the target whose
+`name` or `official_name` is in it, so the spelling used in the database does not
+need to be the first one.
+"""
+
+# fmt: off
+COUNTRY_ALIASES = [
+    ["Afghanistan", "Afganistan"],
+    ["Albania", "Shqipëria", "Albanien", "Albanie"],
+    ["Algeria", "Algieria", "Algerien", "Algérie", "Argelia"],
+    ["Andorra", "Andora"],
+    ["Angola"],
+    ["Antigua and Barbuda", "Antigua i Barbuda", "Antigua"],
+    ["Argentina", "Argentyna", "Argentinien", "Argentine"],
+    ["Armenia", "Armenien", "Arménie", "Hayastan"],
+    ["Australia", "Australien", "Australie", "Oz", "Aussie"],
+    ["Austria", "Österreich", "Autriche"],
+    ["Azerbaijan", "Azerbejdżan", "Aserbaidschan"],
+    ["Bahamas", "The Bahamas", "Bahamy"],
+    ["Bahrain", "Bahrajn"],
+    ["Bangladesh", "Bangladesz"],
+    ["Barbados"],
+    ["Belarus", "Białoruś", "Byelorussia", "Belorussia", "Weißrussland", "Biélorussie"],
+    ["Belgium", "Belgia", "Belgien", "Belgique", "Bélgica"],
+    ["Belize"],
+    ["Benin"],
+    ["Bhutan"],
+    ["Bolivia", "Boliwia", "Bolivien", "Bolivie"],
+    ["Bosnia and Herzegovina", "Bośnia i Hercegowina", "Bosnia", "Bośnia", "BiH", "Bosnien und Herzegowina"],
+    ["Botswana"],
+    ["Brazil", "Brazylia", "Brasil", "Brasilien", "Brésil"],
+    ["Brunei", "Brunei Darussalam"],
+    ["Bulgaria", "Bułgaria", "Bulgarien", "Bulgarie"],
+    ["Burkina Faso"],
+    ["Burundi"],
+    ["Cabo Verde", "Cape Verde", "Republika Zielonego Przylądka", "Wyspy Zielonego Przylądka"],
+    ["Cambodia", "Kambodża", "Kampuchea"],
+    ["Cameroon", "Kamerun", "Cameroun"],
+    ["Canada", "Kanada"],
+    ["Central African Republic", "Republika Środkowoafrykańska", "CAR"],
+    ["Chad", "Czad", "Tschad", "Tchad"],
+    ["Chile", "Chili"],
+    ["China", "Chiny", "PRC", "People's Republic of China", "ChRL", "Chine"],
+    ["Colombia", "Kolumbia", "Kolumbien", "Colombie"],
+    ["Comoros", "Komory"],
+    ["Congo", "Republic of the Congo", "Congo-Brazzaville", "Kongo"],
+    ["Democratic Republic of the Congo", "DR Congo", "DRC", "Congo-Kinshasa", "Demokratyczna Republika Konga", "DRK", "Zaire"],
+    ["Costa Rica", "Kostaryka"],
+    ["Croatia", "Chorwacja", "Hrvatska", "Kroatien", "Croatie"],
+    ["Cuba", "Kuba"],
+    ["Cyprus", "Cypr", "Zypern", "Chypre"],
+    ["Czechia", "Czech Republic", "Czechy", "Česko", "Tschechien", "Tchéquie"],
+    ["Denmark", "Dania", "Danmark", "Dänemark", "Danemark"],
+    ["Djibouti", "Dżibuti"],
+    ["Dominica", "Dominika"],
+    ["Dominican Republic", "Dominikana", "Republika Dominikańska"],
+    ["Ecuador", "Ekwador"],
+    ["Egypt", "Egipt", "Ägypten", "Égypte", "Egipto"],
+    ["El Salvador", "Salwador", "Salvador"],
+    ["Equatorial Guinea", "Gwinea Równikowa"],
+    ["Eritrea", "Erytrea"],
+    ["Estonia", "Eesti", "Estland", "Estonie"],
+    ["Eswatini", "Swaziland", "Suazi", "Eswatini (Suazi)"],
+    ["Ethiopia", "Etiopia", "Äthiopien", "Éthiopie"],
+    ["Fiji", "Fidżi"],
+    ["Finland", "Finlandia", "Suomi", "Finnland", "Finlande"],
+    ["France", "Francja", "Frankreich", "Francia"],
+    ["Gabon"],
+    ["Gambia", "The Gambia"],
+    ["Georgia", "Gruzja", "Sakartvelo", "Georgien", "Géorgie"],
+    ["Germany", "Niemcy", "Deutschland", "Allemagne", "Alemania", "Germania", "RFN"],
+    ["Ghana"],
+    ["Greece", "Grecja", "Hellas", "Ellada", "Griechenland", "Grèce", "Grecia"],
+    ["Grenada"],
+    ["Guatemala", "Gwatemala"],
+    ["Guinea", "Gwinea"],
+    ["Guinea-Bissau", "Gwinea Bissau"],
+    ["Guyana", "Gujana"],
+    ["Haiti"],
+    ["Honduras"],
+    ["Hungary", "Węgry", "Magyarország", "Ungarn", "Hongrie", "Hungría"],
+    ["Iceland", "Islandia", "Ísland", "Island", "Islande"],
+    ["India", "Indie", "Bharat", "Indien", "Inde"],
+    ["Indonesia", "Indonezja", "Indonesien", "Indonésie"],
+    ["Iran", "Persia", "Persja"],
+    ["Iraq", "Irak"],
+    ["Ireland", "Irlandia", "Éire", "Eire", "Irland", "Irlande"],
+    ["Israel", "Izrael", "Israël"],
+    ["Italy", "Włochy", "Italia", "Italien", "Italie"],
+    ["Ivory Coast", "Côte d'Ivoire", "Cote d'Ivoire", "Wybrzeże Kości Słoniowej", "WKS"],
+    ["Jamaica", "Jamajka"],
+    ["Japan", "Japonia", "Nippon", "Nihon", "Japon", "Japón"],
+    ["Jordan", "Jordania", "Jordanien", "Jordanie"],
+    ["Kazakhstan", "Kazachstan", "Kasachstan"],
+    ["Kenya", "Kenia"],
+    ["Kiribati"],
+    ["Kosovo", "Kosowo"],
+    ["Kuwait", "Kuwejt"],
+    ["Kyrgyzstan", "Kirgistan", "Kirgizja", "Kirgisistan"],
+    ["Laos"],
+    ["Latvia", "Łotwa", "Latvija", "Lettland", "Lettonie"],
+    ["Lebanon", "Liban", "Libanon"],
+    ["Lesotho"],
+    ["Liberia"],
+    ["Libya", "Libia", "Libyen", "Libye"],
+    ["Liechtenstein", "Lichtenstein"],
+    ["Lithuania", "Litwa", "Lietuva", "Litauen", "Lituanie"],
+    ["Luxembourg", "Luksemburg", "Luxemburg"],
+    ["Madagascar", "Madagaskar"],
+    ["Malawi"],
+    ["Malaysia", "Malezja", "Malaisie"],
+    ["Maldives", "Malediwy"],
+    ["Mali"],
+    ["Malta"],
+    ["Marshall Islands", "Wyspy Marshalla"],
+    ["Mauritania", "Mauretania"],
+    ["Mauritius"],
+    ["Mexico", "Meksyk", "México", "Mexiko", "Mexique"],
+    ["Micronesia", "Federated States of Micronesia", "Mikronezja"],
+    ["Moldova", "Mołdawia", "Moldawien", "Moldavie"],
+    ["Monaco", "Monako"],
+    ["Mongolia", "Mongolei", "Mongolie"],
+    ["Montenegro", "Czarnogóra", "Crna Gora", "Monténégro"],
+    ["Morocco", "Maroko", "Marokko", "Maroc", "Marruecos"],
+    ["Mozambique", "Mozambik", "Mosambik"],
+    ["Myanmar", "Burma", "Birma", "Mjanma"],
+    ["Namibia"],
+    ["Nauru"],
+    ["Nepal"],
+    ["Netherlands", "Holland", "The Netherlands", "Holandia", "Niderlandy", "Nederland", "Niederlande", "Pays-Bas", "Países Bajos"],
+    ["New Zealand", "Nowa Zelandia", "Aotearoa", "NZ", "Neuseeland", "Nouvelle-Zélande"],
+    ["Nicaragua", "Nikaragua"],
+    ["Niger"],
+    ["Nigeria"],
+    ["North Korea", "Korea Północna", "DPRK", "Democratic People's Republic of Korea", "KRLD", "Nordkorea", "Corée du Nord"],
+    ["North Macedonia", "Macedonia", "Macedonia Północna", "Nordmazedonien", "Macédoine du Nord"],
+    ["Norway", "Norwegia", "Norge", "Noreg", "Norwegen", "Norvège", "Noruega"],
+    ["Oman"],
+    ["Pakistan"],
+    ["Palau"],
+    ["Palestine", "Palestyna", "State of Palestine"],
+    ["Panama"],
+    ["Papua New Guinea", "Papua-Nowa Gwinea", "PNG"],
+    ["Paraguay", "Paragwaj"],
+    ["Peru"],
+    ["Philippines", "Filipiny", "Philippinen", "Filipinas"],
+    ["Poland", "Polska", "Polen", "Pologne", "Polonia", "RP"],
+    ["Portugal", "Portugalia"],
+    ["Qatar", "Katar"],
+    ["Romania", "Rumunia", "România", "Rumänien", "Roumanie"],
+    ["Russia", "Rosja", "Russian Federation", "Federacja Rosyjska", "Rossiya", "Russland", "Russie", "Rusia"],
+    ["Rwanda", "Ruanda"],
+    ["Saint Kitts and Nevis", "Saint Kitts i Nevis", "St Kitts and Nevis"],
+    ["Saint Lucia", "St Lucia"],
+    ["Saint Vincent and the Grenadines", "Saint Vincent i Grenadyny", "St Vincent and the Grenadines"],
+    ["Samoa"],
+    ["San Marino"],
+    ["Sao Tome and Principe", "São Tomé and Príncipe", "Wyspy Świętego Tomasza i Książęca"],
+    ["Saudi Arabia", "Arabia Saudyjska", "KSA", "Saudi-Arabien", "Arabie saoudite"],
+    ["Senegal"],
+    ["Serbia", "Srbija", "Serbien", "Serbie"],
+    ["Seychelles", "Seszele"],
+    ["Sierra Leone"],
+    ["Singapore", "Singapur", "Singapour"],
+    ["Slovakia", "Słowacja", "Slovensko", "Slowakei", "Slovaquie"],
+    ["Slovenia", "Słowenia", "Slovenija", "Slowenien", "Slovénie"],
+    ["Solomon Islands", "Wyspy Salomona"],
+    ["Somalia"],
+    ["South Africa", "Republika Południowej Afryki", "RPA", "RSA", "Südafrika", "Afrique du Sud"],
+    ["South Korea", "Korea Południowa", "Republic of Korea", "Korea", "Südkorea", "Corée du Sud"],
+    ["South Sudan", "Sudan Południowy"],
+    ["Spain", "Hiszpania", "España", "Espana", "Spanien", "Espagne"],
+    ["Sri Lanka", "Cejlon", "Ceylon"],
+    ["Sudan"],
+    ["Suriname", "Surinam"],
+    ["Sweden", "Szwecja", "Sverige", "Schweden", "Suède", "Suecia"],
+    ["Switzerland", "Szwajcaria", "Schweiz", "Suisse", "Svizzera", "Suiza"],
+    ["Syria", "Syrien", "Syrie"],
+    ["Taiwan", "Tajwan", "Republic of China", "ROC"],
+    ["Tajikistan", "Tadżykistan", "Tadschikistan"],
+    ["Tanzania", "Tansania"],
+    ["Thailand", "Tajlandia", "Siam", "Thaïlande"],
+    ["Timor-Leste", "East Timor", "Timor Wschodni"],
+    ["Togo"],
+    ["Tonga"],
+    ["Trinidad and Tobago", "Trynidad i Tobago", "Trinidad"],
+    ["Tunisia", "Tunezja", "Tunesien", "Tunisie"],
+    ["Turkey", "Turcja", "Türkiye", "Turkiye", "Türkei", "Turquie", "Turquía"],
+    ["Turkmenistan"],
+    ["Tuvalu"],
+    ["Uganda"],
+    ["Ukraine", "Ukraina", "Ucrania"],
+    ["United Arab Emirates", "Zjednoczone Emiraty Arabskie", "UAE", "ZEA", "Emirates", "Emiraty"],
+    ["United Kingdom", "UK", "Great Britain", "Britain", "Wielka Brytania", "Zjednoczone Królestwo", "Großbritannien", "Royaume-Uni", "Reino Unido", "United Kingdom of Great Britain and Northern Ireland"],
+    ["United States", "United States of America", "USA", "US", "U.S.", "U.S.A.", "America", "Stany Zjednoczone", "Stany", "Ameryka", "Vereinigte Staaten", "États-Unis", "Estados Unidos", "EEUU"],
+    ["Uruguay", "Urugwaj"],
+    ["Uzbekistan", "Usbekistan"],
+    ["Vanuatu"],
+    ["Vatican City", "Vatican", "Watykan", "Holy See", "Stolica Apostolska", "Vatikan"],
+    ["Venezuela", "Wenezuela"],
+    ["Vietnam", "Viet Nam", "Wietnam"],
+    ["Yemen", "Jemen"],
+    ["Zambia"],
+    ["Zimbabwe"],
+]
+
+US_STATE_ALIASES = [
+    ["Alabama", "AL"], ["Alaska", "AK"], ["Arizona", "AZ"], ["Arkansas", "AR"],
+    ["California", "CA", "Kalifornia", "Cali"], ["Colorado", "CO", "Kolorado"],
+    ["Connecticut", "CT"], ["Delaware", "DE"],
+    ["District of Columbia", "DC", "Washington DC", "Washington D.C.", "Dystrykt Kolumbii"],
+    ["Florida", "FL", "Floryda"], ["Georgia", "GA"], ["Hawaii", "HI", "Hawaje"],
+    ["Idaho", "ID"], ["Illinois", "IL"], ["Indiana", "IN"], ["Iowa", "IA"],
+    ["Kansas", "KS"], ["Kentucky", "KY"], ["Louisiana", "LA", "Luizjana"],
+    ["Maine", "ME"], ["Maryland", "MD"], ["Massachusetts", "MA"],
+    ["Michigan", "MI"], ["Minnesota", "MN"], ["Mississippi", "MS", "Missisipi"],
+    ["Missouri", "MO"], ["Montana", "MT"], ["Nebraska", "NE"], ["Nevada", "NV"],
+    ["New Hampshire", "NH"], ["New Jersey", "NJ"], ["New Mexico", "NM", "Nowy Meksyk"],
+    ["New York", "NY", "Nowy Jork", "New York State"],
+    ["North Carolina", "NC", "Karolina Północna"], ["North Dakota", "ND", "Dakota Północna"],
+    ["Ohio", "OH"], ["Oklahoma", "OK"], ["Oregon", "OR"],
+    ["Pennsylvania", "PA", "Pensylwania"], ["Puerto Rico", "PR", "Portoryko"],
+    ["Rhode Island", "RI"], ["South Carolina", "SC", "Karolina Południowa"],
+    ["South Dakota", "SD", "Dakota Południowa"], ["Tennessee", "TN"],
+    ["Texas", "TX", "Teksas"], ["Utah", "UT"], ["Vermont", "VT"],
+    ["Virginia", "VA", "Wirginia"], ["Washington", "WA", "Washington State", "Waszyngton"],
+    ["West Virginia", "WV", "Wirginia Zachodnia"], ["Wisconsin", "WI"], ["Wyoming", "WY"],
+]
+
+WOJEWODZTWO_ALIASES = [
+    ["dolnośląskie", "Dolny Śląsk", "Lower Silesian", "Lower Silesia"],
+    ["kujawsko-pomorskie", "Kujawy", "Kuyavian-Pomeranian"],
+    ["lubelskie", "Lubelszczyzna", "Lublin Voivodeship"],
+    ["lubuskie", "Ziemia Lubuska", "Lubusz"],
+    ["łódzkie", "Łódź Voivodeship"],
+    ["małopolskie", "Małopolska", "Lesser Poland"],
+    ["mazowieckie", "Mazowsze", "Masovian", "Masovia"],
+    ["opolskie", "Opolszczyzna", "Opole Voivodeship"],
+    ["podkarpackie", "Podkarpacie", "Subcarpathian", "Subcarpathia"],
+    ["podlaskie", "Podlasie", "Podlachia"],
+    ["pomorskie", "Pomorze", "Pomeranian", "Pomerania"],
+    ["śląskie", "Śląsk", "Górny Śląsk", "Silesian", "Silesia"],
+    ["świętokrzyskie", "Kielecczyzna", "Holy Cross"],
+    ["warmińsko-mazurskie", "Warmia i Mazury", "Warmia", "Mazury", "Warmian-Masurian"],
+    ["wielkopolskie", "Wielkopolska", "Greater Poland"],
+    ["zachodniopomorskie", "Pomorze Zachodnie", "West Pomeranian", "West Pomerania"],
+]
+
+# Cities with powiat rights are guessed by their common short names
+POWIAT_ALIASES = [
+    ["Warszawa", "Warsaw", "Warschau", "Varsovie"],
+    ["Kraków", "Krakow", "Cracow", "Krakau", "Cracovie"],
+    ["Wrocław", "Breslau"],
+    ["Gdańsk", "Danzig"],
+    ["Poznań", "Posen"],
+    ["Łódź", "Lodz"],
+    ["Szczecin", "Stettin"],
+    ["Bielsko-Biała", "Bielsko"],
+    ["Gorzów Wielkopolski", "Gorzów"],
+    ["Jastrzębie-Zdrój", "Jastrzębie"],
+    ["Piotrków Trybunalski", "Piotrków"],
+]
+# fmt: on
+
+ALIASES = {
+    "countrydle": COUNTRY_ALIASES,
+    "us_statedle": US_STATE_ALIASES,
+    "wojewodztwodle": WOJEWODZTWO_ALIASES,
+    "powiatdle": POWIAT_ALIASES,
+}
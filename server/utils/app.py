@@ -2,6 +2,7 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 
+import facts
 import users.crud as ucrud
 from db import AsyncSessionLocal, get_engine
 
@@ -9,8 +10,13 @@ from db.models import *  # noqa: F403
 from db.base import Base
 from fastapi import FastAPI
 from qdrant import close_qdrant_client, init_qdrant
+from qdrant.lexical import load_lexical_indexes
+from qdrant.local_index import load_day_indexes
+from qdrant.writer import writer
+from llm import close_llm_client
 from sqlalchemy.ext.asyncio import AsyncEngine
 import utils
+from utils.resolver import load_resolvers
 
 
 async def init_models(engine: AsyncEngine):
@@ -43,8 +49,15 @@ async def lifespan(app: FastAPI):
         async with AsyncSessionLocal() as session:
             await ucrud.add_base_permissions(session)
             await init_qdrant(session)
+            await load_resolvers(session)
+            await load_lexical_indexes(session)
+
+        # Builds the geography facts off the event loop, before the first question
+        await asyncio.to_thread(facts.get_facts)
+        await load_day_indexes()
 
         utils.scheduler.start()
+        writer.start()
 
         yield
     except ConnectionRefusedError:
@@ -58,7 +71,10 @@ async def lifespan(app: FastAPI):
         try:
             logging.info("Shutting down application...")
             utils.scheduler.shutdown(wait=True)
-            close_qdrant_client()
+            # Flushes queued question points while the client is still open
+            await writer.stop()
+            await close_qdrant_client()
+            await close_llm_client()
             await engine.dispose()
             logging.info("Application shutdown complete.")
         except Exception as e:
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from types import ModuleType
+from typing import Any, List
+
+import metrics
+import qdrant
+from db import AsyncSessionLocal
+from llm.cache import normalize_question
+from qdrant.utils import add_question_to_qdrant, get_points
+from qdrant.vectorize import get_embedding
+
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "50"))
+PREWARM_DAYS_AHEAD = int(os.getenv("PREWARM_DAYS_AHEAD", "1"))
+PREWARM_HISTORY_DAYS = int(os.getenv("PREWARM_HISTORY_DAYS", "30"))
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "4"))
+
+# Namespace of the deterministic point ids, so a rerun upserts the same points
+PREWARM_NAMESPACE = uuid.UUID("5b0c2f0e-7a4d-4c1e-9a53-2f6c8d1e4b77")
+
+
+@dataclass
+class PrewarmGame:
+    name: str
+    utils: ModuleType
+    day_repository: Any
+    get_day_by_date: str
+    question_repository: Any
+    filter_key: str
+    collection_name: str
+
+    def target_id(self, day) -> int:
+        return getattr(day, self.filter_key)
+
+
+def get_games() -> List[PrewarmGame]:
+    # Imported here, the game packages import the routers and users.utils
+    import countrydle.utils as gutils
+    import powiatdle.utils as putils
+    import us_statedle.utils as uutils
+    import wojewodztwodle.utils as wutils
+    from db.repositories.countrydle import CountrydleRepository
+    from db.repositories.powiatdle import (
+        PowiatdleDayRepository,
+        PowiatdleQuestionRepository,
+    )
+    from db.repositories.question import CountrydleQuestionsRepository
+    from db.repositories.us_statedle import (
+        USStatedleDayRepository,
+        USStatedleQuestionRepository,
+    )
+    from db.repositories.wojewodztwodle import (
+        WojewodztwodleDayRepository,
+        WojewodztwodleQuestionRepository,
+    )
+
+    return [
+        PrewarmGame(
+            "countrydle",
+            gutils,
+            CountrydleRepository,
+            "get_day_country_by_date",
+            CountrydleQuestionsRepository,
+            "country_id",
+            "countries_questions",
+        ),
+        PrewarmGame(
+            "powiatdle",
+            putils,
+            PowiatdleDayRepository,
+            "get_day_powiat_by_date",
+            PowiatdleQuestionRepository,
+            "powiat_id",
+            "powiaty_questions",
+        ),
+        PrewarmGame(
+            "us_statedle",
+            uutils,
+            USStatedleDayRepository,
+            "get_day_us_state_by_date",
+            USStatedleQuestionRepository,
+            "us_state_id",
+            "us_states_questions",
+        ),
+        PrewarmGame(
+            "wojewodztwodle",
+            wutils,
+            WojewodztwodleDayRepository,
+            "get_day_wojewodztwo_by_date",
+            WojewodztwodleQuestionRepository,
+            "wojewodztwo_id",
+            "wojewodztwa_questions",
+        ),
+    ]
+
+
+def prewarm_point_id(collection_name: str, target_id: int, question: str) -> str:
+    key = f"{collection_name}:{target_id}:{normalize_question(question)}"
+    return str(uuid.uuid5(PREWARM_NAMESPACE, key))
+
+
+async def prewarm_question(game: PrewarmGame, day, question: str):
+    target_id = game.target_id(day)
+    point_id = prewarm_point_id(game.collection_name, target_id, question)
+
+    # Points are only written once the answer exists, so after a crash the
+    # next run skips everything that was already done
+    if await get_points(qdrant.async_client, game.collection_name, [point_id]):
+        metrics.inc(f"prewarm.{game.name}.skipped")
+        return
+
+    async with AsyncSessionLocal() as session:
+        enhanced = await game.utils.enhance_question(question)
+        if not enhanced.valid:
+            return
+
+        question_create, question_vector = await game.utils.ask_question(
+            enhanced, day, None, session
+        )
+
+    if question_vector is None:
+        # Answered by the facts store or the answer cache, which return no vector.
+        # It is still stored under its id, or every rerun would answer it again.
+        question_vector = await get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL)
+
+    await add_question_to_qdrant(
+        question_create,
+        question_vector,
+        filter_key=game.filter_key,
+        filter_value=target_id,
+        collection_name=game.collection_name,
+        point_id=point_id,
+    )
+    metrics.inc(f"prewarm.{game.name}.answered")
+
+
+async def get_upcoming_days(game: PrewarmGame, day_dates: List[date]) -> list:
+    days = []
+    async with AsyncSessionLocal() as session:
+        repo = game.day_repository(session)
+        for day_date in day_dates:
+            day = await getattr(repo, game.get_day_by_date)(day_date)
+            if day is not None:
+                days.append(day)
+    return days
+
+
+async def prewarm_answer_cache(
+    top_n: int = PREWARM_TOP_N,
+    days_ahead: int = PREWARM_DAYS_AHEAD,
+    concurrency: int = PREWARM_CONCURRENCY,
+):
+    """
+    Answers the most frequently asked questions of the last PREWARM_HISTORY_DAYS
+    for every upcoming target, so the first players of the day hit the answer cache.
+    """
+    day_dates = [date.today() + timedelta(days=n) for n in range(days_ahead + 1)]
+    since = date.today() - timedelta(days=PREWARM_HISTORY_DAYS)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(game: PrewarmGame, day, question: str):
+        async with semaphore:
+            try:
+                await prewarm_question(game, day, question)
+            except Exception as e:
+                print(f"Prewarming '{question}' for {game.name} failed: {e}")
+                metrics.inc(f"prewarm.{game.name}.errors")
+
+    tasks = []
+    for game in get_games():
+        async with AsyncSessionLocal() as session:
+            questions = await game.question_repository(
+                session
+            ).get_most_asked_questions(since, top_n)
+
+        days = await get_upcoming_days(game, day_dates)
+        print(
+            f"Prewarming {len(questions)} questions for {len(days)} upcoming {game.name} days"
+        )
+        tasks.extend(bounded(game, day, question) for day in days for question in questions)
+
+    await asyncio.gather(*tasks)
+    print("Prewarming finished")
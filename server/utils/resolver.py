@@ -0,0 +1,181 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import metrics
+from db.models import Country, Powiat, USState, Wojewodztwo
+from facts.names import fold
+from utils.aliases import ALIASES
+
+# Words that do not tell targets apart: 'powiat krakowski' is guessed as 'krakowski'
+IGNORED_WORDS = {"the", "powiat", "miasto", "wojewodztwo", "stan", "state", "of"}
+
+
+def normalize_name(text: str) -> str:
+    return " ".join(word for word in fold(text).split() if word not in IGNORED_WORDS)
+
+
+def max_distance(key: str) -> int:
+    """Typos tolerated in a guess: none in short names, where one letter is another name."""
+    if len(key) < 5:
+        return 0
+    if len(key) < 9:
+        return 1
+    return 2
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance counting a swap of two neighbouring letters as one edit, or
+    limit + 1 as soon as it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if before and i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class NameResolver:
+    """
+    Maps a free-text guess to the id of exactly one target: first by the normalized
+    name or alias, then by the closest name within `max_distance` typos. A guess
+    matching several targets equally well resolves to None.
+    """
+
+    def __init__(self, names: Iterable[Tuple[int, str]]):
+        self._ids: Dict[str, Set[int]] = defaultdict(set)
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+
+        for target_id, name in names:
+            # 'Powiat bielski (województwo śląskie)' is also just 'bielski', shared
+            # with its namesake, so a bare 'bielski' stays ambiguous
+            for key in {normalize_name(name), normalize_name(name.partition("(")[0])}:
+                if not key:
+                    continue
+                self._ids[key].add(target_id)
+                for trigram in trigrams(key):
+                    self._trigrams[trigram].add(key)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def resolve(self, text: str) -> int | None:
+        key = normalize_name(text)
+        ids = self._ids.get(key)
+        if ids:
+            return next(iter(ids)) if len(ids) == 1 else None
+
+        limit = max_distance(key)
+        if not limit:
+            return None
+
+        # An edit changes at most 3 trigrams, a swap of two letters 4
+        query = trigrams(key)
+        shared: Dict[str, int] = defaultdict(int)
+        for trigram in query:
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] += 1
+
+        best, best_ids = limit + 1, set()
+        for candidate, count in shared.items():
+            if count < len(query) - 4 * limit:
+                continue
+            distance = edit_distance(key, candidate, limit)
+            if distance < best:
+                best, best_ids = distance, set(self._ids[candidate])
+            elif distance == best:
+                best_ids |= self._ids[candidate]
+
+        return next(iter(best_ids)) if len(best_ids) == 1 else None
+
+
+def resolver_names(game: str, targets: Iterable[Tuple[int, List[str]]]) -> List[Tuple[int, str]]:
+    """The targets' own names plus every alias group containing one of them."""
+    groups = ALIASES.get(game, [])
+    by_name = {normalize_name(name): group for group in groups for name in group}
+
+    names = []
+    for target_id, own_names in targets:
+        own_names = [name for name in own_names if name]
+        names.extend((target_id, name) for name in own_names)
+        for name in own_names:
+            names.extend((target_id, alias) for alias in by_name.get(normalize_name(name), []))
+    return names
+
+
+async def load_targets(game: str, session: AsyncSession) -> List[Tuple[int, List[str]]]:
+    if game == "countrydle":
+        result = await session.execute(select(Country.id, Country.name, Country.official_name))
+        return [(cid, [name, official_name]) for cid, name, official_name in result.all()]
+
+    model, column = {
+        "powiatdle": (Powiat, Powiat.nazwa),
+        "us_statedle": (USState, USState.name),
+        "wojewodztwodle": (Wojewodztwo, Wojewodztwo.nazwa),
+    }[game]
+    result = await session.execute(select(model.id, column))
+    return [(target_id, [name]) for target_id, name in result.all()]
+
+
+GAMES = ("countrydle", "powiatdle", "us_statedle", "wojewodztwodle")
+
+_resolvers: Dict[str, NameResolver] = {}
+_lock = asyncio.Lock()
+
+
+async def get_resolver(game: str, session: AsyncSession) -> NameResolver:
+    resolver = _resolvers.get(game)
+    if resolver is not None:
+        return resolver
+
+    async with _lock:
+        resolver = _resolvers.get(game)
+        if resolver is None:
+            targets = await load_targets(game, session)
+            resolver = NameResolver(resolver_names(game, targets))
+            print(f"Built {game} guess resolver with {len(resolver)} names")
+            # Before the targets are populated there is nothing to keep
+            if targets:
+                _resolvers[game] = resolver
+    return resolver
+
+
+async def load_resolvers(session: AsyncSession):
+    """Builds every game's resolver at startup, so no guess waits for it."""
+    for game in GAMES:
+        await get_resolver(game, session)
+
+
+async def resolve_guess(game: str, guess: str, session: AsyncSession) -> int | None:
+    """The id of the target a free-text guess names, or None if unknown or ambiguous."""
+    resolver = await get_resolver(game, session)
+
+    with metrics.timer(f"guess_resolver.{game}.resolve"):
+        target_id = resolver.resolve(guess)
+
+    outcome = "unresolved" if target_id is None else "resolved"
+    metrics.inc(f"guess_resolver.{game}.{outcome}")
+    return target_id
@@ -1,22 +1,29 @@
-import os
-import json
-from typing import List, Tuple
-from openai import OpenAI
+import asyncio
+from typing import Awaitable, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db import AsyncSessionLocal
 from db.models import Wojewodztwo, WojewodztwodleDay, User
-from qdrant.utils import get_fragments_matching_question
+from qdrant.utils import find_cached_answer, get_fragments_matching_question
+from qdrant.vectorize import get_embedding
 import qdrant
+import facts
+import llm
+import metrics
+from llm.cache import cached_enhancement, normalize_question
+from llm.pipeline import FROM_ANALYSIS, fused_prompts, pipeline_mode
+from llm.singleflight import SingleFlight
 from schemas.wojewodztwodle import (
     WojewodztwoQuestionCreate,
     WojewodztwoQuestionEnhanced,
 )
 from db.repositories.wojewodztwo import WojewodztwoRepository
 
+question_flight = SingleFlight("wojewodztwodle")
 
-async def enhance_question(question: str) -> WojewodztwoQuestionEnhanced:
-    system_prompt = """
+
+ENHANCE_SYSTEM_PROMPT = """
 Jesteś ekspertem ds. analizy pytań w grze w zgadywanie polskich województw. Twoim celem jest przetworzenie pytań użytkowników na ustrukturyzowany format, który ułatwia dokładne wyszukiwanie informacji.
 
 ### Twoje główne obowiązki:
@@ -66,31 +73,22 @@ User: "Ile ma mieszkańców?"
 Output: {"question": null, "intent": null, "required_info": null, "valid": false, "explanation": "To jest pytanie otwarte o liczbę, a nie pytanie Tak/Nie."}
 """
 
+
+@cached_enhancement("wojewodztwodle", WojewodztwoQuestionEnhanced)
+async def enhance_question(question: str) -> WojewodztwoQuestionEnhanced:
     question_prompt = f"""User's Question: {question}"""
 
     prompts = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": ENHANCE_SYSTEM_PROMPT},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    answer_dict: dict = await llm.chat_json(prompts)
+
+    return parse_enhanced(question, answer_dict)
 
-    answer = response.choices[0].message.content
 
-    try:
-        answer_dict: dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
 
+def parse_enhanced(question: str, answer_dict: dict) -> WojewodztwoQuestionEnhanced:
     return WojewodztwoQuestionEnhanced(
         original_question=question,
         valid=answer_dict["valid"],
@@ -101,33 +99,15 @@ Output: {"question": null, "intent": null, "required_info": null, "valid": false
     )
 
 
-
-async def ask_question(
-    question: WojewodztwoQuestionEnhanced,
-    day_wojewodztwo: WojewodztwodleDay,
-    user: User | None,
-    session: AsyncSession,
-) -> Tuple[WojewodztwoQuestionCreate, List[float]]:
-
-    fragments, question_vector = await get_fragments_matching_question(
-        question.question,
-        "wojewodztwo_id",
-        day_wojewodztwo.wojewodztwo_id,
-        "wojewodztwa",
-        session,
-        limit=qdrant.WOJEWODZTWDLE_CONTEXT_LIMIT
-    )
-    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
-    wojewodztwo: Wojewodztwo = await WojewodztwoRepository(session).get(
-        day_wojewodztwo.wojewodztwo_id
-    )
-
-    system_prompt = f"""
+def answer_system_prompt(
+    wojewodztwo: Wojewodztwo, context: str, intent: str | None, required_info: str | None
+) -> str:
+    return f"""
 Jesteś 'Mistrzem Gry' w Wojewodztwodle. Twoim zadaniem jest odpowiedzieć na pytanie Tak/Nie dotyczące konkretnego polskiego województwa na podstawie dostarczonego kontekstu i Twojej wiedzy ogólnej.
 
 ### Docelowe województwo: {wojewodztwo.nazwa}
-### Intencja pytania: {question.intent}
-### Wymagane informacje: {question.required_info}
+### Intencja pytania: {intent}
+### Wymagane informacje: {required_info}
 
 ### Fragmenty kontekstu:
 {context}
@@ -150,32 +130,79 @@ Jesteś 'Mistrzem Gry' w Wojewodztwodle. Twoim zadaniem jest odpowiedzieć na py
 """
 
 
+def answer_prompts(
+    wojewodztwo: Wojewodztwo, question: WojewodztwoQuestionEnhanced, context: str
+) -> List[dict]:
+    system_prompt = answer_system_prompt(
+        wojewodztwo, context, question.intent, question.required_info
+    )
+
+
     question_prompt = f"""Oryginalne pytanie użytkownika: {question.original_question}
 Uproszczone pytanie: {question.question}"""
 
-
     prompts = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": question_prompt},
     ]
-    model = os.getenv("QUIZ_MODEL")
-
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=prompts,
-        response_format={"type": "json_object"},
-        temperature=0.0,
-        seed=42,
-    )
+    return prompts
 
-    answer = response.choices[0].message.content
 
-    try:
-        answer_dict = json.loads(answer)
-    except json.JSONDecodeError:
-        print(answer)
-        raise
+async def ask_question(
+    question: WojewodztwoQuestionEnhanced,
+    day_wojewodztwo: WojewodztwodleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[WojewodztwoQuestionCreate, List[float] | None]:
+
+    wojewodztwo: Wojewodztwo = await WojewodztwoRepository(session).get(
+        day_wojewodztwo.wojewodztwo_id
+    )
+    known = facts.evaluate("wojewodztwodle", wojewodztwo.nazwa, question)
+    if known is not None:
+        question_create = _answered_question(
+            question, known.as_answer(), known.context, day_wojewodztwo, user
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.wojewodztwodle.classic.embed"):
+        question_vector = await get_embedding(question.question, qdrant.EMBEDDING_MODEL)
+
+    with metrics.timer("pipeline.wojewodztwodle.classic.answer_cache"):
+        cached = await find_cached_answer(
+            question_vector,
+            "wojewodztwo_id",
+            day_wojewodztwo.wojewodztwo_id,
+            "wojewodztwa_questions",
+        )
+    if cached:
+        question_create = WojewodztwoQuestionCreate(
+            user_id=user.id if user else None,
+            day_id=day_wojewodztwo.id,
+            original_question=question.original_question,
+            valid=question.valid,
+            question=question.question,
+            answer=cached.answer,
+            explanation=cached.explanation,
+            context=cached.context,
+        )
+        return question_create, None
+
+    with metrics.timer("pipeline.wojewodztwodle.classic.retrieve"):
+        fragments, question_vector = await get_fragments_matching_question(
+            question.question,
+            "wojewodztwo_id",
+            day_wojewodztwo.wojewodztwo_id,
+            "wojewodztwa",
+            session,
+            limit=qdrant.WOJEWODZTWDLE_CONTEXT_LIMIT,
+            query_vector=question_vector,
+        )
+    context = "\n[ ... ]\n".join(fragment.text for fragment in fragments)
+
+    prompts = answer_prompts(wojewodztwo, question, context)
+    with metrics.timer("pipeline.wojewodztwodle.classic.answer"):
+        answer_dict = await llm.chat_json(prompts)
 
     question_create = WojewodztwoQuestionCreate(
         user_id=user.id if user else None,
@@ -189,3 +216,179 @@ Uproszczone pytanie: {question.question}"""
     )
 
     return question_create, question_vector
+
+
+async def process_question(
+    question: str,
+    day_wojewodztwo: WojewodztwodleDay,
+    user: User | None,
+) -> Tuple[WojewodztwoQuestionEnhanced, WojewodztwoQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    """
+    Validates and answers a player's question in the configured QUESTION_PIPELINE mode.
+    The answer is None for invalid questions; the vector is None when nothing should
+    be added to the wojewodztwa_questions collection, and still computing (awaitable) in fused mode.
+
+    Identical questions about the same target that arrive while one is being answered
+    share its result; each caller still gets its own copy to store as its row.
+    """
+    key = (day_wojewodztwo.wojewodztwo_id, normalize_question(question))
+    (enhanced, question_create, question_vector), shared = await question_flight.do(
+        key, lambda: _process_question_in_session(question, day_wojewodztwo, user)
+    )
+
+    if shared:
+        enhanced = enhanced.model_copy(update={"original_question": question})
+        if question_create is not None:
+            question_create = question_create.model_copy(
+                update={
+                    "user_id": user.id if user else None,
+                    "original_question": question,
+                }
+            )
+        # The first caller adds the question to the collection
+        question_vector = None
+
+    return enhanced, question_create, question_vector
+
+
+async def _process_question_in_session(
+    question: str, day_wojewodztwo: WojewodztwodleDay, user: User | None
+) -> Tuple[WojewodztwoQuestionEnhanced, WojewodztwoQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    # Not the caller's session: the shared call can outlive the request that started it
+    async with AsyncSessionLocal() as session:
+        return await _process_question(question, day_wojewodztwo, user, session)
+
+
+async def _process_question(
+    question: str,
+    day_wojewodztwo: WojewodztwodleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[WojewodztwoQuestionEnhanced, WojewodztwoQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    mode = pipeline_mode()
+    with metrics.timer(f"pipeline.wojewodztwodle.{mode}.total"):
+        if mode == "parallel":
+            return await _process_parallel(question, day_wojewodztwo, user, session)
+        if mode == "fused":
+            return await _process_fused(question, day_wojewodztwo, user, session)
+
+        with metrics.timer("pipeline.wojewodztwodle.classic.enhance"):
+            enhanced = await enhance_question(question)
+        if not enhanced.valid:
+            return enhanced, None, None
+
+        question_create, question_vector = await ask_question(
+            question=enhanced, day_wojewodztwo=day_wojewodztwo, user=user, session=session
+        )
+        return enhanced, question_create, question_vector
+
+
+async def _raw_question_context(
+    question: str, day_wojewodztwo: WojewodztwodleDay, session: AsyncSession, mode: str
+) -> str:
+    raw_vector = await metrics.timed(
+        f"pipeline.wojewodztwodle.{mode}.embed",
+        get_embedding(question, qdrant.EMBEDDING_MODEL),
+    )
+
+    with metrics.timer(f"pipeline.wojewodztwodle.{mode}.retrieve"):
+        fragments, _ = await get_fragments_matching_question(
+            question,
+            "wojewodztwo_id",
+            day_wojewodztwo.wojewodztwo_id,
+            "wojewodztwa",
+            session,
+            limit=qdrant.WOJEWODZTWDLE_CONTEXT_LIMIT,
+            query_vector=raw_vector,
+        )
+    return "\n[ ... ]\n".join(fragment.text for fragment in fragments)
+
+
+def _answered_question(
+    enhanced: WojewodztwoQuestionEnhanced,
+    answer_dict: dict,
+    context: str,
+    day_wojewodztwo: WojewodztwodleDay,
+    user: User | None,
+) -> WojewodztwoQuestionCreate:
+    return WojewodztwoQuestionCreate(
+        user_id=user.id if user else None,
+        day_id=day_wojewodztwo.id,
+        original_question=enhanced.original_question,
+        valid=enhanced.valid,
+        question=enhanced.question,
+        answer=answer_dict.get("answer"),
+        explanation=answer_dict.get("explanation") or "No explanation provided.",
+        context=context,
+    )
+
+
+async def _process_parallel(
+    question: str,
+    day_wojewodztwo: WojewodztwodleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[WojewodztwoQuestionEnhanced, WojewodztwoQuestionCreate | None, List[float] | None]:
+    # Retrieval uses the raw question so it does not wait for the rewrite
+    enhanced, context = await asyncio.gather(
+        metrics.timed("pipeline.wojewodztwodle.parallel.enhance", enhance_question(question)),
+        _raw_question_context(question, day_wojewodztwo, session, "parallel"),
+    )
+    if not enhanced.valid:
+        return enhanced, None, None
+
+    wojewodztwo: Wojewodztwo = await WojewodztwoRepository(session).get(day_wojewodztwo.wojewodztwo_id)
+    known = facts.evaluate("wojewodztwodle", wojewodztwo.nazwa, enhanced)
+    if known is not None:
+        question_create = _answered_question(
+            enhanced, known.as_answer(), known.context, day_wojewodztwo, user
+        )
+        return enhanced, question_create, None
+
+    answer_dict, question_vector = await asyncio.gather(
+        metrics.timed(
+            "pipeline.wojewodztwodle.parallel.answer",
+            llm.chat_json(answer_prompts(wojewodztwo, enhanced, context)),
+        ),
+        metrics.timed(
+            "pipeline.wojewodztwodle.parallel.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        ),
+    )
+
+    question_create = _answered_question(enhanced, answer_dict, context, day_wojewodztwo, user)
+    return enhanced, question_create, question_vector
+
+
+async def _process_fused(
+    question: str,
+    day_wojewodztwo: WojewodztwodleDay,
+    user: User | None,
+    session: AsyncSession,
+) -> Tuple[WojewodztwoQuestionEnhanced, WojewodztwoQuestionCreate | None, List[float] | Awaitable[List[float]] | None]:
+    context = await _raw_question_context(question, day_wojewodztwo, session, "fused")
+    wojewodztwo: Wojewodztwo = await WojewodztwoRepository(session).get(day_wojewodztwo.wojewodztwo_id)
+
+    prompts = fused_prompts(
+        ENHANCE_SYSTEM_PROMPT,
+        answer_system_prompt(wojewodztwo, context, FROM_ANALYSIS, FROM_ANALYSIS),
+        question,
+    )
+    answer_dict = await metrics.timed(
+        "pipeline.wojewodztwodle.fused.answer", llm.chat_json(prompts)
+    )
+
+    enhanced = parse_enhanced(question, answer_dict)
+    if not enhanced.valid:
+        return enhanced, None, None
+
+    # Only the question's Qdrant point needs the vector, the answer does not wait for it
+    question_vector = asyncio.ensure_future(
+        metrics.timed(
+            "question_point.wojewodztwodle.embed_question",
+            get_embedding(enhanced.question, qdrant.EMBEDDING_MODEL),
+        )
+    )
+
+    question_create = _answered_question(enhanced, answer_dict, context, day_wojewodztwo, user)
+    return enhanced, question_create, question_vector